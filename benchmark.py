@@ -0,0 +1,555 @@
+"""
+Small benchmarks for the engine. Run with ``python benchmark.py``.
+
+Every benchmark uses fresh boards and an empty engine cache, so the backends are compared on equal terms.
+"""
+import os
+import random
+import tempfile
+import time
+import numpy as np
+import bitmasks
+import engine
+import magic
+import tuning
+from evaluation import LAZY_EVALUATION_MARGIN, PawnHashTable, evaluate_many, evaluate_pawn_structure, taper
+from pieces import Pawn
+from nnue import Network
+from transposition import BUCKET_SIZE, TranspositionTable
+from board import BACKENDS, create_board
+from engine import minMax, MinMaxArg
+from moves import CAPTURE, NO_MOVE
+
+
+POSITIONS = ["tests/random1.board", "tests/random2.board"]
+
+
+def time_call(function, repetitions=1):
+    """
+    Calls the function the given number of times and returns the average duration in seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        function()
+    return (time.perf_counter() - start) / repetitions
+
+
+def benchmark_backends(depth=2, repetitions=5):
+    """
+    Runs minMax with the given depth on all benchmark positions for every board backend. Loading the board is not
+    timed, and the fastest of the repetitions is kept so that a single slow run does not decide the comparison.
+
+    :return: Dict mapping (backend, position) to the best search time in seconds
+    """
+    results = {}
+    for backend in BACKENDS:
+        for position in POSITIONS:
+            durations = []
+            for _ in range(repetitions):
+                board = create_board(backend)
+                board.load_from_disk(position)
+                engine.transposition_table.clear()
+                durations.append(time_call(lambda: minMax(board, MinMaxArg(depth=depth))))
+            results[(backend, position)] = min(durations)
+    return results
+
+
+def print_backend_speedup(depth=2):
+    results = benchmark_backends(depth)
+    print(f"minMax depth {depth}")
+    for position in POSITIONS:
+        baseline = results[("mailbox", position)]
+        for backend in BACKENDS:
+            duration = results[(backend, position)]
+            print(f"  {position:<22} {backend:<10} {duration * 1000:8.1f} ms  {baseline / duration:5.2f}x")
+
+
+def is_king_check_by_move_generation(board, white):
+    """
+    The previous check detection, kept for comparison: generates all reachable squares of every opposing piece
+    and looks for the kings square.
+    """
+    king = board.find_king(white)
+    for piece in board.iterate_cells_with_pieces(not white):
+        if king.square in piece.get_reachable_squares():
+            return True
+    return False
+
+
+def print_check_detection_speedup(repetitions=2000):
+    print("is_king_check (both colors)")
+    for position in POSITIONS:
+        board = create_board("mailbox")
+        board.load_from_disk(position)
+
+        def by_move_generation():
+            is_king_check_by_move_generation(board, True)
+            is_king_check_by_move_generation(board, False)
+
+        def attack_maps():
+            board.is_king_check(True)
+            board.is_king_check(False)
+
+        before = time_call(by_move_generation, repetitions)
+        after = time_call(attack_maps, repetitions)
+        print(f"  {position:<22} {before * 1e6:8.1f} us -> {after * 1e6:6.1f} us  {before / after:5.2f}x")
+
+
+def legal_moves_by_make_unmake(board, white):
+    """
+    The previous legal move generation, kept for comparison: makes every reachable move and tests for check.
+    """
+    moves = []
+    for piece in board.iterate_cells_with_pieces(white):
+        for square in piece.get_reachable_squares():
+            board.make_move(piece, square)
+            if not board.is_king_check(white):
+                moves.append((piece, square))
+            board.unmake_move()
+    return moves
+
+
+def print_legal_move_speedup(repetitions=500):
+    print("legal moves (both colors)")
+    for position in POSITIONS:
+        board = create_board("mailbox")
+        board.load_from_disk(position)
+
+        def by_make_unmake():
+            legal_moves_by_make_unmake(board, True)
+            legal_moves_by_make_unmake(board, False)
+
+        def with_pins():
+            board.generate_legal_moves(True)
+            board.generate_legal_moves(False)
+
+        before = time_call(by_make_unmake, repetitions)
+        after = time_call(with_pins, repetitions)
+        print(f"  {position:<22} {before * 1e6:8.1f} us -> {after * 1e6:6.1f} us  {before / after:5.2f}x")
+
+
+def print_slider_speedup(repetitions=20000):
+    print("slider attacks (rook + bishop)")
+    rng = random.Random(1)
+    queries = [(rng.randrange(64), rng.getrandbits(64) & rng.getrandbits(64)) for _ in range(64)]
+
+    def query(rook_attacks, bishop_attacks):
+        for index, occupied in queries:
+            rook_attacks(index, occupied)
+            bishop_attacks(index, occupied)
+
+    before = time_call(lambda: query(bitmasks.rook_attacks, bitmasks.bishop_attacks), repetitions // 64)
+    after = time_call(lambda: query(magic.rook_attacks, magic.bishop_attacks), repetitions // 64)
+    print(f"  per query  {before / 64 * 1e6:6.2f} us -> {after / 64 * 1e6:6.2f} us  {before / after:5.2f}x")
+
+
+def random_positions(count, seed=1):
+    """
+    Plays random games from the benchmark positions and returns the visited positions as (count, 64) int8 array.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = create_board("mailbox")
+        board.load_from_disk(rng.choice(POSITIONS))
+        white = True
+        for _ in range(40):
+            moves = board.generate_legal_moves(white)
+            if not moves or len(positions) == count:
+                break
+            board.make_move(*rng.choice(moves))
+            white = not white
+            positions.append(board.to_array())
+    return np.array(positions)
+
+
+def print_batch_evaluation_speedup(count=100000, distinct=2000, looped=5000):
+    print(f"evaluate {count} positions")
+    positions = np.tile(random_positions(distinct), (count // distinct, 1))
+    board = create_board("mailbox")
+
+    def loop():
+        for position in positions[:looped]:
+            board.load_from_array(position)
+            board.evaluate()
+
+    # Looping is too slow for all positions, its time is scaled up from the first ones
+    before = time_call(loop) * count / looped
+    after = time_call(lambda: evaluate_many(positions), 3)
+    print(f"  {before * 1000:8.1f} ms -> {after * 1000:6.1f} ms  {before / after:5.0f}x")
+
+
+# Configuration of test C02, tests C03 and C04 use random1.board
+C02_CONFIGURATION = """. . . . . . . K
+. . . . . . . .
+. . . p . . . .
+. . . . . . . .
+. b . R . q . .
+. . . . . . . .
+. . . k . . . .
+. . . . . . . ."""
+
+
+def score_children_by_make_unmake(board, white):
+    """
+    The previous child scoring, kept for comparison: makes every move, evaluates and takes it back.
+    """
+    moves = board.generate_encoded_moves(white)
+    scores = []
+    for move in moves:
+        board.make_encoded_move(move)
+        scores.append(board.evaluate())
+        board.unmake_move()
+    return moves, scores
+
+
+def print_child_scoring_speedup(repetitions=2000):
+    print("score all children")
+    for name in ["C02", "tests/random1.board"]:
+        board = create_board("mailbox")
+        if name == "C02":
+            board.load_from_memory(C02_CONFIGURATION)
+        else:
+            board.load_from_disk(name)
+
+        for white in [True, False]:
+            before = time_call(lambda: score_children_by_make_unmake(board, white), repetitions)
+            after = time_call(lambda: board.evaluate_children(board.generate_encoded_moves(white)), repetitions)
+            color = "white" if white else "black"
+            print(f"  {name:<22} {color:<6} {before * 1e6:8.1f} us -> {after * 1e6:6.1f} us  {before / after:5.2f}x")
+
+
+class KeyCountingPawnHashTable(PawnHashTable):
+    """
+    Pawn hash table remembering every probed key, to tell misses of structures never seen before (which no table
+    size avoids) from misses of structures replaced in the table.
+    """
+
+    def __init__(self, size_bits):
+        super().__init__(size_bits)
+        self.keys = set()
+
+    def probe(self, key):
+        self.keys.add(key)
+        return super().probe(key)
+
+
+def print_pawn_hash_statistics(depth=3, sizes=(6, 8, 10, 14), plies=10):
+    print(f"pawn hash table, minMax depth {depth}")
+    for size_bits in sizes:
+        for name in ["start", "C02", "tests/random1.board", "tests/random2.board"]:
+            board = create_board("mailbox")
+            if name == "start":
+                board.reset()
+            elif name == "C02":
+                board.load_from_memory(C02_CONFIGURATION)
+            else:
+                board.load_from_disk(name)
+            board.pawn_table = KeyCountingPawnHashTable(size_bits)
+            engine.transposition_table.clear()
+            minMax(board, MinMaxArg(depth, True))
+            table = board.pawn_table
+            # Every structure misses on its first probe, the rest could be hits with a large enough table
+            best = 1 - len(table.keys) / (table.hits + table.misses)
+            print(
+                f"  {1 << size_bits:6} slots {name:<22} {table.hits:6} hits {table.misses:5} misses"
+                f"  hit rate {table.hit_rate:6.1%} (at most {best:6.1%})  {table.used_slots():5} slots used"
+            )
+
+    # The table is kept over the moves of a game, later searches meet the structures of the earlier ones
+    print(f"  over a game of {plies + 1} minMax depth {depth} searches, {1 << sizes[-1]} slots")
+    for name in ["start", "tests/random1.board", "tests/random2.board"]:
+        board = create_board("mailbox")
+        if name == "start":
+            board.reset()
+        else:
+            board.load_from_disk(name)
+        board.pawn_table = PawnHashTable(sizes[-1])
+        engine.transposition_table.clear()
+        white = True
+        for _ in range(plies + 1):
+            move, _ = engine.search(board, MinMaxArg(depth, white))
+            if move == NO_MOVE:
+                break
+            board.make_encoded_move(move)
+            white = not white
+        table = board.pawn_table
+        print(f"  {name:<22} {table.hits + table.misses:6} probes  hit rate {table.hit_rate:6.1%}")
+
+    board = create_board("mailbox")
+    board.load_from_disk("tests/random1.board")
+    pawns = [[piece.square for piece in board.iterate_cells_with_pieces(white) if isinstance(piece, Pawn)] for white in [True, False]]
+    board.pawn_structure_scores()
+    hit = time_call(board.pawn_structure_scores, 20000)
+    computed = time_call(lambda: evaluate_pawn_structure(*pawns), 20000)
+    print(f"  pawn structure from the table {hit * 1e6:.2f} us, computed {computed * 1e6:.2f} us")
+
+
+def print_evaluation_term_cost(repetitions=100000, depth=3):
+    print("evaluation terms")
+    for mobility, king_safety in [(False, False), (True, False), (False, True), (True, True)]:
+        name = " + ".join(["material"] + ["mobility"] * mobility + ["king safety"] * king_safety)
+        for position in POSITIONS:
+            board = create_board("mailbox")
+            board.load_from_disk(position)
+            board.use_mobility = mobility
+            board.use_king_safety = king_safety
+            evaluate = time_call(board.evaluate, repetitions)
+            engine.transposition_table.clear()
+            search = time_call(lambda: minMax(board, MinMaxArg(depth, True)))
+            print(f"  {name:<34} {position:<22} evaluate {evaluate * 1e6:5.2f} us  minMax depth {depth} {search * 1000:6.1f} ms")
+
+
+def visit_children(board, moves):
+    for move in moves:
+        board.make_encoded_move(move)
+        board.evaluate()
+        board.unmake_move()
+
+
+def print_network_speed(repetitions=200, depth=3):
+    print("NNUE against handcrafted evaluation")
+    evaluators = [
+        ("handcrafted", None),
+        ("NNUE 2 (tables)", Network.from_tables()),
+        ("NNUE 256x32", Network.random(256, 32)),
+        ("NNUE 512x32", Network.random(512, 32)),
+    ]
+    for name, network in evaluators:
+        for position in POSITIONS:
+            board = create_board("mailbox")
+            board.load_from_disk(position)
+            board.set_network(network)
+            moves = board.generate_encoded_moves(True)
+            visit = time_call(lambda: visit_children(board, moves), repetitions)
+            engine.transposition_table.clear()
+            search = time_call(lambda: minMax(board, MinMaxArg(depth, True)))
+            print(
+                f"  {name:<16} {position:<22} {len(moves) / visit / 1000:6.1f} k nodes/s (make, evaluate, unmake)"
+                f"  minMax depth {depth} {search * 1000:6.1f} ms"
+            )
+
+
+def print_tuning_speed(count=1000000, distinct=5000, epochs=3):
+    print(f"Texel tuning on {count} positions")
+    positions = np.tile(random_positions(distinct), (count // distinct, 1))
+    # Results drawn from the winning probability of the current evaluation
+    probabilities = 1 / (1 + np.exp(-tuning.DEFAULT_SCALE * evaluate_many(positions)))
+    results = (np.random.default_rng(0).random(count) < probabilities).astype(np.float32)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "positions.npy")
+        tuning.write_positions(path, positions, results)
+        epoch = time_call(lambda: tuning.tune(path, epochs=epochs)) / epochs
+    print(f"  {epoch:.2f} s per pass, {epoch * 100 / 60:.1f} min for 100 passes")
+
+
+def print_exchange_evaluation_cost(repetitions=2000, depth=3):
+    print("static exchange evaluation, used by the quiescence search to skip losing captures")
+    for name in ["C02", "tests/random1.board", "tests/random2.board"]:
+        board = create_board("mailbox")
+        if name == "C02":
+            board.load_from_memory(C02_CONFIGURATION)
+        else:
+            board.load_from_disk(name)
+        captures = [move for move in board.generate_encoded_moves(True) if move & CAPTURE]
+        losing = sum(board.see(move) < 0 for move in captures)
+        see = time_call(lambda: [board.see(move) for move in captures], repetitions) / max(len(captures), 1)
+        engine.transposition_table.clear()
+        search = time_call(lambda: engine.alpha_beta(board, MinMaxArg(depth, True, quiescence=True)))
+        print(
+            f"  {name:<22} {len(captures):2} captures, {losing} losing  see {see * 1e6:5.2f} us per capture"
+            f"  alpha-beta with quiescence depth {depth} {search * 1000:6.1f} ms"
+        )
+
+
+def print_lazy_evaluation_speedup(repetitions=20, windows=((-50, 50), (100, 150), (250, 300))):
+    print("lazy evaluation of the grandchildren, window relative to the score, mobility and king safety on")
+    for position in POSITIONS:
+        board = create_board("mailbox")
+        board.load_from_disk(position)
+        board.use_mobility = True
+        board.use_king_safety = True
+        score = board.evaluate()
+
+        def grandchildren(alpha=None, beta=None):
+            for move in board.generate_encoded_moves(True):
+                board.make_encoded_move(move)
+                board.evaluate_children(board.generate_encoded_moves(False), alpha, beta)
+                board.unmake_move()
+
+        full = time_call(grandchildren, repetitions)
+        for low, high in windows:
+            board.lazy_exits = board.full_evaluations = 0
+            lazy = time_call(lambda: grandchildren(score + low, score + high), repetitions)
+            evaluations = board.lazy_exits + board.full_evaluations
+            print(
+                f"  {position:<22} [{low:+4}, {high:+4}] full {full * 1000:6.1f} ms  lazy {lazy * 1000:6.1f} ms"
+                f"  {full / lazy:4.2f}x  lazy exits {board.lazy_exits / evaluations:6.1%} of {evaluations // repetitions} evaluations"
+            )
+
+
+def print_lazy_evaluation_error(games=60, plies=80):
+    print(f"terms skipped by lazy evaluation, {games} random games of {plies} plies from every position")
+    for use_mobility, use_king_safety in [(False, False), (True, False), (True, True)]:
+        differences = []
+        for seed in range(games):
+            rng = random.Random(seed)
+            for position in ["start"] + POSITIONS:
+                board = create_board("mailbox")
+                if position == "start":
+                    board.reset()
+                else:
+                    board.load_from_disk(position)
+                board.use_mobility = use_mobility
+                board.use_king_safety = use_king_safety
+                white = True
+                for _ in range(plies):
+                    estimate = taper(board.middle_game_score, board.end_game_score, board.phase)
+                    differences.append(abs(board.evaluate() - estimate))
+                    moves = board.generate_legal_moves(white)
+                    if not moves:
+                        break
+                    board.make_move(*rng.choice(moves))
+                    white = not white
+        differences.sort()
+        beyond = sum(difference > LAZY_EVALUATION_MARGIN for difference in differences)
+        print(
+            f"  mobility {use_mobility!s:<5} king safety {use_king_safety!s:<5} {len(differences)} positions"
+            f"  99% within {differences[len(differences) * 99 // 100]:5.1f}  99.9% within {differences[len(differences) * 999 // 1000]:5.1f}"
+            f"  max {differences[-1]:5.1f}  beyond the margin {beyond / len(differences):6.2%}"
+        )
+
+
+def print_alpha_beta_speedup(depths=(3, 4)):
+    print("alpha-beta against minMax, both colors")
+    for depth in depths:
+        for position in ["start"] + POSITIONS:
+            results = {}
+            for name, search in [("minMax", minMax), ("alpha-beta", engine.alpha_beta)]:
+                nodes = duration = 0
+                for white in [True, False]:
+                    board = create_board("mailbox")
+                    if position == "start":
+                        board.reset()
+                    else:
+                        board.load_from_disk(position)
+                    engine.transposition_table.clear()
+                    engine.nodes = 0
+                    duration += time_call(lambda: search(board, MinMaxArg(depth, white)))
+                    nodes += engine.nodes
+                results[name] = (nodes, duration)
+            (minimax_nodes, minimax), (nodes, duration) = results["minMax"], results["alpha-beta"]
+            print(
+                f"  depth {depth} {position:<22} minMax {minimax_nodes:5} nodes {minimax * 1000:6.1f} ms"
+                f"  alpha-beta {nodes:5} nodes {duration * 1000:6.1f} ms"
+                f"  {minimax_nodes / nodes:4.1f}x fewer nodes, {minimax / duration:4.1f}x faster"
+            )
+
+
+def print_iterative_deepening_depths(budgets=(50, 200, 1000)):
+    print("iterative deepening, completed depth and time used by budget")
+    for position in ["start"] + POSITIONS:
+        results = []
+        for time_ms in budgets:
+            board = create_board("mailbox")
+            if position == "start":
+                board.reset()
+            else:
+                board.load_from_disk(position)
+            engine.transposition_table.clear()
+            start = time.perf_counter()
+            _, _, depth = engine.iterative_deepening(board, MinMaxArg(engine.MAX_DEPTH), time_ms)
+            results.append(f"{time_ms:5} ms: depth {depth} in {(time.perf_counter() - start) * 1000:5.0f} ms")
+        print(f"  {position:<22} " + "  ".join(results))
+
+
+def print_transposition_table_statistics(sizes=(0.01, 0.1, 1, 16), moves=12, depth=4):
+    print(f"transposition table over {moves} moves of a game, alpha-beta depth {depth}")
+    for size_mb in sizes:
+        board = create_board("mailbox")
+        board.reset()
+        table = engine.transposition_table = TranspositionTable(size_mb)
+
+        def play():
+            for _ in range(moves):
+                move, _ = engine.negamax_cached(board, MinMaxArg(depth, board.white_to_move), -engine.INFINITY, engine.INFINITY)
+                board.make_encoded_move(move)
+
+        duration = time_call(play)
+        print(
+            f"  {size_mb:5} MB {table.buckets * BUCKET_SIZE:7} entries {duration * 1000:6.0f} ms  {table.hits:5} hits {table.misses:5} misses"
+            f"  {table.collisions:5} collisions {table.overwrites:5} overwrites  {table.used_entries():5} used"
+        )
+    engine.transposition_table = TranspositionTable(engine.TRANSPOSITION_TABLE_MB)
+
+
+def print_move_ordering_quality(depth=5):
+    print(f"move ordering, iterative deepening to depth {depth} with quiescence, both colors")
+    ordering = engine.move_ordering
+    for name, enabled in [("evaluation order", False), ("move ordering", True)]:
+        for position in ["start"] + POSITIONS:
+            nodes = cutoffs = first_move_cutoffs = duration = 0
+            for white in [True, False]:
+                board = create_board("mailbox")
+                if position == "start":
+                    board.reset()
+                else:
+                    board.load_from_disk(position)
+                engine.transposition_table.clear()
+                engine.nodes = 0
+                arg = MinMaxArg(depth, white, quiescence=True, ordering=enabled)
+                duration += time_call(lambda: engine.iterative_deepening(board, arg))
+                nodes += engine.nodes
+                cutoffs += ordering.cutoffs
+                first_move_cutoffs += ordering.first_move_cutoffs
+            print(
+                f"  {name:<17} {position:<22} {nodes:5} nodes {duration * 1000:6.1f} ms"
+                f"  first move cutoffs {first_move_cutoffs / cutoffs:6.1%} of {cutoffs}"
+            )
+
+
+def print_quiescence_cost(depth=3):
+    print(f"quiescence search at the leaves, depth {depth}, both colors")
+    for position in ["start"] + POSITIONS:
+        for name, search in [("minMax", minMax), ("alpha-beta", engine.alpha_beta)]:
+            results = {}
+            for quiescence in [False, True]:
+                nodes = quiescence_nodes = duration = 0
+                for white in [True, False]:
+                    board = create_board("mailbox")
+                    if position == "start":
+                        board.reset()
+                    else:
+                        board.load_from_disk(position)
+                    engine.transposition_table.clear()
+                    engine.nodes = engine.quiescence_nodes = 0
+                    duration += time_call(lambda: search(board, MinMaxArg(depth, white, quiescence=quiescence)))
+                    nodes += engine.nodes
+                    quiescence_nodes += engine.quiescence_nodes
+                results[quiescence] = (nodes, quiescence_nodes, duration)
+            (static_nodes, _, static), (nodes, quiescence_nodes, duration) = results[False], results[True]
+            print(
+                f"  {name:<10} {position:<22} static {static_nodes:5} nodes {static * 1000:6.1f} ms"
+                f"  quiescence {nodes:5} + {quiescence_nodes:5} nodes {duration * 1000:6.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    print_backend_speedup()
+    print_check_detection_speedup()
+    print_legal_move_speedup()
+    print_slider_speedup()
+    print_batch_evaluation_speedup()
+    print_child_scoring_speedup()
+    print_pawn_hash_statistics()
+    print_evaluation_term_cost()
+    print_network_speed()
+    print_tuning_speed()
+    print_exchange_evaluation_cost()
+    print_lazy_evaluation_speedup()
+    print_lazy_evaluation_error()
+    print_alpha_beta_speedup()
+    print_iterative_deepening_depths()
+    print_transposition_table_statistics()
+    print_move_ordering_quality()
+    print_quiescence_cost()
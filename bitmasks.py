@@ -0,0 +1,167 @@
+"""
+Helpers for 64 bit board masks as used by the :py:class:`BitBoard <board.BitBoard>` backend.
+
+Bit ``row * 8 + col`` of a mask stands for the cell (row, col), so bit 0 is a1 and bit 63 is h8. This bit index is
+not the same as the mailbox square of the board, see :py:mod:`squares` for the conversion tables.
+Shifting a mask by 8 moves all its cells one row up, shifting by 1 moves them one column to the right.
+Shifts that change the column have to be masked with the file masks to avoid wrapping around the board edge.
+
+The slider functions in here walk the rays with shifts and are the reference the magic look-up tables
+of :py:mod:`magic` are generated from, move generation uses the tables.
+"""
+from squares import INDEX_TO_SQUARE
+
+FULL = (1 << 64) - 1
+
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+
+RANK_1 = 0xFF
+RANK_3 = RANK_1 << 16
+RANK_6 = RANK_1 << 40
+
+
+def shift_north(mask):
+    return (mask << 8) & FULL
+
+
+def shift_south(mask):
+    return mask >> 8
+
+
+def shift_east(mask):
+    return (mask << 1) & ~FILE_A & FULL
+
+
+def shift_west(mask):
+    return (mask >> 1) & ~FILE_H
+
+
+def shift_north_east(mask):
+    return (mask << 9) & ~FILE_A & FULL
+
+
+def shift_north_west(mask):
+    return (mask << 7) & ~FILE_H & FULL
+
+
+def shift_south_east(mask):
+    return (mask >> 7) & ~FILE_A
+
+
+def shift_south_west(mask):
+    return (mask >> 9) & ~FILE_H
+
+
+def knight_attack_mask(mask):
+    """
+    Returns all cells a knight placed on any cell of the given mask attacks.
+    """
+    not_ab = ~(FILE_A | FILE_B)
+    not_gh = ~(FILE_G | FILE_H)
+    return (
+        ((mask << 17) & ~FILE_A)
+        | ((mask << 15) & ~FILE_H)
+        | ((mask << 10) & not_ab)
+        | ((mask << 6) & not_gh)
+        | ((mask >> 17) & ~FILE_H)
+        | ((mask >> 15) & ~FILE_A)
+        | ((mask >> 10) & not_gh)
+        | ((mask >> 6) & not_ab)
+    ) & FULL
+
+
+def king_attack_mask(mask):
+    """
+    Returns all cells a king placed on any cell of the given mask attacks.
+    """
+    sideways = shift_east(mask) | shift_west(mask)
+    row = mask | sideways
+    return sideways | shift_north(row) | shift_south(row)
+
+
+def pawn_attack_mask(mask, white):
+    """
+    Returns all cells a pawn of given color placed on any cell of the given mask can hit on.
+    """
+    if white:
+        return shift_north_east(mask) | shift_north_west(mask)
+    return shift_south_east(mask) | shift_south_west(mask)
+
+
+def _ray(index, shift):
+    ray = 0
+    mask = shift(1 << index)
+    while mask:
+        ray |= mask
+        mask = shift(mask)
+    return ray
+
+
+# Precomputed attack tables for the non-sliding pieces, indexed by bit index
+KNIGHT_ATTACKS = [knight_attack_mask(1 << index) for index in range(64)]
+KING_ATTACKS = [king_attack_mask(1 << index) for index in range(64)]
+PAWN_ATTACKS = {
+    True: [pawn_attack_mask(1 << index, True) for index in range(64)],
+    False: [pawn_attack_mask(1 << index, False) for index in range(64)],
+}
+
+# Rays of an empty board, split into directions increasing the bit index (the first blocker is the lowest bit)
+# and directions decreasing it (the first blocker is the highest bit)
+_POSITIVE_ROOK_RAYS = [[_ray(index, shift) for index in range(64)] for shift in (shift_north, shift_east)]
+_NEGATIVE_ROOK_RAYS = [[_ray(index, shift) for index in range(64)] for shift in (shift_south, shift_west)]
+_POSITIVE_BISHOP_RAYS = [[_ray(index, shift) for index in range(64)] for shift in (shift_north_east, shift_north_west)]
+_NEGATIVE_BISHOP_RAYS = [[_ray(index, shift) for index in range(64)] for shift in (shift_south_east, shift_south_west)]
+
+
+def _slider_attacks(index, occupied, positive_rays, negative_rays):
+    attacks = 0
+    for rays in positive_rays:
+        ray = rays[index]
+        blockers = ray & occupied
+        if blockers:
+            # Cut the ray behind the nearest blocker, the blocker itself stays attacked
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in negative_rays:
+        ray = rays[index]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(index, occupied):
+    """
+    Returns all cells a rook on the given bit index attacks, given the mask of all occupied cells.
+    """
+    return _slider_attacks(index, occupied, _POSITIVE_ROOK_RAYS, _NEGATIVE_ROOK_RAYS)
+
+
+def bishop_attacks(index, occupied):
+    """
+    Returns all cells a bishop on the given bit index attacks, given the mask of all occupied cells.
+    """
+    return _slider_attacks(index, occupied, _POSITIVE_BISHOP_RAYS, _NEGATIVE_BISHOP_RAYS)
+
+
+def queen_attacks(index, occupied):
+    """
+    Returns all cells a queen on the given bit index attacks, given the mask of all occupied cells.
+    """
+    return rook_attacks(index, occupied) | bishop_attacks(index, occupied)
+
+
+def mask_to_squares(mask):
+    """
+    Turns a mask into a list of mailbox squares (see :py:mod:`squares`), ordered by bit index.
+    """
+    squares = []
+    while mask:
+        lowest = mask & -mask
+        squares.append(INDEX_TO_SQUARE[lowest.bit_length() - 1])
+        mask ^= lowest
+    return squares
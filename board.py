@@ -1,8 +1,39 @@
-from operator import is_
+from operator import is_, itemgetter
 import os
-import numpy as np
+import random
 from uuid import uuid4
+import numpy as np
 from pieces import Pawn, Rook, Bishop, Queen, King, Knight
+from evaluation import (
+    SIGNED_MIDDLE_GAME_VALUES,
+    SIGNED_END_GAME_VALUES,
+    PHASE_BY_CODE,
+    MAX_PHASE,
+    EMPTY,
+    MATERIAL_VALUES,
+    MOBILITY_BONUS,
+    KING_ZONE_ATTACK_PENALTY,
+    LAZY_EVALUATION_MARGIN,
+    PawnHashTable,
+    evaluate_pawn_structure,
+)
+from moves import CAPTURE, FROM_BITS, TO_BITS, TARGET_BITS, move_from_square, move_to_square, new_move_list, new_score_list
+from bitmasks import FULL, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, mask_to_squares
+from magic import rook_attacks, bishop_attacks
+from squares import (
+    OFFBOARD,
+    BOARD_SQUARES,
+    SQUARE_TO_CELL,
+    SQUARE_TO_INDEX,
+    INDEX_TO_SQUARE,
+    ROOK_DIRECTIONS,
+    BISHOP_DIRECTIONS,
+    KNIGHT_TARGETS,
+    KING_TARGETS,
+    KING_ZONES,
+    PAWN_TARGETS,
+    cell_to_square,
+)
 from util import (
     map_piece_to_character,
     InvalidColumnException,
@@ -10,6 +41,22 @@ from util import (
 )
 
 
+# Piece classes by piece kind (see :py:attr:`pieces.Piece.KIND`)
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+
+# Per king square a getter reading the attack counts of the king zone in one call
+KING_ZONE_GETTERS = [itemgetter(*zone) if zone else None for zone in KING_ZONES]
+
+# Zobrist keys: one random 64 bit number per (piece code, mailbox square) plus one for "black to move".
+# A fixed seed keeps hashes reproducible between runs, which makes cached results comparable.
+_zobrist_random = random.Random(0x5A0B)
+ZOBRIST_PIECE_KEYS = [[_zobrist_random.getrandbits(64) for _ in range(120)] for _ in range(12)]
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+# The pawn key only covers the pawns (see :py:class:`evaluation.PawnHashTable`). It uses the same keys as the full hash,
+# other piece codes get all zero keys so the key can be updated without checking the piece kind.
+ZOBRIST_PAWN_KEYS = [keys if code % 6 == Pawn.KIND else [0] * 120 for code, keys in enumerate(ZOBRIST_PIECE_KEYS)]
+
+
 class BoardBase:
     """
     Base Class for the Chess Board.
@@ -17,12 +64,34 @@ class BoardBase:
     anything in this class for any of the tasks.
     """
 
+    # Whether this board keeps bit boards, pieces then generate their moves with bit masks (see :py:class:`BitBoard`)
+    BITBOARDS = False
+
     def __init__(self):
         """Constructor.
         Start with empty cells
         """
-        self.cells = [[None for _ in range(8)] for _ in range(8)]
         self.check_cache = {}
+        # Survives clear_board, the stored scores only depend on the pawn structure
+        self.pawn_table = PawnHashTable()
+        # Optional evaluation terms, switched off they cost nothing (see Board.evaluate)
+        self.use_mobility = False
+        self.use_king_safety = False
+        # Optional NNUE network replacing the handcrafted evaluation, see set_network
+        self.network = None
+        # Evaluations with a search window, decided by material alone or computed with all terms (see Board.evaluate)
+        self.lazy_exits = 0
+        self.full_evaluations = 0
+        self.white_to_move = True
+        self.clear_board()
+
+    @property
+    def cells(self):
+        """
+        The pieces (or None) of all cells as a list of 8 rows with 8 cells each, row 0 first.
+        This is a copy built from the mailbox (see :py:mod:`squares`), changing it does not change the board.
+        """
+        return [self.squares[(row + 2) * 10 + 1:(row + 2) * 10 + 9] for row in range(8)]
 
     def __str__(self):
         """
@@ -38,15 +107,27 @@ class BoardBase:
 
     def hash(self):
         """
-        Returns a unique hash (string) representation for the current board configuration.
-        This is short form, not meant for readability.
+        Returns the 64 bit Zobrist hash of the current board configuration including the side to move.
+        The key is maintained incrementally by :py:meth:`set_cell`, so this is a simple look-up.
         """
-        return "".join(
-            [
-                "".join([map_piece_to_character(cell) for cell in row])
-                for row in reversed(self.cells)
-            ]
-        )
+        return self.zobrist
+
+    def pawn_hash(self):
+        """
+        Returns the 64 bit Zobrist key of the pawns alone, which is the same for all configurations with the same pawn
+        structure. It is maintained incrementally like :py:meth:`hash`.
+        """
+        return self.pawn_zobrist
+
+    def set_white_to_move(self, white):
+        """
+        Sets the side to move and updates the Zobrist hash accordingly.
+
+        :param white: True if WHITE is to move, False otherwise
+        """
+        if self.white_to_move != white:
+            self.white_to_move = white
+            self.zobrist ^= ZOBRIST_BLACK_TO_MOVE
     
     def save_to_disk(self, fname = None):
         """
@@ -67,8 +148,175 @@ class BoardBase:
         """
         Clears to board, deleting all pieces currently placed on it
         """
-        self.cells = [[None for _ in range(8)] for _ in range(8)]
+        self.squares = [OFFBOARD] * 120
+        for square in BOARD_SQUARES:
+            self.squares[square] = None
+        self.zobrist = 0 if self.white_to_move else ZOBRIST_BLACK_TO_MOVE
+        self.pawn_zobrist = 0
+        self.middle_game_score = 0
+        self.end_game_score = 0
+        self.phase = 0
+        self.undo_stack = []
+        self.pieces = {True: [], False: []}
+        self.kings = {True: None, False: None}
+        self.sliders = {}
+        self.attacks = {}
+        self.attack_counts = {True: [0] * 120, False: [0] * 120}
+        self.mobility = {True: 0, False: 0}
+        self.accumulator = None if self.network is None else self.network.new_accumulator()
+
+    def set_network(self, network):
+        """
+        Switches the evaluation to an NNUE network (see :py:mod:`nnue`), or back to the handcrafted one.
+        The accumulator of the network is built once for the current configuration here, afterwards every
+        placed, moved and hit piece only adds or subtracts its weight rows.
 
+        :param network: A :py:class:`nnue.Network` or None
+        """
+        self.network = network
+        self.accumulator = None
+        if network is not None:
+            self.accumulator = network.new_accumulator()
+            for white in (True, False):
+                for piece in self.pieces[white]:
+                    if piece is not None:
+                        network.add_feature(self.accumulator, piece.code, piece.square)
+
+    def add_to_piece_index(self, piece):
+        """
+        Registers a piece placed on the board in the per-color piece index (and as king, if it is one).
+        The index is a list of slots, see :py:meth:`Board.iterate_cells_with_pieces`: a piece placed for the first time
+        gets a new slot at the end, a piece leaving the board leaves its slot empty (None) and gets it back when it
+        returns. The order of the pieces, and with it the move generation, therefore does not depend on the moves
+        made and taken back before, and neither removing nor restoring a piece moves the others.
+        Also adds the attacks of the piece to the attack maps and its values to the scores and the game phase
+        (see :py:meth:`Board.evaluate`), so the piece must already be placed on its square.
+        """
+        slots = self.pieces[piece.white]
+        slot = piece.slot
+        if slot is None or slot >= len(slots) or slots[slot] is not None:
+            piece.slot = len(slots)
+            slots.append(piece)
+        else:
+            slots[slot] = piece
+        self.middle_game_score += SIGNED_MIDDLE_GAME_VALUES[piece.code][piece.square]
+        self.end_game_score += SIGNED_END_GAME_VALUES[piece.code][piece.square]
+        self.phase += PHASE_BY_CODE[piece.code]
+        if self.network is not None:
+            self.network.add_feature(self.accumulator, piece.code, piece.square)
+        if isinstance(piece, King):
+            self.kings[piece.white] = piece
+        if piece.SLIDING:
+            self.sliders[piece] = None
+        self.add_attacks(piece)
+
+    def remove_from_piece_index(self, piece):
+        """
+        Removes a piece leaving the board from the per-color piece index, its attacks from the attack maps and
+        its values from the scores and the game phase.
+        """
+        self.pieces[piece.white][piece.slot] = None
+        self.middle_game_score -= SIGNED_MIDDLE_GAME_VALUES[piece.code][piece.square]
+        self.end_game_score -= SIGNED_END_GAME_VALUES[piece.code][piece.square]
+        self.phase -= PHASE_BY_CODE[piece.code]
+        if self.network is not None:
+            self.network.remove_feature(self.accumulator, piece.code, piece.square)
+        if self.kings[piece.white] is piece:
+            # Only hand-made test configurations have more than one king per color
+            self.kings[piece.white] = next((other for other in self.pieces[piece.white] if isinstance(other, King)), None)
+        if piece.SLIDING:
+            del self.sliders[piece]
+        self.remove_attacks(piece)
+
+    def pawn_structure_scores(self, pawn_zobrist=None, from_square=None, to_square=None):
+        """
+        Returns the pawn structure scores (see :py:func:`evaluation.evaluate_pawn_structure`), looked up in the pawn
+        hash table and only computed (and stored) for structures not seen before.
+
+        Without arguments this scores the current configuration. To score the configuration after a move without
+        making it, pass the pawn key after the move and the squares of the move.
+
+        :param pawn_zobrist: The pawn key of the structure, the current one if None
+        :param from_square: The square a piece moves from
+        :param to_square: The square it moves to, a pawn placed there is hit
+        :return: A tuple (middle_game, end_game) from WHITEs perspective
+        """
+        if pawn_zobrist is None:
+            pawn_zobrist = self.pawn_zobrist
+        scores = self.pawn_table.probe(pawn_zobrist)
+        if scores is None:
+            pawns = {True: [], False: []}
+            for white in (True, False):
+                for piece in self.pieces[white]:
+                    if piece is not None and piece.KIND == Pawn.KIND and piece.square != to_square:
+                        pawns[white].append(to_square if piece.square == from_square else piece.square)
+            scores = evaluate_pawn_structure(pawns[True], pawns[False])
+            self.pawn_table.store(pawn_zobrist, scores)
+        return scores
+
+    def add_attacks(self, piece):
+        """
+        Adds the squares the piece currently attacks to the attack maps.
+
+        ``self.attacks`` maps every piece on the board to the list of squares it attacks and ``self.attack_counts``
+        holds, per color, the number of pieces attacking each square of the mailbox (see :py:mod:`squares`).
+        ``self.mobility`` holds, per color, the number of squares attacked by knights, bishops, rooks and queens.
+        """
+        attacked_squares = piece.get_attacked_squares()
+        self.attacks[piece] = attacked_squares
+        counts = self.attack_counts[piece.white]
+        for square in attacked_squares:
+            counts[square] += 1
+        if Pawn.KIND < piece.KIND < King.KIND:
+            self.mobility[piece.white] += len(attacked_squares)
+
+    def remove_attacks(self, piece):
+        """
+        Removes the attacks of the piece, as added by :py:meth:`add_attacks`, from the attack maps.
+        """
+        attacked_squares = self.attacks.pop(piece)
+        counts = self.attack_counts[piece.white]
+        for square in attacked_squares:
+            counts[square] -= 1
+        if Pawn.KIND < piece.KIND < King.KIND:
+            self.mobility[piece.white] -= len(attacked_squares)
+
+    def count_mobility(self, white):
+        """
+        Returns the number of squares attacked by the knights, bishops, rooks and queens of the given color, see
+        :py:meth:`add_attacks`.
+        """
+        return self.mobility[white]
+
+    def king_zone_attacks(self, white):
+        """
+        Counts the attacks of the opposing pieces on the zone around the king of the given color (see
+        :py:data:`squares.KING_ZONES`). A square attacked by two pieces counts twice.
+
+        :param white: The color of the king
+        :return: The number of attacks, 0 if there is no king of that color
+        """
+        king = self.kings[white]
+        if king is None:
+            return 0
+        return sum(KING_ZONE_GETTERS[king.square](self.attack_counts[not white]))
+
+    def sliders_through(self, square, other_square=None, moving=None):
+        """
+        Finds the sliders whose attack rays end on or pass through the given squares.
+        Only their attacks change when one of these squares is emptied or occupied, all other pieces
+        attack the same squares as before.
+
+        :param square: A square changing its occupancy
+        :param other_square: Optionally a second one
+        :param moving: A piece to leave out, as its attacks are recomputed anyway
+        :return: A list of sliders
+        """
+        attacks = self.attacks
+        return [
+            slider for slider in self.sliders
+            if slider is not moving and (square in attacks[slider] or other_square in attacks[slider])
+        ]
 
     def load_from_memory(self, configString):
         """
@@ -76,7 +324,7 @@ class BoardBase:
 
         :param name: Filename to use. 
         """       
-        self.cells = [[None for _ in range(8)] for _ in range(8)]
+        self.clear_board()
 
         for row, line in enumerate(configString.split("\n")):
               line = line.strip()
@@ -104,7 +352,30 @@ class BoardBase:
                 if pieceCode == "R":
                     piece = Rook(self, white)
 
-                self.set_cell(np.array([7-row, col]), piece)
+                self.set_cell((7-row, col), piece)
+
+    def to_array(self):
+        """
+        Returns the current board configuration as a (64,) int8 array of piece codes (see :py:attr:`pieces.Piece.code`),
+        indexed by bit index (see :py:mod:`bitmasks`) with :py:data:`evaluation.EMPTY` for empty cells.
+        Reshape it to (8, 8) for a row by row view. Stacks of these arrays can be evaluated at once with
+        :py:func:`evaluation.evaluate_many`.
+        """
+        squares = self.squares
+        return np.array(
+            [EMPTY if squares[square] is None else squares[square].code for square in INDEX_TO_SQUARE], dtype=np.int8
+        )
+
+    def load_from_array(self, position):
+        """
+        Replaces the current board configuration by one stored with :py:meth:`to_array`.
+
+        :param position: A (64,) or (8, 8) array of piece codes
+        """
+        self.clear_board()
+        for index, code in enumerate(np.asarray(position).reshape(64).tolist()):
+            if code != EMPTY:
+                self.set_cell(SQUARE_TO_CELL[INDEX_TO_SQUARE[index]], PIECE_CLASSES[code % 6](self, code < 6))
 
     def load_from_disk(self, fname):
         """
@@ -122,7 +393,7 @@ class BoardBase:
         Calls is_king_check for board configurations not yet known. Caches the result for later look-up.
         """
         # Calculate hash and see if current position is in the cache
-        hash = self.hash() + "-w" if white else "-b"
+        hash = (self.zobrist, white)
         if hash in self.check_cache:
             return self.check_cache[hash]
 
@@ -141,11 +412,8 @@ class BoardBase:
         if not self.is_valid_cell(cell):
             return None
 
-        # Unpack coordinates
-        row, col = cell
-
         # Return the piece on the cell
-        return self.cells[row][col]
+        return self.squares[cell_to_square(cell)]
 
     def set_cell(self, cell, piece):
         """
@@ -162,54 +430,167 @@ class BoardBase:
             raise InvalidColumnException((row, col))
 
         # If there is a piece to place, there is maintenance stuff to do
+        square = cell_to_square(cell)
         if piece is not None:
             # If the piece has a cell (so it was placed on the board already), set that cell to None
-            if piece.cell is not None:
+            if piece.square is not None:
                 self.set_cell(piece.cell, None)
 
-            # Update the pieces cell
-            piece.cell = np.array([row, col])
+            # Update the pieces square
+            piece.square = square
+
+        # Remove a replaced piece from the hash and the piece index
+        previous = self.squares[square]
+        if previous is not None:
+            self.zobrist ^= ZOBRIST_PIECE_KEYS[previous.code][square]
+            self.pawn_zobrist ^= ZOBRIST_PAWN_KEYS[previous.code][square]
+            self.remove_from_piece_index(previous)
+
+        # Sliders passing this square attack differently once its occupancy changes
+        sliders = self.sliders_through(square)
+        for slider in sliders:
+            self.remove_attacks(slider)
 
         # Update the cell on the board
-        self.cells[row][col] = piece
+        self.squares[square] = piece
+
+        # Add the new piece to the hash and the piece index
+        if piece is not None:
+            self.zobrist ^= ZOBRIST_PIECE_KEYS[piece.code][square]
+            self.pawn_zobrist ^= ZOBRIST_PAWN_KEYS[piece.code][square]
+            self.add_to_piece_index(piece)
+        for slider in sliders:
+            self.add_attacks(slider)
+
+    def make_move(self, piece, square):
+        """
+        Moves a piece onto the given square, hitting any opposing piece placed there, and hands the move to the other color.
+        Everything needed to take the move back is pushed onto the undo stack, see :py:meth:`unmake_move`.
+
+        Unlike :py:meth:`set_cell` this does not validate the target.
+
+        :param piece: The piece to move. Must be placed on this board.
+        :param square: The target square of the mailbox (see :py:mod:`squares`). Must be on the board.
+        """
+        from_square = piece.square
+        captured = self.squares[square]
+
+        # Remember everything needed to restore the current configuration
+        self.undo_stack.append((
+            piece, from_square, captured, self.zobrist, self.pawn_zobrist, self.white_to_move,
+            self.middle_game_score, self.end_game_score,
+        ))
+
+        # Update the hash: piece leaves its square, a hit piece leaves the board, piece enters the new square
+        keys = ZOBRIST_PIECE_KEYS[piece.code]
+        self.zobrist ^= keys[from_square] ^ keys[square] ^ ZOBRIST_BLACK_TO_MOVE
+        keys = ZOBRIST_PAWN_KEYS[piece.code]
+        self.pawn_zobrist ^= keys[from_square] ^ keys[square]
+
+        # Update the scores the same way, a hit piece (and the game phase) is taken care of by remove_from_piece_index
+        values = SIGNED_MIDDLE_GAME_VALUES[piece.code]
+        self.middle_game_score += values[square] - values[from_square]
+        values = SIGNED_END_GAME_VALUES[piece.code]
+        self.end_game_score += values[square] - values[from_square]
+        if captured is not None:
+            self.zobrist ^= ZOBRIST_PIECE_KEYS[captured.code][square]
+            self.pawn_zobrist ^= ZOBRIST_PAWN_KEYS[captured.code][square]
+            self.remove_from_piece_index(captured)
+        if self.network is not None:
+            self.network.move_feature(self.accumulator, piece.code, from_square, square)
+
+        # Only the moved piece and the sliders passing an emptied or newly occupied square attack differently.
+        # The target square stays occupied when a piece is hit.
+        sliders = self.sliders_through(from_square, None if captured is not None else square, piece)
+        self.remove_attacks(piece)
+        for slider in sliders:
+            self.remove_attacks(slider)
+
+        self.squares[from_square] = None
+        self.squares[square] = piece
+        piece.square = square
+        self.white_to_move = not self.white_to_move
+
+        self.add_attacks(piece)
+        for slider in sliders:
+            self.add_attacks(slider)
+
+    def make_encoded_move(self, move):
+        """
+        Makes a 16 bit move (see :py:mod:`moves`) of this configuration, see :py:meth:`make_move`.
+        Take it back with :py:meth:`unmake_move` as usual.
+        """
+        self.make_move(self.squares[move_from_square(move)], move_to_square(move))
+
+    def unmake_move(self):
+        """
+        Takes back the last move made with :py:meth:`make_move`, restoring a hit piece, the hash and the side to move.
+        """
+        (
+            piece, from_square, captured, zobrist, pawn_zobrist, white_to_move, middle_game_score, end_game_score,
+        ) = self.undo_stack.pop()
+
+        # The same squares change their occupancy as in make_move, just the other way round
+        sliders = self.sliders_through(from_square, None if captured is not None else piece.square, piece)
+        self.remove_attacks(piece)
+        for slider in sliders:
+            self.remove_attacks(slider)
+        if self.network is not None:
+            self.network.move_feature(self.accumulator, piece.code, piece.square, from_square)
+
+        self.squares[piece.square] = captured
+        self.squares[from_square] = piece
+        piece.square = from_square
+        if captured is not None:
+            # Goes back into the slot it left, see add_to_piece_index
+            self.add_to_piece_index(captured)
+
+        self.add_attacks(piece)
+        for slider in sliders:
+            self.add_attacks(slider)
+        self.zobrist = zobrist
+        self.pawn_zobrist = pawn_zobrist
+        self.white_to_move = white_to_move
+        self.middle_game_score = middle_game_score
+        self.end_game_score = end_game_score
 
     def reset(self):
         """
         Resets the board to its default (start) configuration
         """
         # Start with all empty cells
-        self.cells = [[None for _ in range(8)] for _ in range(8)]
+        self.clear_board()
 
         # Pawns
         for col in range(8):
-            self.set_cell(np.array([1, col]), Pawn(self, True))
-            self.set_cell(np.array([6, col]), Pawn(self, False))
+            self.set_cell((1, col), Pawn(self, True))
+            self.set_cell((6, col), Pawn(self, False))
 
         # Rooks
-        self.set_cell(np.array([0, 0]), Rook(self, True))
-        self.set_cell(np.array([0, 7]), Rook(self, True))
-        self.set_cell(np.array([7, 0]), Rook(self, False))
-        self.set_cell(np.array([7, 7]), Rook(self, False))
+        self.set_cell((0, 0), Rook(self, True))
+        self.set_cell((0, 7), Rook(self, True))
+        self.set_cell((7, 0), Rook(self, False))
+        self.set_cell((7, 7), Rook(self, False))
 
         # Knights
-        self.set_cell(np.array([0, 1]), Knight(self, True))
-        self.set_cell(np.array([0, 6]), Knight(self, True))
-        self.set_cell(np.array([7, 1]), Knight(self, False))
-        self.set_cell(np.array([7, 6]), Knight(self, False))
+        self.set_cell((0, 1), Knight(self, True))
+        self.set_cell((0, 6), Knight(self, True))
+        self.set_cell((7, 1), Knight(self, False))
+        self.set_cell((7, 6), Knight(self, False))
 
         # Bishops
-        self.set_cell(np.array([0, 2]), Bishop(self, True))
-        self.set_cell(np.array([0, 5]), Bishop(self, True))
-        self.set_cell(np.array([7, 2]), Bishop(self, False))
-        self.set_cell(np.array([7, 5]), Bishop(self, False))
+        self.set_cell((0, 2), Bishop(self, True))
+        self.set_cell((0, 5), Bishop(self, True))
+        self.set_cell((7, 2), Bishop(self, False))
+        self.set_cell((7, 5), Bishop(self, False))
 
         # Queen
-        self.set_cell(np.array([0, 3]), Queen(self, True))
-        self.set_cell(np.array([7, 3]), Queen(self, False))
+        self.set_cell((0, 3), Queen(self, True))
+        self.set_cell((7, 3), Queen(self, False))
 
         # King
-        self.set_cell(np.array([0, 4]), King(self, True))
-        self.set_cell(np.array([7, 4]), King(self, False))
+        self.set_cell((0, 4), King(self, True))
+        self.set_cell((7, 4), King(self, False))
 
         #self.save_to_disk()
 
@@ -233,44 +614,27 @@ class Board(BoardBase):
         **TODO**: Write a generator (using the yield keyword) that allows to iterate
         over all cells with a piece of given color.
 
-        **HINT**: You need a double-nested loop,
-        the first one iterates over all the rows, the second one iterates over each cell in the current row.
-        If the cell has a piece (so it is not None) and the piece has the correct color, *yield* it
+        **HINT**: The board keeps the pieces of each color in ``self.pieces``, updated by
+        :py:meth:`set_cell <board.BoardBase.set_cell>` and :py:meth:`make_move <board.BoardBase.make_move>`.
+        Iterating therefore only costs one step per piece on the board instead of one step per cell.
 
         :param white: True if WHITE pieces are to be iterated, False otherwise
         :type white: Boolean
         """
         # TODO: Implement
 
-        #Got my understanding of what Yield is from here: https://www.youtube.com/watch?v=xZJNa71Rvt4
-        #
-        # i know in the constructor of boardBase we create the cells with 
-        # cells = [[None for _ in range(8)] for _ in range(8)]
-        # so in a seperate file i tested print(len(cells)) and got 8 (as expected)
-        # and for print(len(cells[0])) i also got 8 so i can either get them dynamically or i could just use range(8)
-
-
-        #using range(8) because it's easier and faster to understand, also 8 isn't includes so it's fine
-        for row in range(8):
-            #againg we use range 8
-            for col in range(8):
-                #i create a variable to give it the value of the piece we get with self.get_cell()
-                #we provide row and col as parameters/arguments whatever
-                piece = self.get_cell((row, col)) 
-                #now we just check if the returned piece is not none and use the short circuitung from python, i know about the concept from the lecture 
-                #and the name from here: https://stackoverflow.com/questions/2580136/does-python-support-short-circuiting
-                #so only if it's not none we check if the piece we got has the color as the provided one from the function argument
-                if piece is not None and piece.white == white:
-                    yield piece
-
-        
+        #The board keeps an index of all placed pieces per color (see BoardBase.add_to_piece_index),
+        #so we don't have to look at all 64 cells, only at the pieces that are actually still on the board.
+        #Hit pieces leave an empty slot (None) behind, which we skip.
+        #We iterate over a copy, because the caller is allowed to make moves (and hit pieces) while iterating
+        for piece in [piece for piece in self.pieces[white] if piece is not None]:
+            yield piece
 
     def find_king(self, white):
         """
         **TODO**: Find the king piece of given color and return that piece
 
-        **HINT**: You can use the iterate_cells_with_pieces() Method to find all
-        pieces of a given color
+        **HINT**: The board remembers the king of each color in ``self.kings`` whenever one is placed
 
         :param white: True if WHITE pieces are to be iterated, False otherwise
         :type white: Boolean
@@ -279,17 +643,8 @@ class Board(BoardBase):
         """
         # TODO: Implement
 
-        #PLAN
-        # 1. use the iterate_cells_with_pieces() method to get every piece of the given color 
-        # 2. check if the given piece is from the class King
-        # 
-        # https://stackoverflow.com/questions/14549405/python-check-instances-of-classes 
-        # https://www.w3schools.com/python/ref_func_isinstance.asp
-
-        # ok so basically isinstance() returns true or false wether a given object is an instance of a class
-        for piece in self.iterate_cells_with_pieces(white):
-            if isinstance(piece, King):
-                return piece
+        # the board remembers the king of each color whenever one is placed, so this is a simple look-up
+        return self.kings[white]
 
     def is_king_check(self, white):
         """
@@ -297,54 +652,461 @@ class Board(BoardBase):
         A check is given if any opposing piece can beat the king in its next move.
 
         **HINT**: You can use the find_king() Method to find the king of the given color.
-        Then use the iterate_cells_with_pieces Method to find all pieces of *opposing color* (negate the "white"-parameter)
-        For each opposing piece, call the "get_reachable_cells()" method to get a list of all reachable cells.
-        Iterate over each reachable cell and check if the kings cell is reachable. If yes, shortcut and return True right away.
+        Instead of generating the moves of every opposing piece, look outward from the kings square
+        with :py:meth:`is_square_attacked`, which only needs a few dozen look-ups.
+
+        :return: True if the king is in check, False otherwise (also if there is no king of that color)
         """
         # TODO: Implement
 
         #we give the variable called "king" the value of the king piece of the given color
         king = self.find_king(white)
 
-        #we unpack the tuple of the king position (because otherwise we get a ValueError 
-        #and the fix https://stackoverflow.com/questions/59222146/how-to-compare-equality-of-two-tuples-that-involve-with-list) is overkill for right now
-        king_row, king_col = king.cell
+        #without a king there is nothing to check (only happens for hand-made configurations)
+        if king is None:
+            return False
 
-        #we iterate over every piece with the opposing color
-        for piece in self.iterate_cells_with_pieces(not white):
-            
-            #now we take the current piece and get all possible moves of that piece as a list
-            #we iterate over every possible move that piece can make
-            for position in piece.get_reachable_cells():
-                #we unpack the tuple of position for the same reason as before
-                enemy_row, enemy_col = position
+        #the king is in check if any opposing piece attacks his square
+        return self.is_square_attacked(king.square, not white)
 
-                #now we check if the king's row and col is the same as the enemy's row and columns
-                if king_row == enemy_row and king_col == enemy_col:
-                    return True
+    def is_square_attacked(self, square, white):
+        """
+        Checks whether any piece of the given color attacks the given square of the mailbox (see :py:mod:`squares`).
+        This is a single look-up in the attack maps the board keeps up to date on every move (see :py:meth:`add_attacks <board.BoardBase.add_attacks>`).
 
+        :param square: The square to check
+        :param white: True if attacks of WHITE pieces are checked, False for BLACK ones
+        :return: True if the square is attacked, False otherwise
+        """
+        return self.attack_counts[white][square] > 0
 
-    def evaluate(self):
+    def count_attackers(self, square, white):
+        """
+        Returns the number of pieces of the given color attacking the given square, see :py:meth:`is_square_attacked`.
+        """
+        return self.attack_counts[white][square]
+
+    def find_checks_and_pins(self, white):
+        """
+        Finds everything that restricts the moves of the given color beyond the piece movement rules.
+        Looks outward from the king once: pieces giving check and own pieces pinned to the king by an opposing slider.
+
+        :param white: True for the WHITE pieces, False for the BLACK pieces
+        :return: A tuple (checkers, evasion_squares, pins, xray_squares). checkers is the number of pieces giving check.
+            If exactly one piece gives check, evasion_squares is the set of squares a piece other than the king must move to
+            (hitting the checker or blocking its ray), otherwise it is None. pins maps pinned pieces to the set of squares
+            they can move to without leaving their pin ray (including hitting the pinner). xray_squares are the squares
+            behind the king on the rays of checking sliders: the attack maps miss them, as the king itself blocks the ray.
+        """
+        king = self.kings[white]
+        if king is None:
+            return 0, None, {}, ()
+
+        squares = self.squares
+        king_square = king.square
+        offset = 6 if white else 0
+        checkers = 0
+        evasion_squares = None
+        pins = {}
+        xray_squares = []
+
+        # Knights and pawns give check from a fixed set of squares
+        for code, targets in ((offset + Knight.KIND, KNIGHT_TARGETS[king_square]), (offset + Pawn.KIND, PAWN_TARGETS[white][king_square])):
+            for target in targets:
+                piece = squares[target]
+                if piece is not None and piece.code == code:
+                    checkers += 1
+                    evasion_squares = {target}
+
+        # Sliders give check along rays, or pin the first own piece on the ray
+        queen = offset + Queen.KIND
+        for slider, directions in ((offset + Rook.KIND, ROOK_DIRECTIONS), (offset + Bishop.KIND, BISHOP_DIRECTIONS)):
+            for direction in directions:
+                ray = []
+                target = king_square + direction
+                piece = squares[target]
+                while piece is None:
+                    ray.append(target)
+                    target += direction
+                    piece = squares[target]
+
+                if piece is OFFBOARD:
+                    continue
+                ray.append(target)
+
+                if piece.white != white:
+                    if piece.code == slider or piece.code == queen:
+                        checkers += 1
+                        evasion_squares = set(ray)
+                        xray_squares.append(king_square - direction)
+                    continue
+
+                # An own piece, look behind it for an opposing slider pinning it
+                target += direction
+                behind = squares[target]
+                while behind is None:
+                    ray.append(target)
+                    target += direction
+                    behind = squares[target]
+
+                if behind is not OFFBOARD and behind.white != white and (behind.code == slider or behind.code == queen):
+                    ray.append(target)
+                    pins[piece] = set(ray)
+
+        if checkers > 1:
+            # Only the king can answer a double check
+            evasion_squares = set()
+
+        return checkers, evasion_squares, pins, xray_squares
+
+    def get_legal_squares(self, piece, checks_and_pins=None):
+        """
+        Returns the squares the given piece can move to without leaving its own king in check.
+
+        Moves of other pieces are filtered with the result of :py:meth:`find_checks_and_pins`: when in check they
+        must hit the checker or block its ray, and pinned pieces must stay on their pin ray. The king must not
+        step onto a square attacked by the opponent, which the attack maps answer directly (see :py:meth:`is_square_attacked`).
+
+        :param piece: The piece to move
+        :param checks_and_pins: Result of :py:meth:`find_checks_and_pins` for the color of the piece. Pass it in when asking
+            for many pieces of the same configuration, it is computed if omitted.
+        :return: A list of legal target squares (see :py:mod:`squares`)
+        """
+        reachable_squares = piece.get_reachable_squares()
+
+        if checks_and_pins is None:
+            checks_and_pins = self.find_checks_and_pins(piece.white)
+        _, evasion_squares, pins, xray_squares = checks_and_pins
+
+        if isinstance(piece, King):
+            # Hitting a piece removes its attacks, but the maps still count the pieces defending it
+            opposing_counts = self.attack_counts[not piece.white]
+            return [
+                square for square in reachable_squares
+                if opposing_counts[square] == 0 and square not in xray_squares
+            ]
+
+        if evasion_squares is not None:
+            reachable_squares = [square for square in reachable_squares if square in evasion_squares]
+
+        pin = pins.get(piece)
+        if pin is not None:
+            reachable_squares = [square for square in reachable_squares if square in pin]
+
+        return reachable_squares
+
+    def generate_legal_moves(self, white):
+        """
+        Generates all legal moves of the given color.
+
+        :param white: True for the WHITE pieces, False for the BLACK pieces
+        :return: A list of (piece, target square) tuples
+        """
+        checks_and_pins = self.find_checks_and_pins(white)
+        return [
+            (piece, square)
+            for piece in self.iterate_cells_with_pieces(white)
+            for square in self.get_legal_squares(piece, checks_and_pins)
+        ]
+
+    def generate_encoded_moves(self, white):
+        """
+        Generates all legal moves of the given color like :py:meth:`generate_legal_moves`, but as
+        16 bit moves (see :py:mod:`moves`) in an ``array('H')``, in the same order.
+
+        :param white: True for the WHITE pieces, False for the BLACK pieces
+        :return: The move list
+        """
+        checks_and_pins = self.find_checks_and_pins(white)
+        squares = self.squares
+        moves = new_move_list()
+        for piece in self.iterate_cells_with_pieces(white):
+            from_bits = FROM_BITS[piece.square]
+            for square in self.get_legal_squares(piece, checks_and_pins):
+                # Legal targets are either empty or hold an opposing piece
+                moves.append(from_bits | TO_BITS[square] | (CAPTURE if squares[square] is not None else 0))
+        return moves
+
+    def generate_encoded_captures(self, white):
+        """
+        Generates only the legal captures of the given color as 16 bit moves (see :py:mod:`moves`), e.g. for a
+        quiescence search. The attack maps (see :py:meth:`add_attacks <board.BoardBase.add_attacks>`) already hold
+        every square a piece attacks, so the captures are the attacked squares holding an opposing piece, filtered
+        for checks and pins as in :py:meth:`get_legal_squares`.
+
+        :param white: True for the WHITE pieces, False for the BLACK pieces
+        :return: The move list, the captures of :py:meth:`generate_encoded_moves` in the same order
+        """
+        _, evasion_squares, pins, xray_squares = self.find_checks_and_pins(white)
+        squares = self.squares
+        attacks = self.attacks
+        opposing_counts = self.attack_counts[not white]
+        moves = new_move_list()
+        for piece in self.iterate_cells_with_pieces(white):
+            from_bits = FROM_BITS[piece.square] | CAPTURE
+            is_king = piece.KIND == King.KIND
+            pin = pins.get(piece)
+            for square in attacks[piece]:
+                target = squares[square]
+                if target is None or target.white == white:
+                    continue
+                if is_king:
+                    # The king must not hit a defended piece
+                    if opposing_counts[square] or square in xray_squares:
+                        continue
+                elif (evasion_squares is not None and square not in evasion_squares) or (pin is not None and square not in pin):
+                    continue
+                moves.append(from_bits | TO_BITS[square])
+        return moves
+
+    def evaluate(self, alpha=None, beta=None):
         """
         **TODO**: Evaluate the current board configuration into a numerical number.
         The higher the number, to more favorable for WHITE (note: This is always from whites perspective!) the current configuration is.
 
 
-        **HINT**: Start with a score of zero.
-        Use the iterate_cells_with_pieces Method to find all WHITE pieces and call their respective "evaluate" Method. Sum those scores up.
-        Then use the iterate_cells_with_pieces Method to find all BLACK pieces, call their respective "evaluate" Method and substract that from the score.
+        **HINT**: Summing up the "evaluate" Method of all WHITE pieces and substracting the one of all BLACK pieces
+        gives the right result, but costs one call per piece on every evaluation. The board keeps exactly this sum
+        up to date instead, updated with the value difference of the moved (and hit) pieces on every move,
+        see :py:meth:`make_move <board.BoardBase.make_move>`. It keeps two sums, one with the middle game and one
+        with the end game tables, and the game phase to blend them (see :py:func:`evaluation.taper`).
+        The pawn structure is scored on top, looked up by the pawn key (see :py:meth:`pawn_structure_scores`).
+
+        Mobility and king safety are optional terms, switched on with ``use_mobility`` and ``use_king_safety``.
+        Both are read from counters of the attack maps (see :py:meth:`add_attacks <board.BoardBase.add_attacks>`)
+        instead of generating the moves of every piece.
+
+        With an NNUE network set (see :py:meth:`set_network <board.BoardBase.set_network>`) the network evaluates
+        instead, on its accumulator kept up to date on every move.
+
+        Given the search window of the caller, positions whose material and piece-square score is more than
+        :py:data:`evaluation.LAZY_EVALUATION_MARGIN` below alpha or above beta skip the other terms, they could not
+        bring the score back into the window. Such a position returns the bound on its score, the estimate plus the
+        margin below alpha and minus the margin above beta, so a fail-soft search passing the score on (or storing it
+        as a bound) never claims more than is known. ``lazy_exits`` and ``full_evaluations`` count how often this
+        happens and how often all terms are needed. The network always evaluates completely.
+
+        :param alpha: The lower bound of the search window or None
+        :param beta: The upper bound of the search window, only used together with alpha
         """
         # TODO: Implement
 
-        score = 0.0
+        #the network replaces all of the handcrafted terms
+        if self.network is not None:
+            return self.network.evaluate(self.accumulator)
+
+        #this is evaluation.taper written out, as it runs for every single evaluated move
+        phase = self.phase if self.phase < MAX_PHASE else MAX_PHASE
+
+        #far outside of the search window, the rest of the terms do not matter
+        if alpha is not None:
+            estimate = (self.middle_game_score * phase + self.end_game_score * (MAX_PHASE - phase)) / MAX_PHASE
+            #return the bound the full score is assumed to stay within, the estimate itself could be on either side of it
+            if estimate + LAZY_EVALUATION_MARGIN <= alpha:
+                self.lazy_exits += 1
+                return estimate + LAZY_EVALUATION_MARGIN
+            if estimate - LAZY_EVALUATION_MARGIN >= beta:
+                self.lazy_exits += 1
+                return estimate - LAZY_EVALUATION_MARGIN
+            self.full_evaluations += 1
+
+        #the board keeps the sums of all white piece evaluations minus all black ones up to date on every move,
+        #so we only add the pawn structure and blend the middle game and end game sum by how far the game has progressed
+        middle_game, end_game = self.pawn_structure_scores()
+        middle_game += self.middle_game_score
+        end_game += self.end_game_score
+
+        #more squares to go to is better, the attack maps already count them for every color
+        if self.use_mobility:
+            mobility = self.count_mobility(True) - self.count_mobility(False)
+            middle_game += mobility * MOBILITY_BONUS[0]
+            end_game += mobility * MOBILITY_BONUS[1]
+
+        #every attack next to the own king is dangerous
+        if self.use_king_safety:
+            king_zone_attacks = self.king_zone_attacks(True) - self.king_zone_attacks(False)
+            middle_game -= king_zone_attacks * KING_ZONE_ATTACK_PENALTY[0]
+            end_game -= king_zone_attacks * KING_ZONE_ATTACK_PENALTY[1]
+
+        return (middle_game * phase + end_game * (MAX_PHASE - phase)) / MAX_PHASE
+
+    def evaluate_children(self, moves, alpha=None, beta=None):
+        """
+        Evaluates the configurations after each of the given moves without making them. Every child score is the
+        current score plus the value change of the moved piece and minus the value of a hit piece, which gives
+        exactly what :py:meth:`evaluate` would return after :py:meth:`make_move <board.BoardBase.make_move>`.
+        Only pawn moves and pawn captures change the pawn structure, all other children share the current one.
+
+        A move can change the attacks of any number of pieces, so with mobility or king safety switched on (see
+        :py:meth:`evaluate`) every move is made and taken back instead. The same goes for an NNUE network,
+        whose head only runs on a complete accumulator. Given a search window, children whose material and
+        piece-square score is far outside of it are not made at all but return a bound (see :py:meth:`evaluate`),
+        the cheap delta scores ignore the window.
+
+        :param moves: 16 bit moves (see :py:mod:`moves`) of the current configuration
+        :param alpha: The lower bound of the search window or None
+        :param beta: The upper bound of the search window
+        :return: An ``array('d')`` with the score after each move, in the same order
+        """
+        if self.use_mobility or self.use_king_safety or self.network is not None:
+            lazy = alpha is not None and self.network is None
+            scores = new_score_list()
+            for move in moves:
+                if lazy:
+                    estimate = self.estimate_child(move)
+                    if estimate + LAZY_EVALUATION_MARGIN <= alpha:
+                        self.lazy_exits += 1
+                        scores.append(estimate + LAZY_EVALUATION_MARGIN)
+                        continue
+                    if estimate - LAZY_EVALUATION_MARGIN >= beta:
+                        self.lazy_exits += 1
+                        scores.append(estimate - LAZY_EVALUATION_MARGIN)
+                        continue
+                    self.full_evaluations += 1
+                self.make_encoded_move(move)
+                scores.append(self.evaluate())
+                self.unmake_move()
+            return scores
+
+        squares = self.squares
+        pawn_zobrist = self.pawn_zobrist
+        pawn_scores = self.pawn_structure_scores()
+        middle_game_score = self.middle_game_score
+        end_game_score = self.end_game_score
+        scores = new_score_list()
+
+        for move in moves:
+            from_square = INDEX_TO_SQUARE[move & 63]
+            to_square = INDEX_TO_SQUARE[(move >> 6) & 63]
+            code = squares[from_square].code
+            middle_game_values = SIGNED_MIDDLE_GAME_VALUES[code]
+            end_game_values = SIGNED_END_GAME_VALUES[code]
+            middle_game = middle_game_score + middle_game_values[to_square] - middle_game_values[from_square]
+            end_game = end_game_score + end_game_values[to_square] - end_game_values[from_square]
+            phase = self.phase
+            pawn_keys = ZOBRIST_PAWN_KEYS[code]
+            child_pawn_zobrist = pawn_zobrist ^ pawn_keys[from_square] ^ pawn_keys[to_square]
+
+            if move & CAPTURE:
+                captured = squares[to_square].code
+                middle_game -= SIGNED_MIDDLE_GAME_VALUES[captured][to_square]
+                end_game -= SIGNED_END_GAME_VALUES[captured][to_square]
+                phase -= PHASE_BY_CODE[captured]
+                child_pawn_zobrist ^= ZOBRIST_PAWN_KEYS[captured][to_square]
+
+            if child_pawn_zobrist == pawn_zobrist:
+                pawn_middle_game, pawn_end_game = pawn_scores
+            else:
+                pawn_middle_game, pawn_end_game = self.pawn_structure_scores(child_pawn_zobrist, from_square, to_square)
+            middle_game += pawn_middle_game
+            end_game += pawn_end_game
+
+            # Blend as in evaluate
+            if phase > MAX_PHASE:
+                phase = MAX_PHASE
+            scores.append((middle_game * phase + end_game * (MAX_PHASE - phase)) / MAX_PHASE)
+
+        return scores
+
+    def estimate_child(self, move):
+        """
+        Returns the material and piece-square score after a move without making it, the estimate of lazy
+        evaluation (see :py:meth:`evaluate`).
 
-        for piece in self.iterate_cells_with_pieces(True):
-            score += piece.evaluate()
+        :param move: A 16 bit move (see :py:mod:`moves`) of the current configuration
+        """
+        from_square = INDEX_TO_SQUARE[move & 63]
+        to_square = INDEX_TO_SQUARE[(move >> 6) & 63]
+        code = self.squares[from_square].code
+        middle_game = self.middle_game_score + SIGNED_MIDDLE_GAME_VALUES[code][to_square] - SIGNED_MIDDLE_GAME_VALUES[code][from_square]
+        end_game = self.end_game_score + SIGNED_END_GAME_VALUES[code][to_square] - SIGNED_END_GAME_VALUES[code][from_square]
+        phase = self.phase
+        if move & CAPTURE:
+            captured = self.squares[to_square].code
+            middle_game -= SIGNED_MIDDLE_GAME_VALUES[captured][to_square]
+            end_game -= SIGNED_END_GAME_VALUES[captured][to_square]
+            phase -= PHASE_BY_CODE[captured]
+        if phase > MAX_PHASE:
+            phase = MAX_PHASE
+        return (middle_game * phase + end_game * (MAX_PHASE - phase)) / MAX_PHASE
+
+    def least_valuable_attacker(self, square, white, removed=()):
+        """
+        Finds the least valuable piece of the given color attacking a square, see :py:meth:`see`.
 
-        for piece in self.iterate_cells_with_pieces(False):
-            score -= piece.evaluate()
-        
-        return score
+        :param square: The attacked square of the mailbox (see :py:mod:`squares`)
+        :param white: The color of the attacker
+        :param removed: Squares whose pieces count as gone, sliders behind them attack through
+        :return: The attacking piece or None
+        """
+        squares = self.squares
+        # A pawn of the given color attacks the square from where a pawn of the other color on it would attack
+        for attacker_square in PAWN_TARGETS[not white][square]:
+            attacker = squares[attacker_square]
+            if attacker is not None and attacker.white == white and attacker.KIND == Pawn.KIND and attacker_square not in removed:
+                return attacker
+        for attacker_square in KNIGHT_TARGETS[square]:
+            attacker = squares[attacker_square]
+            if attacker is not None and attacker.white == white and attacker.KIND == Knight.KIND and attacker_square not in removed:
+                return attacker
+
+        # The first piece on each line decides, the kinds of the sliders are ordered by their value
+        least_valuable = None
+        for directions, kinds in ((BISHOP_DIRECTIONS, (Bishop.KIND, Queen.KIND)), (ROOK_DIRECTIONS, (Rook.KIND, Queen.KIND))):
+            for direction in directions:
+                attacker_square = square + direction
+                while squares[attacker_square] is None or attacker_square in removed:
+                    attacker_square += direction
+                attacker = squares[attacker_square]
+                if (
+                    attacker is not OFFBOARD and attacker.white == white and attacker.KIND in kinds
+                    and (least_valuable is None or attacker.KIND < least_valuable.KIND)
+                ):
+                    least_valuable = attacker
+        if least_valuable is not None:
+            return least_valuable
+
+        for attacker_square in KING_TARGETS[square]:
+            attacker = squares[attacker_square]
+            if attacker is not None and attacker.white == white and attacker.KIND == King.KIND and attacker_square not in removed:
+                return attacker
+        return None
+
+    def see(self, move):
+        """
+        Static exchange evaluation: plays out all captures on the target square of a move without making them.
+        Both sides hit with their least valuable attacker first and stop as soon as going on would lose material.
+        Sliders lined up behind an attacker (x-rays) join in once the piece in front of them has hit.
+        Pins and checks are not looked at.
+
+        :param move: A 16 bit move (see :py:mod:`moves`) of the current configuration, usually a capture
+        :return: The material the moving side wins (positive) or loses (negative), in
+            :py:data:`evaluation.MATERIAL_VALUES`
+        """
+        from_square = INDEX_TO_SQUARE[move & 63]
+        square = INDEX_TO_SQUARE[(move >> 6) & 63]
+        piece = self.squares[from_square]
+        target = self.squares[square]
+
+        # gains[n] is the material balance for the side hitting n-th, if it is the last to hit
+        gains = [0 if target is None else MATERIAL_VALUES[target.KIND]]
+        on_square = MATERIAL_VALUES[piece.KIND]
+        removed = {from_square}
+        white = not piece.white
+        while True:
+            attacker = self.least_valuable_attacker(square, white, removed)
+            if attacker is None:
+                break
+            gains.append(on_square - gains[-1])
+            on_square = MATERIAL_VALUES[attacker.KIND]
+            removed.add(attacker.square)
+            white = not white
+
+        # Going backwards, each side either hits or stops, whatever is better for it
+        while len(gains) > 1:
+            gain = gains.pop()
+            gains[-1] = min(gains[-1], -gain)
+        return gains[0]
 
     def is_valid_cell(self, cell):
         """
@@ -465,4 +1227,325 @@ class Board(BoardBase):
         #so if the given piece has the same color as the piece on the cell it will be False != False or True != True which simplifies to False and Returns it
         #and if it's another color it will be True != False or False != True which simplifies to True
         
-        return self.is_valid_cell(cell) and self.get_cell(cell).white != piece.white
\ No newline at end of file
+        return self.is_valid_cell(cell) and self.get_cell(cell).white != piece.white
+
+
+class BitBoard(Board):
+    """
+    Board backend keeping one 64 bit mask per piece code (see :py:attr:`pieces.Piece.code`) plus one occupancy
+    mask per color next to the squares. Pieces placed on this board generate their moves with shift-and-mask
+    operations (see the ``get_reachable_mask`` methods of the pieces).
+
+    Attack queries, checks, pins and legal moves are answered from the masks and the magic tables (see
+    :py:mod:`magic`) when asked, so this board keeps no attack maps: a move only toggles a few bits. The
+    :py:class:`Board` API stays the same, except that :py:meth:`find_checks_and_pins` returns masks.
+    """
+
+    BITBOARDS = True
+
+    def clear_masks(self):
+        """
+        Resets all bit boards and occupancy masks to an empty board
+        """
+        self.bitboards = [0] * 12
+        self.occupancy = {True: 0, False: 0}
+        self.occupied = 0
+
+    def toggle_piece_mask(self, piece, mask):
+        """
+        Toggles the given cells in the masks of the given piece (and its color).
+        """
+        self.bitboards[piece.code] ^= mask
+        self.occupancy[piece.white] ^= mask
+        self.occupied = self.occupancy[True] | self.occupancy[False]
+
+    def clear_board(self):
+        super().clear_board()
+        self.clear_masks()
+
+    def add_attacks(self, piece):
+        # The masks answer all attack queries, there are no attack maps to update
+        pass
+
+    def remove_attacks(self, piece):
+        pass
+
+    def sliders_through(self, square, other_square=None, moving=None):
+        return []
+
+    def attackers(self, index, white, occupied):
+        """
+        Returns the mask of the pieces of the given color attacking a bit index (see :py:mod:`bitmasks`).
+
+        :param index: The attacked bit index
+        :param white: The color of the attackers
+        :param occupied: The occupied cells, sliders attack through cells missing in it
+        """
+        bitboards = self.bitboards
+        code = Pawn.KIND if white else Pawn.KIND + 6
+        # A pawn of the given color attacks the index from where a pawn of the other color on it would attack
+        return (
+            (PAWN_ATTACKS[not white][index] & bitboards[code])
+            | (KNIGHT_ATTACKS[index] & bitboards[code + Knight.KIND])
+            | (KING_ATTACKS[index] & bitboards[code + King.KIND])
+            | (bishop_attacks(index, occupied) & (bitboards[code + Bishop.KIND] | bitboards[code + Queen.KIND]))
+            | (rook_attacks(index, occupied) & (bitboards[code + Rook.KIND] | bitboards[code + Queen.KIND]))
+        )
+
+    def is_square_attacked(self, square, white):
+        return self.attackers(SQUARE_TO_INDEX[square], white, self.occupied) != 0
+
+    def count_attackers(self, square, white):
+        return bin(self.attackers(SQUARE_TO_INDEX[square], white, self.occupied)).count("1")
+
+    def count_mobility(self, white):
+        bitboards = self.bitboards
+        occupied = self.occupied
+        code = 0 if white else 6
+        mobility = 0
+        for kind, attacks in ((Knight.KIND, None), (Bishop.KIND, bishop_attacks), (Rook.KIND, rook_attacks), (Queen.KIND, None)):
+            mask = bitboards[code + kind]
+            while mask:
+                lowest = mask & -mask
+                index = lowest.bit_length() - 1
+                if kind == Knight.KIND:
+                    mobility += bin(KNIGHT_ATTACKS[index]).count("1")
+                elif kind == Queen.KIND:
+                    mobility += bin(rook_attacks(index, occupied) | bishop_attacks(index, occupied)).count("1")
+                else:
+                    mobility += bin(attacks(index, occupied)).count("1")
+                mask ^= lowest
+        return mobility
+
+    def king_zone_attacks(self, white):
+        king = self.kings[white]
+        if king is None:
+            return 0
+        occupied = self.occupied
+        return sum(bin(self.attackers(SQUARE_TO_INDEX[square], not white, occupied)).count("1") for square in KING_ZONES[king.square])
+
+    def find_checks_and_pins(self, white):
+        """
+        Bit mask version of :py:meth:`Board.find_checks_and_pins`, with the same tuple of masks instead of sets.
+        evasion_squares is :py:data:`bitmasks.FULL` without a check. xray_squares is always 0, the legal king moves
+        are found with the king taken off the occupancy instead (see :py:meth:`legal_mask`).
+        """
+        king = self.kings[white]
+        if king is None:
+            return 0, FULL, {}, 0
+
+        index = SQUARE_TO_INDEX[king.square]
+        bitboards = self.bitboards
+        occupied = self.occupied
+        own = self.occupancy[white]
+        code = 6 if white else 0
+        queens = bitboards[code + Queen.KIND]
+        checkers = (
+            (PAWN_ATTACKS[white][index] & bitboards[code + Pawn.KIND])
+            | (KNIGHT_ATTACKS[index] & bitboards[code + Knight.KIND])
+        )
+        evasion_squares = checkers
+        pins = {}
+        for attacks, sliders in ((rook_attacks, bitboards[code + Rook.KIND] | queens), (bishop_attacks, bitboards[code + Bishop.KIND] | queens)):
+            if not sliders:
+                continue
+            rays = attacks(index, occupied)
+            for checker in self._bits(rays & sliders):
+                checkers |= checker
+                evasion_squares = attacks(index, checker) & attacks(checker.bit_length() - 1, 1 << index) | checker
+            # Sliders seen once the first own pieces on the rays are gone pin them
+            blockers = rays & own
+            if blockers:
+                for pinner in self._bits(attacks(index, occupied ^ blockers) & sliders & ~rays):
+                    ray = attacks(index, pinner) & attacks(pinner.bit_length() - 1, 1 << index) | pinner
+                    pins[self.squares[INDEX_TO_SQUARE[(ray & blockers).bit_length() - 1]]] = ray
+
+        count = bin(checkers).count("1")
+        if count == 0:
+            evasion_squares = FULL
+        elif count > 1:
+            # Only the king can answer a double check
+            evasion_squares = 0
+        return count, evasion_squares, pins, 0
+
+    def see(self, move):
+        """
+        Bit mask version of :py:meth:`Board.see`: the attackers of the target square come from :py:meth:`attackers`,
+        with every piece that has hit taken off the occupancy so the sliders behind it attack through.
+        """
+        from_index = move & 63
+        index = (move >> 6) & 63
+        piece = self.squares[INDEX_TO_SQUARE[from_index]]
+        target = self.squares[INDEX_TO_SQUARE[index]]
+        bitboards = self.bitboards
+
+        gains = [0 if target is None else MATERIAL_VALUES[target.KIND]]
+        on_square = MATERIAL_VALUES[piece.KIND]
+        occupied = self.occupied ^ (1 << from_index)
+        white = not piece.white
+        while True:
+            attackers = self.attackers(index, white, occupied) & occupied
+            if not attackers:
+                break
+            # The kinds are ordered by their value, the least valuable attacker hits first
+            code = 0 if white else 6
+            for kind in range(6):
+                attacker = attackers & bitboards[code + kind]
+                if attacker:
+                    break
+            gains.append(on_square - gains[-1])
+            on_square = MATERIAL_VALUES[kind]
+            occupied ^= attacker & -attacker
+            white = not white
+
+        while len(gains) > 1:
+            gain = gains.pop()
+            gains[-1] = min(gains[-1], -gain)
+        return gains[0]
+
+    @staticmethod
+    def _bits(mask):
+        """
+        Splits a mask into a list of single bit masks.
+        """
+        bits = []
+        while mask:
+            lowest = mask & -mask
+            bits.append(lowest)
+            mask ^= lowest
+        return bits
+
+    def legal_mask(self, piece, checks_and_pins, targets=FULL):
+        """
+        Returns the mask of the legal targets of a piece, see :py:meth:`get_legal_squares`.
+
+        :param targets: Mask the targets are restricted to before the legality is checked, e.g. the opposing pieces
+        """
+        reachable = piece.get_reachable_mask() & targets
+        if not reachable:
+            return 0
+        _, evasion_squares, pins, _ = checks_and_pins
+        if piece.KIND == King.KIND:
+            # Without the king on its square, the rays of checking sliders go on behind it
+            occupied = self.occupied ^ (1 << SQUARE_TO_INDEX[piece.square])
+            bitboards = self.bitboards
+            code = Pawn.KIND + 6 if piece.white else Pawn.KIND
+            pawns = bitboards[code]
+            knights = bitboards[code + Knight.KIND]
+            king = bitboards[code + King.KIND]
+            diagonal = bitboards[code + Bishop.KIND] | bitboards[code + Queen.KIND]
+            straight = bitboards[code + Rook.KIND] | bitboards[code + Queen.KIND]
+            pawn_attacks = PAWN_ATTACKS[piece.white]
+            legal = 0
+            while reachable:
+                target = reachable & -reachable
+                reachable ^= target
+                index = target.bit_length() - 1
+                if (
+                    pawn_attacks[index] & pawns
+                    or KNIGHT_ATTACKS[index] & knights
+                    or KING_ATTACKS[index] & king
+                    or (diagonal and bishop_attacks(index, occupied) & diagonal)
+                    or (straight and rook_attacks(index, occupied) & straight)
+                ):
+                    continue
+                legal |= target
+            return legal
+        reachable &= evasion_squares
+        pin = pins.get(piece)
+        if pin is not None:
+            reachable &= pin
+        return reachable
+
+    def get_legal_squares(self, piece, checks_and_pins=None):
+        if checks_and_pins is None:
+            checks_and_pins = self.find_checks_and_pins(piece.white)
+        return mask_to_squares(self.legal_mask(piece, checks_and_pins))
+
+    def generate_encoded_moves(self, white):
+        checks_and_pins = self.find_checks_and_pins(white)
+        _, evasion_squares, pins, _ = checks_and_pins
+        opposing = self.occupancy[not white]
+        moves = new_move_list()
+        append = moves.append
+        for piece in self.iterate_cells_with_pieces(white):
+            # Inlined legal_mask() for everything but the king, this is the hottest loop of the search
+            if piece.KIND == King.KIND:
+                targets = self.legal_mask(piece, checks_and_pins)
+            else:
+                targets = piece.get_reachable_mask() & evasion_squares
+                if piece in pins:
+                    targets &= pins[piece]
+            from_bits = SQUARE_TO_INDEX[piece.square]
+            captures = targets & opposing
+            targets ^= captures
+            while targets:
+                target = targets & -targets
+                append(from_bits | TARGET_BITS[target])
+                targets ^= target
+            from_bits |= CAPTURE
+            while captures:
+                target = captures & -captures
+                append(from_bits | TARGET_BITS[target])
+                captures ^= target
+        return moves
+
+    def generate_encoded_captures(self, white):
+        checks_and_pins = self.find_checks_and_pins(white)
+        opposing = self.occupancy[not white]
+        moves = new_move_list()
+        for piece in self.iterate_cells_with_pieces(white):
+            captures = self.legal_mask(piece, checks_and_pins, opposing)
+            from_bits = SQUARE_TO_INDEX[piece.square] | CAPTURE
+            while captures:
+                target = captures & -captures
+                moves.append(from_bits | TARGET_BITS[target])
+                captures ^= target
+        return moves
+
+    def set_cell(self, cell, piece):
+        previous = self.get_cell(cell)
+        super().set_cell(cell, piece)
+
+        # The origin of a moved piece has already been cleared by the recursive set_cell call
+        mask = 1 << SQUARE_TO_INDEX[cell_to_square(cell)]
+        if previous is not None:
+            self.toggle_piece_mask(previous, mask)
+        if piece is not None:
+            self.toggle_piece_mask(piece, mask)
+
+    def make_move(self, piece, square):
+        captured = self.squares[square]
+        from_mask = 1 << SQUARE_TO_INDEX[piece.square]
+        super().make_move(piece, square)
+
+        to_mask = 1 << SQUARE_TO_INDEX[square]
+        if captured is not None:
+            self.toggle_piece_mask(captured, to_mask)
+        self.toggle_piece_mask(piece, from_mask | to_mask)
+
+    def unmake_move(self):
+        piece, from_square, captured = self.undo_stack[-1][:3]
+        to_mask = 1 << SQUARE_TO_INDEX[piece.square]
+        super().unmake_move()
+
+        self.toggle_piece_mask(piece, to_mask | (1 << SQUARE_TO_INDEX[from_square]))
+        if captured is not None:
+            self.toggle_piece_mask(captured, to_mask)
+
+
+# Available board backends, see create_board()
+BACKENDS = {
+    "mailbox": Board,
+    "bitboard": BitBoard,
+}
+
+
+def create_board(backend="mailbox"):
+    """
+    Creates an empty board of the given backend.
+
+    :param backend: One of the keys of :py:data:`BACKENDS`
+    :return: The new board
+    """
+    return BACKENDS[backend]()
@@ -1,10 +1,40 @@
 import random
+import time
 from tqdm import tqdm
 from util import map_piece_to_character, cell_to_string
+from squares import SQUARE_TO_CELL
+from moves import NO_MOVE, move_from_square, move_to_square, sort_moves
+from evaluation import MATERIAL_VALUES
+from transposition import TranspositionTable, position_key
+from ordering import MAX_PLY, MoveOrdering
 
 
 DEPTH = 3
 
+# Margin of the delta pruning of the quiescence search: how much a capture may gain beyond the material of the hit
+# piece (see quiescence)
+DELTA_MARGIN = 200
+
+# Memory of the transposition table shared by all searches, see transposition_table
+TRANSPOSITION_TABLE_MB = 16
+
+# Score of a lost game for the side without moves, and a bound no score reaches
+MATE_SCORE = 100000
+INFINITY = float("inf")
+
+# Iterative deepening (see iterative_deepening): deepest depth searched with a time budget, the fractions of the budget
+# after which no new iteration starts (soft limit) and a running one is given up (hard limit), and how much longer than
+# the one before an iteration is expected to take until two have been timed
+MAX_DEPTH = 32
+SOFT_TIME_LIMIT = 0.5
+HARD_TIME_LIMIT = 1.0
+DEFAULT_GROWTH = 6.0
+
+# Bound types of cached alpha-beta scores: the score itself, at least the score (it failed high), at most the score (it failed low)
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
 
 class MinMaxArg:
     """ Helper Class for the MinMax Algorithm.
@@ -12,18 +42,24 @@ class MinMaxArg:
 
     Note: You don´t need to implement anything in this case, you can use it in the MinMax Algorithm as you seem fit. 
     """
-    def __init__(self, depth=DEPTH, playAsWhite=True):
+    def __init__(self, depth=DEPTH, playAsWhite=True, ply=0, quiescence=False, ordering=False):
         """
-        Initializes the class using the provided parameters
+        Initializes the class using the provided parameters, ply is the distance from the root of the search.
+        With quiescence the leaves are resolved by the :py:func:`quiescence` search instead of taking the evaluation,
+        :py:func:`suggest_move` turns it on. With ordering :py:func:`negamax` searches its moves in the order of
+        :py:data:`move_ordering`, without (the default) in the evaluation order with only the hash move first.
         """
         self.depth = depth
         self.playAsWhite = playAsWhite
+        self.ply = ply
+        self.quiescence = quiescence
+        self.ordering = ordering
 
     def next(self):
         """ 
         Provides the next stage of the MinMax Algorithm by reducing the depth by one and toggling playAsWhite
         """
-        return MinMaxArg(self.depth - 1, not self.playAsWhite)
+        return MinMaxArg(self.depth - 1, not self.playAsWhite, self.ply + 1, self.quiescence, self.ordering)
 
 
 class Move:
@@ -42,6 +78,20 @@ class Move:
         self.cell = cell
         self.score = score
 
+    @classmethod
+    def from_encoded(cls, board, move, score):
+        """
+        Builds a Move from a 16 bit move (see :py:mod:`moves`) of the current board configuration.
+        The engine works with encoded moves internally, Move objects are only created for its callers.
+
+        :param board: The board the move belongs to, the moved piece is looked up on it
+        :param move: The encoded move, :py:data:`moves.NO_MOVE` if there is none
+        :param score: The evaluation score of the move
+        """
+        if move == NO_MOVE:
+            return cls(None, (0, 0), score)
+        return cls(board.squares[move_from_square(move)], SQUARE_TO_CELL[move_to_square(move)], score)
+
     def __str__(self):
         """
         Helper class to turn this move into a neat string representation following the official chess notation guidelines.
@@ -67,20 +117,15 @@ def evaluate_all_possible_moves(board, minMaxArg, maximumNumberOfMoves = 10):
     So if minMaxArg.playAsWhite is True, all possible moves of all white pieces must be evaluated.
     And if minMaxArg.playAsWhite is False, all possible moves of all black pieces must be evaluated. 
 
-    Iterate over all cells with pieces on them by calling the :py:meth:`iterate_cells_with_pieces <board.Board.iterate_cells_with_pieces>` method. 
-    For each piece, retrieve all valid moves by calling the :py:meth:`get_valid_cells <pieces.Piece.get_valid_cells>` method of that piece. 
+    Retrieve all valid moves of the current color by calling the :py:meth:`generate_legal_moves <board.Board.generate_legal_moves>` method. 
+    It checks for checks and pinned pieces only once for the whole configuration instead of once per move. 
 
-    In order to evaluate a valid move, first you need to place that piece on the respective cell. Call the :py:meth:`set_cell <board.BoardBase.set_cell>` method 
-    to do so. Before doing so, remember the cell the piece is currently placed on as you will need to place it back later.
-    Because placing a piece on a new cell could potential hit (and thus remove) an opposing piece currently placed on this cell, 
-    you need to remember the piece on the target cell as well. Call :py:meth:`get_cell <board.BoardBase.get_cell>` to retrieve that piece and store it in a variable.
-
-    After the new board configuration is set in place, call the :py:meth:`evaluate <board.Board.evaluate>` method. You can use the 
+    In order to evaluate a valid move, you could place that piece on the respective cell with :py:meth:`make_move <board.BoardBase.make_move>`,
+    call the :py:meth:`evaluate <board.Board.evaluate>` method and restore the original configuration with
+    :py:meth:`unmake_move <board.BoardBase.unmake_move>`. The :py:meth:`evaluate_children <board.Board.evaluate_children>` method
+    gives the same scores for all moves at once by only adding up what each move changes. You can use the 
     :py:class:`Move` class to store the move (piece and target cell) alongside its achieved evaluation score in a list. 
 
-    Restore the original board configuration by placing the piece in its original cell and restoring any potentially removed piece before 
-    moving on to the next move or piece. 
-
     Remember the :py:meth:`evaluate <board.Board.evaluate>` method always evaluates from WHITEs perspective, so a higher evaluation
     relates to a better position for WHITE. 
 
@@ -95,46 +140,32 @@ def evaluate_all_possible_moves(board, minMaxArg, maximumNumberOfMoves = 10):
     """
     # TODO: Implement the method according to the above description
 
+    #the engine scores the moves as compact 16 bit numbers (see evaluate_moves), we only turn the best ones into Move objects here
+    moves, scores = evaluate_moves(board, minMaxArg, maximumNumberOfMoves)
+    return [Move.from_encoded(board, move, score) for move, score in zip(moves, scores)]
 
-    #We create a list to store, possible scores with the piece that achieved that score and the cell it has to move to (We use instances of the type Move, the class we are currently working in)
-    possible_scores = []
-
-    #iterate over all cells with the booleadn minMaxArg (same logic as before, if it's True = white, if it's False = black)
-    #and everytime you find a piece with the provided color
-    for piece_we_move in board.iterate_cells_with_pieces(minMaxArg.playAsWhite):
-        #you get all the moves that specific piece can make and store it in the list "all_possible_moves"
-        all_possible_moves = piece_we_move.get_valid_cells()
-        #before we start moving the piece we wanna move, we safe his location on the board, to be able to recover his old position after that
-        orginal_pos = piece_we_move.cell
-        
-        #now we iterate over all the possible moves that piece can make
-        for move in all_possible_moves:
-            #we first get the piece that is on the cell we wanna move to, to make sure after it's evaluated we can recover the boards old state
-            removed_piece = board.get_cell(move)
-            #now we move the piece we move to that position
-            board.set_cell(move, piece_we_move)
-            #now we evaluate the board for white (don't forget if we are black we want the lowest score)
-            score = board.evaluate()
-            #we create a new instance of the Move class
-            #for that we safe the piece we move, with the cell we moved it to and the resulting score of that action
-            temporarily_move = Move(piece_we_move, move, score)
-            #we add that object to the list we created at the begining
-            possible_scores.append(temporarily_move)
-            #we recover the old boards position by FIRST moving our piece back
-            board.set_cell(orginal_pos, piece_we_move)
-            #than set the cell back to it's original state
-            board.set_cell(move, removed_piece)
-
-
-    #    return possible_scores.sort(minMaxArg, lambda x : x.score)
-    #    TypeError: sort() takes no positional arguments
 
+def evaluate_moves(board, minMaxArg, maximumNumberOfMoves = 10, alpha = None, beta = None):
+    """
+    Engine internal version of :py:func:`evaluate_all_possible_moves`: evaluates, sorts and truncates the moves
+    the same way, but returns them as 16 bit moves (see :py:mod:`moves`) with a parallel score list.
 
-    #https://stackoverflow.com/questions/403421/how-do-i-sort-a-list-of-objects-based-on-an-attribute-of-the-objects
-    sorted_list = sorted(possible_scores, reverse = minMaxArg.playAsWhite, key = lambda x : x.score)
+    :param alpha: Lower bound of the search window from WHITEs perspective, the moves are evaluated lazily within it
+        (see :py:meth:`Board.evaluate <board.Board.evaluate>`)
+    :param beta: Upper bound of the search window from WHITEs perspective
+    :return: A tuple (moves, scores) of an ``array('H')`` and an ``array('d')``
+    """
+    #get all legal moves of the provided color (True = white, False = black) as 16 bit numbers
+    #the board figures out checks and pinned pieces once for all of them
+    moves = board.generate_encoded_moves(minMaxArg.playAsWhite)
 
-    return sorted_list[0:maximumNumberOfMoves]
+    #the board evaluates the configuration after every move for white (don't forget if we are black we want the lowest score)
+    #it only adds up what the move changes, so no move has to be made and unmade for that
+    #we get a list with the score of every move, at the same position as the move in its own list
+    scores = board.evaluate_children(moves, alpha, beta)
 
+    #sort both lists by score (descending for white, ascending for black) and keep only the best moves
+    return sort_moves(moves, scores, minMaxArg.playAsWhite, maximumNumberOfMoves)
 
 
 def minMax(board, minMaxArg):
@@ -165,11 +196,8 @@ def minMax(board, minMaxArg):
 
     If the remaining search depth is greater than 1 (minMaxArg.depth > 1),
     iterate over all possible moves. Implement each move by placing the piece in question on the respective cell. 
-    Call the :py:meth:`set_cell <board.BoardBase.set_cell>` method 
-    to do so. Before doing so, remember the cell the piece is currently placed on as you will need to place it back later.
-    Because placing a piece on a new cell could potential hit (and thus remove) an opposing piece currently placed on this cell, 
-    you need to remember the piece on the target cell as well. Call :py:meth:`get_cell <board.BoardBase.get_cell>` 
-    to retrieve that piece and store it in a variable.
+    Call the :py:meth:`make_move <board.BoardBase.make_move>` method 
+    to do so. It remembers the cell the piece is currently placed on as well as any opposing piece hit on the target cell.
 
     After the new board configuration is set in place, 
     call the :py:meth:`minMax_cached <engine.minMax_cached>` method
@@ -177,7 +205,7 @@ def minMax(board, minMaxArg):
 
     Overwrite the current moves score with the result from the recursive call.
     
-    Restore the original board configuration by placing the piece in its original cell and restoring any potentially removed piece before 
+    Restore the original board configuration by calling :py:meth:`unmake_move <board.BoardBase.unmake_move>` before 
     moving on to the next move. 
 
     After all moves and their counter-moves have been evaluated sort the list
@@ -205,47 +233,63 @@ def minMax(board, minMaxArg):
     """
     # TODO: Implement the Mini-Max algorithm
 
+    #the search itself works with compact 16 bit moves (see search), only the result becomes a Move object
+    move, score = search(board, minMaxArg)
+    return Move.from_encoded(board, move, score)
+
+
+def search(board, minMaxArg):
+    """
+    Engine internal version of :py:func:`minMax`, returning the best move as a tuple (move, score) of a
+    16 bit move (see :py:mod:`moves`) and its score. Answers are searched with :py:func:`search_cached`.
+    """
+    global nodes
+    nodes += 1
+
     #1. we get the 10 best moves we can do, with the current board configuration
-    top_moves_of_current_color = evaluate_all_possible_moves(board, minMaxArg)
+    moves, scores = evaluate_moves(board, minMaxArg)
 
     #2. if there are no moves we can do (we lost), give the other color a big score 
-    if not top_moves_of_current_color:
-        #i use none and cell 0,0 because it doesn't matter what type of piece it is, the score is 100 000 in the favor of the winner
-        return Move(piece= None, cell=(0,0), score=-100000) if minMaxArg.playAsWhite else Move(piece= None, cell=(0,0), score=100000)
+    if not moves:
+        #there is no move to return, the score is 100 000 in the favor of the winner
+        return (NO_MOVE, -MATE_SCORE) if minMaxArg.playAsWhite else (NO_MOVE, MATE_SCORE)
     
     #3. we check if we have reached the deepest level (1) of the min max algorithm (if not proceed)
     if minMaxArg.depth > 1:
-        #we go through the top 10 moves with the according pieces one by one
-        for top_move in top_moves_of_current_color:
-            #get the piece that moves in that top_move we go through right now
-            piece = top_move.piece
-            #get the cell that piece want's to go to 
-            cell_we_wanna_go_to = top_move.cell
+        #we go through the top 10 moves one by one
+        for index, move in enumerate(moves):
+            #we make the move, the board remembers how to recover its old state
+            board.make_encoded_move(move)
 
-            #save the current cell the piece is on
-            current_cell_of_piece = piece.cell
-            #save the piece we will go to for board recovery(none if cell is empty)
-            removed_piece = board.get_cell(cell_we_wanna_go_to)
-
-            #we move the piece to the position we wanna go to
-            board.set_cell(cell_we_wanna_go_to, piece)
-
-            #we get back the best move the enemy would do
-            enemys_best_possible_move = minMax_cached(board, minMaxArg=minMaxArg.next)
+            #we get back the score of the best move the enemy would do
+            _, enemys_best_score = search_cached(board, minMaxArg.next())
 
             #we overwrite the current score we thought we will get, with the score we will get if the enemy plays his best game
-            top_move.score = enemys_best_possible_move.score
+            scores[index] = enemys_best_score
             
-            #again first move our piece back, than place the old piece back on it's position
-            board.set_cell(current_cell_of_piece, piece)
-            board.set_cell(cell_we_wanna_go_to, removed_piece)
-
-    #https://stackoverflow.com/questions/403421/how-do-i-sort-a-list-of-objects-based-on-an-attribute-of-the-objects
-    #for every move we changed the score to the real score we would get, now we sort againg like in the function before
-    sorted_list = sorted(top_moves_of_current_color, reverse = minMaxArg.playAsWhite, key = lambda x : x.score)
+            #move our piece back and restore any hit piece
+            board.unmake_move()
+
+    #at the deepest level the enemy may still hit back, so if asked for we follow the captures until the position is quiet
+    #only the best move is returned, so the other moves only need to be shown to be worse than the best one so far,
+    #which lets the quiescence search stop early
+    elif minMaxArg.quiescence:
+        sign = 1 if minMaxArg.playAsWhite else -1
+        best_score = -INFINITY
+        for index, move in enumerate(moves):
+            board.make_encoded_move(move)
+            #the quiescence search scores from the enemys perspective
+            score = -quiescence(board, not minMaxArg.playAsWhite, -INFINITY, -best_score)
+            board.unmake_move()
+            scores[index] = sign * score
+            if score > best_score:
+                best_score = score
+
+    #for every move we changed the score to the real score we would get, now we sort again like in evaluate_moves
+    moves, scores = sort_moves(moves, scores, minMaxArg.playAsWhite, 1)
 
     #and finally return the best move
-    return sorted_list[0]
+    return moves[0], scores[0]
 
 
 def suggest_random_move(board):
@@ -265,15 +309,19 @@ def suggest_random_move(board):
 
     white_pieces_with_a_move = []
 
+    #checks and pinned pieces are the same for all white pieces, so we let the board find them only once
+    checks_and_pins = board.find_checks_and_pins(True)
+
     #we iterate over all the pieces of the board that are white
     for piece in board.iterate_cells_with_pieces(True):
-        #now we have the piece with the method get_valid_cells, we get an empty list if the piece can't move so we use continue to skip to the next piece
+        #now we get the legal moves of the piece, we get an empty list if the piece can't move so we use continue to skip to the next piece
         #https://stackoverflow.com/questions/53513/how-do-i-check-if-a-list-is-empty
-        if not piece.get_valid_cells():
+        valid_squares = board.get_legal_squares(piece, checks_and_pins)
+        if not valid_squares:
             continue
         #becaue this line will only be executed if we have a valid move, we only append pieces with valid moves
-        #now we add the pieces to a list
-        white_pieces_with_a_move.append(piece)
+        #now we add the pieces together with their moves to a list
+        white_pieces_with_a_move.append((piece, valid_squares))
 
     #because we know in that list we only have a piece if it also has a valid move we can just check if the list is empty
     if not white_pieces_with_a_move:
@@ -281,23 +329,38 @@ def suggest_random_move(board):
     
     #https://stackoverflow.com/questions/306400/how-can-i-randomly-select-choose-an-item-from-a-list-get-a-random-element
     #here we select a random element of the list
-    random_piece = random.choice(white_pieces_with_a_move)
+    random_piece, valid_squares = random.choice(white_pieces_with_a_move)
     #here we get a random move of that chosen piece
-    random_move = random.choice(random_piece.get_valid_cells())
+    random_move = random.choice(valid_squares)
 
     #now we have to return a Move() object
     #have a look into the constructor 
-    return Move(random_piece, random_move, 0)
+    return Move(random_piece, SQUARE_TO_CELL[random_move], 0)
 
 
-def suggest_move(board):
+def suggest_move(board, time_ms=None, max_depth=None, soft_limit=SOFT_TIME_LIMIT, hard_limit=HARD_TIME_LIMIT):
     """s
-    Helper function to start the mini-max algorithm.
-    """
-    return minMax_cached(board, MinMaxArg())
+    Helper function to start the mini-max algorithm, searched with :py:func:`iterative_deepening`.
 
-eval_cache = {}
-total_hits = 0
+    :param time_ms: Time budget in milliseconds, None to search to max_depth whatever it takes
+    :param max_depth: Deepest depth to search, :py:data:`DEPTH` without and :py:data:`MAX_DEPTH` with a time budget if None
+    :param soft_limit: Fraction of the budget after which no new iteration starts
+    :param hard_limit: Fraction of the budget after which a running iteration is given up
+    """
+    if max_depth is None:
+        max_depth = DEPTH if time_ms is None else MAX_DEPTH
+    move, score, _ = iterative_deepening(board, MinMaxArg(max_depth, quiescence=True), time_ms, soft_limit, hard_limit)
+    return Move.from_encoded(board, move, score)
+
+# Results of search and negamax by position, color to play and remaining depth. Both store the score from the perspective
+# of the color to play, a minMax score and an exact alpha-beta score are the same. Assign a new TranspositionTable for
+# another size
+transposition_table = TranspositionTable(TRANSPOSITION_TABLE_MB)
+# Positions searched by search and negamax and positions searched by quiescence, counted over all calls
+nodes = 0
+quiescence_nodes = 0
+# Killer moves and history scores of negamax, cleared by iterative_deepening before every search
+move_ordering = MoveOrdering()
 
 
 def minMax_cached(board, minMaxArg):
@@ -308,18 +371,246 @@ def minMax_cached(board, minMaxArg):
     the mini-max algorithm again. This can save computation time as
     it avoid to repeat evaluations over and over again. 
     """
-    global eval_cache, total_hits
+    move, score = search_cached(board, minMaxArg)
+    return Move.from_encoded(board, move, score)
+
 
-    # Calculate a unique hash code for the current board position and search depth
-    hash = str(minMaxArg.depth) + board.hash()
-    if hash in eval_cache:
-        total_hits += 1
-        # print(f"Cache hit! Cache has {len(eval_cache.keys())} entries with {total_hits} hits so far")
-        return eval_cache[hash]
+def search_cached(board, minMaxArg):
+    """
+    Cached version of :py:func:`search`, see :py:func:`minMax_cached`.
+    The results are kept in the :py:data:`transposition_table` as exact scores.
+    """
+    # The key of the current board position and color to play, the search depth has to match as well
+    key = position_key(board.hash(), minMaxArg.playAsWhite, minMaxArg.quiescence)
+    sign = 1 if minMaxArg.playAsWhite else -1
+    entry = transposition_table.probe(key, minMaxArg.depth)
+    if entry is not None and entry[3] == EXACT:
+        return entry[0], sign * entry[1]
 
     # Its not the cache so do the actual evaluation
-    bestMove = minMax(board, minMaxArg)
+    move, score = search(board, minMaxArg)
 
     # Cache it for later
-    eval_cache[hash] = bestMove
-    return bestMove
+    transposition_table.store(key, move, sign * score, minMaxArg.depth, EXACT)
+    return move, score
+
+
+def alpha_beta(board, minMaxArg):
+    """
+    Drop-in for :py:func:`minMax` with alpha-beta pruning. It searches the same moves (the 10 best evaluated ones in
+    every position) and finds the same best move and score, but skips the answers that cannot change the result:
+    once one answer refutes a move, the others need not be searched (see :py:func:`negamax`).
+
+    :return: The best move as :py:class:`Move`, its score from WHITEs perspective
+    """
+    move, score = negamax(board, minMaxArg, -INFINITY, INFINITY)
+    return Move.from_encoded(board, move, score if minMaxArg.playAsWhite else -score)
+
+
+def alpha_beta_cached(board, minMaxArg):
+    """
+    Drop-in for :py:func:`minMax_cached`, see :py:func:`alpha_beta` and :py:func:`negamax_cached`.
+    """
+    move, score = negamax_cached(board, minMaxArg, -INFINITY, INFINITY)
+    return Move.from_encoded(board, move, score if minMaxArg.playAsWhite else -score)
+
+
+def negamax(board, minMaxArg, alpha, beta, first_move=NO_MOVE):
+    """
+    Fail-soft alpha-beta search in negamax form: scores are from the perspective of the side to move, so each side
+    maximizes the negated scores of the answers. Answers are searched with :py:func:`negamax_cached`.
+
+    :param alpha: Score the side to move is already sure to get elsewhere
+    :param beta: Score the opponent is already sure to hold it to elsewhere
+    :param first_move: A move to search first if it is among the searched ones, the best one of an earlier search
+    :return: A tuple (move, score) of the best 16 bit move (see :py:mod:`moves`) and its score for the side to move.
+        A score at most alpha is an upper bound, one at least beta a lower bound of the exact score
+    """
+    global nodes
+    nodes += 1
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout()
+
+    sign = 1 if minMaxArg.playAsWhite else -1
+    if minMaxArg.depth <= 1 and not minMaxArg.quiescence:
+        # The evaluation is from WHITEs perspective, so is its window
+        window = (alpha, beta) if minMaxArg.playAsWhite else (-beta, -alpha)
+        moves, scores = evaluate_moves(board, minMaxArg, 1, *window)
+        if not moves:
+            return NO_MOVE, -MATE_SCORE
+        return moves[0], sign * scores[0]
+
+    # The 10 best evaluated moves are searched, the same ones as minMax searches, so the scores stay the same. They come
+    # sorted by their evaluation, which already searches the best one first in nearly every position, ordering them
+    # with move_ordering as well does not search fewer positions (see benchmark.print_move_ordering_quality)
+    moves, _ = evaluate_moves(board, minMaxArg)
+    if not moves:
+        return NO_MOVE, -MATE_SCORE
+    # At the leaves the evaluation order is kept, the answers are only captures
+    leaf = minMaxArg.depth <= 1
+    if not leaf:
+        if minMaxArg.ordering:
+            moves = move_ordering.order(board, moves, minMaxArg.playAsWhite, minMaxArg.ply, first_move)
+        elif first_move != NO_MOVE and first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+
+    best_move, best_score = NO_MOVE, -INFINITY
+    for index, move in enumerate(moves):
+        board.make_encoded_move(move)
+        if leaf:
+            score = quiescence(board, not minMaxArg.playAsWhite, -beta, -alpha)
+        else:
+            _, score = negamax_cached(board, minMaxArg.next(), -beta, -alpha)
+        board.unmake_move()
+        score = -score
+        if score > best_score:
+            best_move, best_score = move, score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    # The opponent will not allow this position, the remaining moves do not matter
+                    if not leaf:
+                        move_ordering.update(move, minMaxArg.playAsWhite, minMaxArg.ply, minMaxArg.depth, index)
+                    break
+    return best_move, best_score
+
+
+def quiescence(board, white, alpha, beta):
+    """
+    Quiescence search: follows the captures of a position until it is quiet, so a leaf is not scored in the middle of
+    an exchange. The side to move may stop capturing (stand pat) and take the evaluation of the position, which often
+    refutes the position right away. Captures losing material (see :py:meth:`Board.see <board.Board.see>`) and
+    captures whose hit piece plus :py:data:`DELTA_MARGIN` cannot bring the score up to alpha (delta pruning) are
+    not searched. Checks are not looked at, so a position in check is scored like any other.
+
+    :param white: The color to move
+    :param alpha: Score the side to move is already sure to get elsewhere
+    :param beta: Score the opponent is already sure to hold it to elsewhere
+    :return: The fail-soft score for the side to move
+    """
+    global quiescence_nodes
+    quiescence_nodes += 1
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout()
+
+    sign = 1 if white else -1
+    window = (alpha, beta) if white else (-beta, -alpha)
+    stand_pat = sign * board.evaluate(*window)
+    if stand_pat >= beta:
+        return stand_pat
+    if stand_pat > alpha:
+        alpha = stand_pat
+
+    squares = board.squares
+    best_score = stand_pat
+    for move in move_ordering.order(board, board.generate_encoded_captures(white), white, MAX_PLY - 1):
+        captured = MATERIAL_VALUES[squares[move_to_square(move)].KIND]
+        if stand_pat + captured + DELTA_MARGIN <= alpha or board.see(move) < 0:
+            continue
+        board.make_encoded_move(move)
+        score = -quiescence(board, not white, -beta, -alpha)
+        board.unmake_move()
+        if score > best_score:
+            best_score = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+    return best_score
+
+
+def negamax_cached(board, minMaxArg, alpha, beta):
+    """
+    Cached version of :py:func:`negamax` on the :py:data:`transposition_table`. Scores outside of the window are only
+    bounds, so the table keeps the bound type with every score and only answers from it when the bound decides the
+    given window. Only results of the same remaining depth are used, so the result is the one of :py:func:`negamax`.
+    The best move of any other result is searched first.
+    """
+    key = position_key(board.hash(), minMaxArg.playAsWhite, minMaxArg.quiescence)
+    entry = transposition_table.probe(key)
+    hash_move = NO_MOVE
+    if entry is not None:
+        hash_move, score, depth, bound = entry
+        if depth == minMaxArg.depth and (
+            bound == EXACT or (bound == LOWER_BOUND and score >= beta) or (bound == UPPER_BOUND and score <= alpha)
+        ):
+            return hash_move, score
+
+    move, score = negamax(board, minMaxArg, alpha, beta, hash_move)
+    if score <= alpha:
+        bound = UPPER_BOUND
+    elif score >= beta:
+        bound = LOWER_BOUND
+    else:
+        bound = EXACT
+    transposition_table.store(key, move, score, minMaxArg.depth, bound)
+    return move, score
+
+
+class SearchTimeout(Exception):
+    """
+    Raised by :py:func:`negamax` once the hard time limit of :py:func:`iterative_deepening` has passed.
+    """
+
+
+# Time (of time.perf_counter) after which negamax gives up, None while searching without a time limit
+deadline = None
+
+
+def iterative_deepening(board, minMaxArg, time_ms=None, soft_limit=SOFT_TIME_LIMIT, hard_limit=HARD_TIME_LIMIT):
+    """
+    Searches with :py:func:`negamax` at depth 1, 2, 3 and so on up to ``minMaxArg.depth``, every iteration
+    searching the best move of the one before first. The leaves use the quiescence search if ``minMaxArg`` asks for it.
+
+    With a time budget, no new iteration starts once the soft limit has passed or the next iteration is expected
+    to end after it, expecting it to take as much longer than the last one as the last one took compared to the one
+    before. An iteration still running at the hard limit is given up, leaving the result of the one before.
+    Depth 1 always completes.
+
+    :param time_ms: Time budget in milliseconds, None to complete all iterations
+    :param soft_limit: Fraction of the budget after which no new iteration starts
+    :param hard_limit: Fraction of the budget after which a running iteration is given up
+    :return: A tuple (move, score, depth) of the best 16 bit move (see :py:mod:`moves`) of the deepest completed
+        iteration, its score from WHITEs perspective and that depth
+    """
+    global deadline
+    start = time.perf_counter()
+    move_ordering.clear()
+    sign = 1 if minMaxArg.playAsWhite else -1
+    undo_depth = len(board.undo_stack)
+    best_move, best_score, completed = NO_MOVE, 0, 0
+    previous_duration = duration = None
+
+    for depth in range(1, minMaxArg.depth + 1):
+        if time_ms is not None and depth > 1:
+            elapsed = time.perf_counter() - start
+            growth = duration / previous_duration if previous_duration else DEFAULT_GROWTH
+            if elapsed + duration * growth > soft_limit * time_ms / 1000:
+                break
+            deadline = start + hard_limit * time_ms / 1000
+
+        iteration_start = time.perf_counter()
+        try:
+            move, score = negamax(
+                board,
+                MinMaxArg(depth, minMaxArg.playAsWhite, quiescence=minMaxArg.quiescence, ordering=minMaxArg.ordering),
+                -INFINITY,
+                INFINITY,
+                best_move,
+            )
+        except SearchTimeout:
+            # Take back the moves of the search that was given up
+            while len(board.undo_stack) > undo_depth:
+                board.unmake_move()
+            break
+        finally:
+            deadline = None
+
+        best_move, best_score, completed = move, sign * score, depth
+        previous_duration, duration = duration, time.perf_counter() - iteration_start
+        # Without moves there is nothing deeper to search
+        if move == NO_MOVE:
+            break
+
+    return best_move, best_score, completed
@@ -0,0 +1,485 @@
+"""
+Evaluation tables: material values and piece-square tables (PST) of the pieces.
+
+There are two sets of tables, one for the middle game and one for the end game (only the king differs, it should
+hide in the middle game and come out in the end game). The evaluation tapers between both by the game phase, which
+is derived from the remaining non-pawn material: :py:data:`MAX_PHASE` with all pieces on the board, 0 with only
+kings and pawns left, see :py:func:`taper`.
+
+The piece-square tables are taken from the "Simplified Evaluation Function" on chessprogramming.org and are
+written down as seen from WHITEs side: the first row of a table is the 8th rank, the last one the 1st rank.
+They are flattened once into per-square lists indexed by piece code (see :py:attr:`pieces.Piece.code`) and
+mailbox square (see :py:mod:`squares`), so a look-up costs two list accesses. For a white piece on (row, col)
+the table entry is ``[7 - row][col]``, black pieces use the vertically mirrored entry ``[row][col]``.
+
+For bulk scoring without any board or piece objects, :py:func:`evaluate_many` evaluates a whole stack of
+positions given as int8 arrays (see :py:meth:`BoardBase.to_array <board.BoardBase.to_array>`) with numpy.
+"""
+import numpy as np
+from squares import BOARD_SQUARES, SQUARE_TO_CELL, INDEX_TO_SQUARE
+from bitmasks import FULL, FILE_A, FILE_H
+
+# Material values by piece kind (pawn, knight, bishop, rook, queen, king)
+# Sources: https://www.chessprogramming.org/Point_Value, Larry Kaufmann 2012, the king value of 20000 is from the
+# Simplified Evaluation Function
+# The exchange evaluation and the search margins use these values as they are, load_weights replaces them in place
+# with the mean of the tuned middle game and end game material.
+MATERIAL_VALUES = [100, 350, 350, 525, 1000, 20000]
+
+PAWN_TABLE = [
+    [0,  0,  0,  0,  0,  0,  0,  0],
+    [50, 50, 50, 50, 50, 50, 50, 50],
+    [10, 10, 20, 30, 30, 20, 10, 10],
+    [5,  5, 10, 25, 25, 10,  5,  5],
+    [0,  0,  0, 20, 20,  0,  0,  0],
+    [5, -5,-10,  0,  0,-10, -5,  5],
+    [5, 10, 10,-20,-20, 10, 10,  5],
+    [0,  0,  0,  0,  0,  0,  0,  0]]
+
+KNIGHT_TABLE = [
+    [-50,-40,-30,-30,-30,-30,-40,-50],
+    [-40,-20,  0,  0,  0,  0,-20,-40],
+    [-30,  0, 10, 15, 15, 10,  0,-30],
+    [-30,  5, 15, 20, 20, 15,  5,-30],
+    [-30,  0, 15, 20, 20, 15,  0,-30],
+    [-30,  5, 10, 15, 15, 10,  5,-30],
+    [-40,-20,  0,  5,  5,  0,-20,-40],
+    [-50,-40,-30,-30,-30,-30,-40,-50]]
+
+BISHOP_TABLE = [
+    [-20,-10,-10,-10,-10,-10,-10,-20],
+    [-10,  0,  0,  0,  0,  0,  0,-10],
+    [-10,  0,  5, 10, 10,  5,  0,-10],
+    [-10,  5,  5, 10, 10,  5,  5,-10],
+    [-10,  0, 10, 10, 10, 10,  0,-10],
+    [-10, 10, 10, 10, 10, 10, 10,-10],
+    [-10,  5,  0,  0,  0,  0,  5,-10],
+    [-20,-10,-10,-10,-10,-10,-10,-20]]
+
+ROOK_TABLE = [
+    [0,  0,  0,  0,  0,  0,  0,  0],
+    [5, 10, 10, 10, 10, 10, 10,  5],
+    [-5,  0,  0,  0,  0,  0,  0, -5],
+    [-5,  0,  0,  0,  0,  0,  0, -5],
+    [-5,  0,  0,  0,  0,  0,  0, -5],
+    [-5,  0,  0,  0,  0,  0,  0, -5],
+    [-5,  0,  0,  0,  0,  0,  0, -5],
+    [0,  0,  0,  5,  5,  0,  0,  0]]
+
+QUEEN_TABLE = [
+    [-20,-10,-10, -5, -5,-10,-10,-20],
+    [-10,  0,  0,  0,  0,  0,  0,-10],
+    [-10,  0,  5,  5,  5,  5,  0,-10],
+    [-5,  0,  5,  5,  5,  5,  0, -5],
+    [0,  0,  5,  5,  5,  5,  0, -5],
+    [-10,  5,  5,  5,  5,  5,  0,-10],
+    [-10,  0,  5,  0,  0,  0,  0,-10],
+    [-20,-10,-10, -5, -5,-10,-10,-20]]
+
+KING_MIDDLE_GAME_TABLE = [
+    [-30,-40,-40,-50,-50,-40,-40,-30],
+    [-30,-40,-40,-50,-50,-40,-40,-30],
+    [-30,-40,-40,-50,-50,-40,-40,-30],
+    [-30,-40,-40,-50,-50,-40,-40,-30],
+    [-20,-30,-30,-40,-40,-30,-30,-20],
+    [-10,-20,-20,-20,-20,-20,-20,-10],
+    [20, 20,  0,  0,  0,  0, 20, 20],
+    [20, 30, 10,  0,  0, 10, 30, 20]]
+
+KING_END_GAME_TABLE = [
+    [-50,-40,-30,-20,-20,-30,-40,-50],
+    [-30,-20,-10,  0,  0,-10,-20,-30],
+    [-30,-10, 20, 30, 30, 20,-10,-30],
+    [-30,-10, 30, 40, 40, 30,-10,-30],
+    [-30,-10, 30, 40, 40, 30,-10,-30],
+    [-30,-10, 20, 30, 30, 20,-10,-30],
+    [-30,-30,  0,  0,  0,  0,-30,-30],
+    [-50,-30,-30,-30,-30,-30,-30,-50]]
+
+# Piece-square tables by piece kind
+MIDDLE_GAME_TABLES = (PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_MIDDLE_GAME_TABLE)
+END_GAME_TABLES = (PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_END_GAME_TABLE)
+
+# Contribution of every piece kind to the game phase: minor pieces 1, rooks 2, queens 4
+PHASE_WEIGHTS = (0, 1, 1, 2, 4, 0)
+# Phase of the start position: four knights, four bishops, four rooks and two queens
+MAX_PHASE = 4 * PHASE_WEIGHTS[1] + 4 * PHASE_WEIGHTS[2] + 4 * PHASE_WEIGHTS[3] + 2 * PHASE_WEIGHTS[4]
+
+# The same per piece code
+PHASE_BY_CODE = PHASE_WEIGHTS + PHASE_WEIGHTS
+
+
+def flatten(values, tables):
+    """
+    Turns per-kind values plus 8x8 tables (as seen from WHITE) into per-square lists for all 12 piece codes.
+
+    :param values: A value per piece kind added on every square
+    :param tables: An 8x8 table per piece kind
+    :return: A list of 12 lists with 120 entries each, 0 on padding squares
+    """
+    flat = [[0] * 120 for _ in range(12)]
+    for kind, (value, table) in enumerate(zip(values, tables)):
+        for square in BOARD_SQUARES:
+            row, col = SQUARE_TO_CELL[square]
+            flat[kind][square] = value + table[7 - row][col]
+            flat[kind + 6][square] = value + table[row][col]
+    return flat
+
+
+def signed(flat):
+    """
+    Returns the per-square lists from WHITEs perspective: negated for the black piece codes, so a board can
+    simply add them up.
+    """
+    return [values if code < 6 else [-value for value in values] for code, values in enumerate(flat)]
+
+
+# Material plus piece-square value of every piece code on every square, independent of the color
+MIDDLE_GAME_VALUES = flatten(MATERIAL_VALUES, MIDDLE_GAME_TABLES)
+END_GAME_VALUES = flatten(MATERIAL_VALUES, END_GAME_TABLES)
+
+SIGNED_MIDDLE_GAME_VALUES = signed(MIDDLE_GAME_VALUES)
+SIGNED_END_GAME_VALUES = signed(END_GAME_VALUES)
+
+# The weights behind the values above, replaced by load_weights
+_weights = {
+    "middle_game_material": list(MATERIAL_VALUES),
+    "end_game_material": list(MATERIAL_VALUES),
+    "middle_game_tables": MIDDLE_GAME_TABLES,
+    "end_game_tables": END_GAME_TABLES,
+}
+
+
+def taper(middle_game, end_game, phase):
+    """
+    Blends a middle game and an end game score by the game phase.
+
+    :param phase: The game phase, more than :py:data:`MAX_PHASE` (hand-made configurations with extra pieces) counts as :py:data:`MAX_PHASE`
+    :return: The middle game score with all pieces on the board, the end game score with only kings and pawns left
+    """
+    if phase > MAX_PHASE:
+        phase = MAX_PHASE
+    return (middle_game * phase + end_game * (MAX_PHASE - phase)) / MAX_PHASE
+
+
+
+# Pawn structure terms as (middle game, end game) values: doubled and isolated pawns are weak, passed pawns
+# (no opposing pawn in front of them on their own or a neighbouring file) get stronger the further they are advanced,
+# most of all in the end game
+DOUBLED_PAWN_PENALTY = (10, 20)
+ISOLATED_PAWN_PENALTY = (10, 20)
+# Passed pawn bonus by row as seen from the pawns own side
+PASSED_PAWN_MIDDLE_GAME_BONUS = (0, 5, 10, 15, 25, 40, 60, 0)
+PASSED_PAWN_END_GAME_BONUS = (0, 10, 15, 25, 45, 75, 120, 0)
+
+
+def _pawn_terms(pawns, opposing_pawns, white):
+    """
+    Scores the pawns of one color, see :py:func:`evaluate_pawn_structure`.
+
+    :return: A tuple (middle_game, end_game) from the pawns own perspective
+    """
+    # Files are square % 10, which runs from 1 to 8 and leaves an empty file on both sides
+    files = [0] * 10
+    for square in pawns:
+        files[square % 10] += 1
+
+    # Most advanced opposing pawn per file, with rows counted from the own side
+    front = [-1] * 10
+    for square in opposing_pawns:
+        row = square // 10 - 2 if white else 9 - square // 10
+        if row > front[square % 10]:
+            front[square % 10] = row
+
+    middle_game = end_game = 0
+    for file in range(1, 9):
+        if files[file] > 1:
+            middle_game -= (files[file] - 1) * DOUBLED_PAWN_PENALTY[0]
+            end_game -= (files[file] - 1) * DOUBLED_PAWN_PENALTY[1]
+
+    for square in pawns:
+        file = square % 10
+        if files[file - 1] == 0 and files[file + 1] == 0:
+            middle_game -= ISOLATED_PAWN_PENALTY[0]
+            end_game -= ISOLATED_PAWN_PENALTY[1]
+        row = square // 10 - 2 if white else 9 - square // 10
+        if front[file - 1] <= row and front[file] <= row and front[file + 1] <= row:
+            middle_game += PASSED_PAWN_MIDDLE_GAME_BONUS[row]
+            end_game += PASSED_PAWN_END_GAME_BONUS[row]
+    return middle_game, end_game
+
+
+def evaluate_pawn_structure(white_pawns, black_pawns):
+    """
+    Scores the pawn structure: doubled and isolated pawns, and passed pawns by how far they are advanced.
+    The result only depends on the pawns, so it can be cached by the pawn Zobrist key, see :py:class:`PawnHashTable`.
+
+    :param white_pawns: The mailbox squares (see :py:mod:`squares`) of the white pawns, in any order
+    :param black_pawns: The mailbox squares of the black pawns
+    :return: A tuple (middle_game, end_game) from WHITEs perspective, to be blended with :py:func:`taper`
+    """
+    white_middle_game, white_end_game = _pawn_terms(white_pawns, black_pawns, True)
+    black_middle_game, black_end_game = _pawn_terms(black_pawns, white_pawns, False)
+    return white_middle_game - black_middle_game, white_end_game - black_end_game
+
+
+class PawnHashTable:
+    """
+    Fixed-size cache of pawn structure scores (see :py:func:`evaluate_pawn_structure`) by pawn Zobrist key.
+
+    Pawns move rarely compared to the other pieces, so a search meets the same few pawn structures over and over.
+    The table has a fixed number of slots, each key goes into slot ``key & mask`` and replaces whatever was stored
+    there before. The full key is kept in the slot to tell a hit from a different structure in the same slot.
+
+    ``hits`` and ``misses`` count the probes to size the table: a hit rate that grows noticeably with more slots
+    means the table is too small. The first probe of every structure misses whatever the size, and a search meets a
+    new structure with every pawn move it scores, so the hit rate of a single search stays well below the one of a
+    whole game.
+    """
+
+    def __init__(self, size_bits=14):
+        """
+        :param size_bits: The table has 2 ** size_bits slots
+        """
+        self.mask = (1 << size_bits) - 1
+        self.slots = [None] * (1 << size_bits)
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        """
+        Looks up the scores of a pawn structure and counts a hit or a miss.
+
+        :param key: The pawn Zobrist key of the structure
+        :return: A tuple (middle_game, end_game) or None if the structure is not stored
+        """
+        slot = self.slots[key & self.mask]
+        if slot is not None and slot[0] == key:
+            self.hits += 1
+            return slot[1]
+        self.misses += 1
+        return None
+
+    def store(self, key, scores):
+        """
+        Stores the scores (middle_game, end_game) of a pawn structure, replacing the structure in the same slot.
+        """
+        self.slots[key & self.mask] = (key, scores)
+
+    @property
+    def hit_rate(self):
+        """
+        The fraction of probes that were hits, 0 before the first probe.
+        """
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def used_slots(self):
+        """
+        Returns the number of slots holding a structure.
+        """
+        return sum(slot is not None for slot in self.slots)
+
+    def reset_counters(self):
+        """
+        Sets the hit and miss counters back to 0, keeping the stored structures.
+        """
+        self.hits = 0
+        self.misses = 0
+
+
+# Piece code used for empty cells in position arrays
+EMPTY = 12
+
+
+def _array_table(signed_values):
+    """
+    Turns signed per-square lists into a (13, 64) array indexed by piece code and bit index (see :py:mod:`bitmasks`),
+    with an all zero row for :py:data:`EMPTY` cells.
+    """
+    table = np.zeros((13, 64), dtype=np.int64)
+    for code in range(12):
+        table[code] = [signed_values[code][square] for square in INDEX_TO_SQUARE]
+    return table
+
+
+MIDDLE_GAME_ARRAY = _array_table(SIGNED_MIDDLE_GAME_VALUES)
+END_GAME_ARRAY = _array_table(SIGNED_END_GAME_VALUES)
+PHASE_ARRAY = np.array(PHASE_BY_CODE + (0,), dtype=np.int64)
+
+# evaluate_many sums the middle game value, the end game value and the phase of all pieces in one int64 per position.
+# Each of them gets a 21 bit field: phase in the lowest bits, end game value above, middle game value on top.
+# Sums of the signed values stay far below 2**20 in magnitude, so the fields can be separated again after adding up.
+_FIELD_BITS = 21
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+_FIELD_OFFSET = 1 << (_FIELD_BITS - 1)
+
+# Packed values indexed by bit index first, then piece code
+_PACKED_ARRAY = np.ascontiguousarray(
+    ((MIDDLE_GAME_ARRAY << (2 * _FIELD_BITS)) + (END_GAME_ARRAY << _FIELD_BITS) + PHASE_ARRAY[:, None]).T
+)
+
+
+# Activity terms as (middle game, end game) values per attacked square, see :py:meth:`Board.evaluate <board.Board.evaluate>`.
+# Mobility counts the squares attacked by knights, bishops, rooks and queens, king safety the attacks of opposing
+# pieces on the squares around the own king, which mainly matters while there are enough pieces left to attack it.
+MOBILITY_BONUS = (4, 4)
+KING_ZONE_ATTACK_PENALTY = (8, 2)
+
+# How far the pawn structure and the activity terms are assumed to move a score at most. Given a search window,
+# positions whose material and piece-square score is further than this outside of it skip these terms (lazy evaluation).
+# This is measured, not a hard limit: eight passed pawns alone are worth up to 960 in the end game. In 14209 positions
+# of random games (benchmark.print_lazy_evaluation_error) the terms moved the score by at most 201 with the pawn
+# structure only and 302 with mobility and king safety on, 0.01% of the positions went beyond 300 and none beyond
+# this margin. A lazy exit in a position beyond it returns a bound that is off by the difference.
+LAZY_EVALUATION_MARGIN = 350
+
+
+# Pawn structure of many positions works on one 64 bit mask of pawns per position (bit index as in :py:mod:`bitmasks`)
+_BYTES = np.uint64(8)
+_FILE_A = np.uint64(FILE_A)
+_NOT_FILE_A = np.uint64(FULL ^ FILE_A)
+_NOT_FILE_H = np.uint64(FULL ^ FILE_H)
+_LOWEST_BYTE = np.uint64(0xFF)
+_RANKS = [np.uint64(0xFF << (8 * row)) for row in range(8)]
+# Number of set bits of every byte value, for numpy versions without bitwise_count
+_POPCOUNT_8 = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.int64)
+
+
+def _popcount(masks):
+    """
+    Returns the number of set bits of every mask as int64 array.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks).astype(np.int64)
+    return _POPCOUNT_8[masks.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def evaluate_pawn_structure_many(positions):
+    """
+    Scores the pawn structure of a stack of positions like :py:func:`evaluate_pawn_structure`.
+
+    :param positions: An (N, 64) array of piece codes, see :py:func:`evaluate_many`
+    :return: A tuple (middle_game, end_game) of int64 arrays from WHITEs perspective
+    """
+    # Eight cells pack into a byte with the first one in the lowest bit, so byte r of a mask is row r
+    white = np.packbits(positions == 0, axis=1, bitorder="little").view("<u8").ravel()
+    black = np.packbits(positions == 6, axis=1, bitorder="little").view("<u8").ravel()
+
+    middle_game = np.zeros(len(positions), dtype=np.int64)
+    end_game = np.zeros(len(positions), dtype=np.int64)
+    # Swapping the bytes mirrors the rows, so black pawns are scored like white ones
+    for pawns, opposing_pawns, sign in ((white, black, 1), (black.byteswap(), white.byteswap(), -1)):
+        files = pawns | (pawns >> (4 * _BYTES))
+        files |= files >> (2 * _BYTES)
+        files |= files >> _BYTES
+        files &= _LOWEST_BYTE
+        doubled = _popcount(pawns) - _popcount(files)
+
+        neighbour_files = ((files << np.uint64(1)) | (files >> np.uint64(1))) & _LOWEST_BYTE
+        isolated = _popcount(pawns & ~(neighbour_files * _FILE_A))
+
+        # Cells on the same or a neighbouring file behind an opposing pawn
+        guarded = opposing_pawns | ((opposing_pawns << np.uint64(1)) & _NOT_FILE_A) | ((opposing_pawns >> np.uint64(1)) & _NOT_FILE_H)
+        guarded >>= _BYTES
+        guarded |= guarded >> _BYTES
+        guarded |= guarded >> (2 * _BYTES)
+        guarded |= guarded >> (4 * _BYTES)
+        passed = pawns & ~guarded
+
+        middle_game -= sign * (doubled * DOUBLED_PAWN_PENALTY[0] + isolated * ISOLATED_PAWN_PENALTY[0])
+        end_game -= sign * (doubled * DOUBLED_PAWN_PENALTY[1] + isolated * ISOLATED_PAWN_PENALTY[1])
+        # The bonus is 0 on the first and last row
+        for row in range(1, 7):
+            passed_on_row = _popcount(passed & _RANKS[row])
+            middle_game += sign * PASSED_PAWN_MIDDLE_GAME_BONUS[row] * passed_on_row
+            end_game += sign * PASSED_PAWN_END_GAME_BONUS[row] * passed_on_row
+    return middle_game, end_game
+
+
+def evaluate_many(positions):
+    """
+    Evaluates a stack of positions at once, giving the same results as :py:meth:`Board.evaluate <board.Board.evaluate>`.
+    There is no Python loop over the positions or the pieces: for each of the 64 cells the packed table values of
+    all positions are gathered and added up with numpy at once, the pawn structure is scored with bit masks.
+
+    :param positions: An (N, 64) int8 array of piece codes, indexed by bit index (see :py:mod:`bitmasks`)
+        with :py:data:`EMPTY` for empty cells
+    :return: A float64 array of N evaluations from WHITEs perspective
+    """
+    # One contiguous row of piece codes per cell keeps every gather inside a small table
+    cells = np.ascontiguousarray(np.asarray(positions).T)
+    packed = np.zeros(cells.shape[1], dtype=np.int64)
+    for index in range(64):
+        packed += _PACKED_ARRAY[index].take(cells[index])
+
+    # Unpack the fields again, the signed end game value is offset to be non-negative while masking
+    phase = packed & _FIELD_MASK
+    packed = (packed - phase) >> _FIELD_BITS
+    end_game = ((packed + _FIELD_OFFSET) & _FIELD_MASK) - _FIELD_OFFSET
+    middle_game = (packed - end_game) >> _FIELD_BITS
+
+    pawn_middle_game, pawn_end_game = evaluate_pawn_structure_many(np.asarray(positions))
+    middle_game += pawn_middle_game
+    end_game += pawn_end_game
+
+    phase = np.minimum(phase, MAX_PHASE)
+    return (middle_game * phase + end_game * (MAX_PHASE - phase)) / MAX_PHASE
+
+
+def evaluate_array(position):
+    """
+    Evaluates a single position given as (64,) or (8, 8) int8 array, see :py:func:`evaluate_many`.
+    """
+    return float(evaluate_many(np.asarray(position).reshape(1, 64))[0])
+
+
+def current_weights():
+    """
+    Returns the material values and piece-square tables in use, as written by :py:func:`save_weights`.
+
+    :return: A dict of int64 arrays: middle_game_material and end_game_material of shape (6,), middle_game_tables and
+        end_game_tables of shape (6, 8, 8) as seen from WHITEs side like the tables above
+    """
+    return {name: np.array(values, dtype=np.int64) for name, values in _weights.items()}
+
+
+def save_weights(path, middle_game_material, end_game_material, middle_game_tables, end_game_tables):
+    """
+    Writes material values and piece-square tables into a ``.npz`` file for :py:func:`load_weights`, rounded to
+    integers. See :py:func:`current_weights` for the shapes.
+    """
+    np.savez(
+        path,
+        middle_game_material=np.rint(middle_game_material).astype(np.int64),
+        end_game_material=np.rint(end_game_material).astype(np.int64),
+        middle_game_tables=np.rint(middle_game_tables).astype(np.int64),
+        end_game_tables=np.rint(end_game_tables).astype(np.int64),
+    )
+
+
+def load_weights(path):
+    """
+    Loads material values and piece-square tables written by :py:func:`save_weights` (e.g. by the tuner, see
+    :py:mod:`tuning`) and uses them for all following evaluations.
+
+    The per-square values and :py:data:`MATERIAL_VALUES` (the mean of the middle game and end game material) are
+    replaced in place, so all modules that imported them see the new ones. Boards keep the scores of the pieces
+    already placed though: load the weights before setting up a board, or load its configuration again afterwards.
+    """
+    with np.load(path) as arrays:
+        weights = {name: arrays[name].tolist() for name in _weights}
+    middle_game = flatten(weights["middle_game_material"], weights["middle_game_tables"])
+    end_game = flatten(weights["end_game_material"], weights["end_game_tables"])
+
+    _weights.update(weights)
+    MATERIAL_VALUES[:] = [
+        (middle + end) // 2 for middle, end in zip(weights["middle_game_material"], weights["end_game_material"])
+    ]
+    MIDDLE_GAME_VALUES[:] = middle_game
+    END_GAME_VALUES[:] = end_game
+    SIGNED_MIDDLE_GAME_VALUES[:] = signed(middle_game)
+    SIGNED_END_GAME_VALUES[:] = signed(end_game)
+    MIDDLE_GAME_ARRAY[:] = _array_table(SIGNED_MIDDLE_GAME_VALUES)
+    END_GAME_ARRAY[:] = _array_table(SIGNED_END_GAME_VALUES)
+    _PACKED_ARRAY[:] = ((MIDDLE_GAME_ARRAY << (2 * _FIELD_BITS)) + (END_GAME_ARRAY << _FIELD_BITS) + PHASE_ARRAY[:, None]).T
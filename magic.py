@@ -0,0 +1,254 @@
+"""
+Magic bitboard attack tables for the sliding pieces of the :py:class:`BitBoard <board.BitBoard>` backend.
+
+For every bit index (see :py:mod:`bitmasks`) a rook or bishop only cares about the occupied cells on its rays,
+without the last cell of each ray (a blocker there changes nothing). Multiplying these relevant occupied cells with
+a "magic" number and keeping the top bits of the product gives a collision free index into a table of precomputed
+attack masks. A sliding attack query then costs one mask, one multiply, one shift and one look-up.
+
+Finding the magic numbers and filling the tables takes several seconds, so nothing is loaded on import: the first
+attack query loads the tables, which are written to :py:data:`CACHE_FILE` in the cache directory of the user the first
+time and read from it on later starts. Loading is eager: the whole file (less than 1 MB) is read and turned into a
+list of Python ints, which takes a few milliseconds. Users of the mailbox backend never load them.
+The version number in the file name and in the header of the file makes sure tables of an older layout are never used.
+"""
+import os
+import numpy as np
+from bitmasks import (
+    FULL,
+    shift_north,
+    shift_south,
+    shift_east,
+    shift_west,
+    shift_north_east,
+    shift_north_west,
+    shift_south_east,
+    shift_south_west,
+    rook_attacks as rook_attacks_by_rays,
+    bishop_attacks as bishop_attacks_by_rays,
+)
+
+# Bump when the layout of the tables changes, older cache files are then ignored and regenerated
+VERSION = 1
+
+
+def _cache_directory():
+    """
+    Returns the directory for cached files of the current user: ``%LOCALAPPDATA%`` on Windows, ``$XDG_CACHE_HOME``
+    or ``~/.cache`` elsewhere, each with a subdirectory for the engine.
+    """
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "chess_engine")
+
+
+CACHE_FILE = os.path.join(_cache_directory(), f"magic_tables_v{VERSION}.npy")
+
+# Start of every cache file, followed by the version
+_FILE_MARKER = 0x4D41474943  # "MAGIC"
+
+_ROOK_RAYS = (shift_north, shift_south, shift_east, shift_west)
+_BISHOP_RAYS = (shift_north_east, shift_north_west, shift_south_east, shift_south_west)
+
+
+def _relevant_mask(index, rays):
+    """
+    Returns the cells on the rays from the given bit index whose occupancy changes the attacks, which are all ray
+    cells except the last one of each ray.
+    """
+    relevant = 0
+    for shift in rays:
+        mask = shift(1 << index)
+        while mask and shift(mask):
+            relevant |= mask
+            mask = shift(mask)
+    return relevant
+
+
+def _subsets(mask):
+    """
+    Returns all subsets of the given mask (including the empty one) as a list of masks.
+    """
+    subsets = []
+    subset = 0
+    while True:
+        subsets.append(subset)
+        subset = (subset - mask) & mask
+        if subset == 0:
+            return subsets
+
+
+# Number of set bits of every byte value
+_POPCOUNT_8 = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def _find_magic(relevant, attacks_by_rays, index, rng, batch=4096, sample=256):
+    """
+    Tries random sparse numbers until one maps all occupancies of the relevant mask onto distinct table slots
+    (or onto slots with the same attacks).
+
+    A whole batch of candidates is tried at once with numpy, whose unsigned 64 bit multiplication wraps around
+    just like the ``& FULL`` in the look-up. Most candidates already fail on the first few hundred occupancies,
+    only the survivors are tried with all of them.
+
+    :param rng: A numpy random generator
+    :return: A tuple (magic, attacks) with attacks being the filled table of this bit index
+    """
+    bits = bin(relevant).count("1")
+    shift = np.uint64(64 - bits)
+    occupancies = _subsets(relevant)
+    occupancy_array = np.array(occupancies, dtype=np.uint64)
+    attack_array = np.array([attacks_by_rays(index, occupied) for occupied in occupancies], dtype=np.uint64)
+
+    def collision_free(candidates):
+        # Every candidate writes the attacks into its own table row, a collision with different attacks
+        # shows up as a mismatch when reading the slots back
+        rows = np.arange(len(candidates))[:, None]
+        slots = (occupancy_array[None, :] * candidates[:, None]) >> shift
+        tables = np.zeros((len(candidates), 1 << bits), dtype=np.uint64)
+        tables[rows, slots] = attack_array
+        return candidates[(tables[rows, slots] == attack_array).all(axis=1)]
+
+    def sample_collision_free(candidates):
+        # Sorting the few sampled slots is cheaper than a full table per candidate:
+        # a collision is a pair of neighbouring equal slots with different attacks
+        slots = (occupancy_array[None, :sample] * candidates[:, None]) >> shift
+        order = np.argsort(slots, axis=1)
+        slots = np.take_along_axis(slots, order, axis=1)
+        attacks = attack_array[:sample][order]
+        collisions = (slots[:, 1:] == slots[:, :-1]) & (attacks[:, 1:] != attacks[:, :-1])
+        return candidates[~collisions.any(axis=1)]
+
+    while True:
+        # Sparse random numbers make better magics
+        candidates = rng.integers(0, FULL, size=(3, batch), dtype=np.uint64, endpoint=True)
+        candidates = candidates[0] & candidates[1] & candidates[2]
+
+        # Good magics move enough bits into the top byte, skip the others without testing
+        top_bytes = ((candidates * np.uint64(relevant)) >> np.uint64(56)).astype(np.uint8)
+        candidates = candidates[_POPCOUNT_8[top_bytes] >= 6]
+
+        survivors = sample_collision_free(candidates)
+        # Test the survivors in chunks, trying all of them with all occupancies at once would need a lot of memory
+        for start in range(0, len(survivors), 64):
+            magics = collision_free(survivors[start:start + 64])
+            if len(magics):
+                magic = int(magics[0])
+                table = np.zeros(1 << bits, dtype=np.uint64)
+                table[(occupancy_array * np.uint64(magic)) >> shift] = attack_array
+                return magic, table
+
+
+def generate_tables(seed=0x3A61C):
+    """
+    Finds magic numbers for all bit indices and fills the attack tables.
+
+    :return: A flat uint64 array: a header of marker and version, 64 rook magics, 64 bishop magics,
+        then the rook attack tables and the bishop attack tables of all bit indices one after the other
+    """
+    rng = np.random.default_rng(seed)
+    magics = []
+    tables = []
+    for rays, attacks_by_rays in ((_ROOK_RAYS, rook_attacks_by_rays), (_BISHOP_RAYS, bishop_attacks_by_rays)):
+        for index in range(64):
+            magic, table = _find_magic(_relevant_mask(index, rays), attacks_by_rays, index, rng)
+            magics.append(magic)
+            tables.append(table)
+
+    header = np.array([_FILE_MARKER, VERSION] + magics, dtype=np.uint64)
+    return np.concatenate([header] + tables)
+
+
+def load_tables(path=CACHE_FILE):
+    """
+    Reads the tables from the cache file, generating and writing the file first if it is missing or outdated.
+    If the file cannot be written (e.g. a read-only installation), the generated tables are used without it.
+
+    :param path: Location of the cache file
+    :return: The flat table array as described in :py:func:`generate_tables`
+    """
+    try:
+        tables = np.load(path)
+        if tables.dtype == np.uint64 and len(tables) > 2 and int(tables[0]) == _FILE_MARKER and int(tables[1]) == VERSION:
+            return tables
+    except (OSError, ValueError):
+        pass
+
+    tables = generate_tables()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first, so a concurrently starting process never reads a half written file
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.save(f, tables)
+        os.replace(temporary_path, path)
+    except OSError:
+        pass
+    return tables
+
+
+def _layout(tables, magics_start, attacks_start, rays):
+    """
+    Reads the magics of one kind of slider from the tables and derives the masks, shifts and table offsets
+    of all bit indices.
+
+    :return: A tuple (masks, magics, shifts, offsets, end) with end being the first index after the attack tables
+    """
+    masks = [_relevant_mask(index, rays) for index in range(64)]
+    magics = tables[magics_start:magics_start + 64]
+    shifts = [64 - bin(mask).count("1") for mask in masks]
+    offsets = []
+    offset = attacks_start
+    for mask in masks:
+        offsets.append(offset)
+        offset += 1 << bin(mask).count("1")
+    return masks, magics, shifts, offsets, offset
+
+
+# Filled by _load on the first attack query
+_TABLES = None
+_ROOK_MASKS = _ROOK_MAGICS = _ROOK_SHIFTS = _ROOK_OFFSETS = None
+_BISHOP_MASKS = _BISHOP_MAGICS = _BISHOP_SHIFTS = _BISHOP_OFFSETS = None
+
+
+def _load():
+    """
+    Loads the tables (see :py:func:`load_tables`) and derives the look-up layout of both kinds of sliders.
+    """
+    global _TABLES, _ROOK_MASKS, _ROOK_MAGICS, _ROOK_SHIFTS, _ROOK_OFFSETS
+    global _BISHOP_MASKS, _BISHOP_MAGICS, _BISHOP_SHIFTS, _BISHOP_OFFSETS
+    # Indexing a numpy array from Python creates a numpy scalar on every access, which costs more than the whole
+    # magic computation, so the tables are turned into a list of ints once
+    tables = load_tables().tolist()
+    _ROOK_MASKS, _ROOK_MAGICS, _ROOK_SHIFTS, _ROOK_OFFSETS, rook_end = _layout(tables, 2, 130, _ROOK_RAYS)
+    _BISHOP_MASKS, _BISHOP_MAGICS, _BISHOP_SHIFTS, _BISHOP_OFFSETS, _ = _layout(tables, 66, rook_end, _BISHOP_RAYS)
+    _TABLES = tables
+
+
+def rook_attacks(index, occupied):
+    """
+    Returns all cells a rook on the given bit index attacks, given the mask of all occupied cells.
+    """
+    if _TABLES is None:
+        _load()
+    slot = (((occupied & _ROOK_MASKS[index]) * _ROOK_MAGICS[index]) & FULL) >> _ROOK_SHIFTS[index]
+    return _TABLES[_ROOK_OFFSETS[index] + slot]
+
+
+def bishop_attacks(index, occupied):
+    """
+    Returns all cells a bishop on the given bit index attacks, given the mask of all occupied cells.
+    """
+    if _TABLES is None:
+        _load()
+    slot = (((occupied & _BISHOP_MASKS[index]) * _BISHOP_MAGICS[index]) & FULL) >> _BISHOP_SHIFTS[index]
+    return _TABLES[_BISHOP_OFFSETS[index] + slot]
+
+
+def queen_attacks(index, occupied):
+    """
+    Returns all cells a queen on the given bit index attacks, given the mask of all occupied cells.
+    """
+    return rook_attacks(index, occupied) | bishop_attacks(index, occupied)
@@ -1,5 +1,5 @@
 from ui import run_game
-from board import Board
+from board import create_board
 import sys
 import tests 
 import unittest
@@ -18,13 +18,14 @@ def run_tests():
 
 def main():  
     args = "ai"
+    backend = "mailbox"  # or "bitboard"
 
     if args == "manual":
-        board = Board()
+        board = create_board(backend)
         board.reset()
         run_game(board, True)
     elif args == "ai":
-        board = Board()
+        board = create_board(backend)
         board.reset()
         run_game(board, False)
     elif args == "test":
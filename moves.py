@@ -0,0 +1,80 @@
+"""
+Compact move encoding used inside the engine.
+
+A move is a 16 bit integer: bits 0-5 hold the bit index (see :py:mod:`bitmasks`) of the square the piece moves from,
+bits 6-11 the bit index of the target square and bits 12-15 flags. Move lists are ``array('H')`` buffers with the
+scores kept in a parallel ``array('d')``, so scoring a position allocates no objects per move. Only the API
+boundary (see :py:class:`engine.Move`) turns them back into pieces and cells.
+
+The piece itself is not part of the encoding, it is looked up on the from square of the board the move belongs to.
+"""
+from array import array
+from squares import SQUARE_TO_INDEX, INDEX_TO_SQUARE
+
+# Set if the target square holds an opposing piece. The remaining flag bits are reserved for special moves
+# (promotion, castling, en passant), which this engine does not play.
+CAPTURE = 1 << 12
+
+# Never a legal move, as from and target square are the same
+NO_MOVE = 0
+
+# Per-square parts of the encoding, indexed by mailbox square (see :py:mod:`squares`)
+FROM_BITS = [index if index >= 0 else 0 for index in SQUARE_TO_INDEX]
+TO_BITS = [index << 6 if index >= 0 else 0 for index in SQUARE_TO_INDEX]
+
+# Target part of the encoding, indexed by single bit masks (see :py:mod:`bitmasks`)
+TARGET_BITS = {1 << index: index << 6 for index in range(64)}
+
+
+def encode_move(from_square, to_square, flags=0):
+    """
+    Encodes a move between two mailbox squares.
+
+    :param from_square: The square the piece moves from
+    :param to_square: The square the piece moves to
+    :param flags: Any of the flag constants, e.g. :py:data:`CAPTURE`
+    :return: The 16 bit move
+    """
+    return FROM_BITS[from_square] | TO_BITS[to_square] | flags
+
+
+def move_from_square(move):
+    """
+    Returns the mailbox square the piece of the encoded move moves from.
+    """
+    return INDEX_TO_SQUARE[move & 63]
+
+
+def move_to_square(move):
+    """
+    Returns the mailbox square the piece of the encoded move moves to.
+    """
+    return INDEX_TO_SQUARE[(move >> 6) & 63]
+
+
+def new_move_list(moves=()):
+    """
+    Creates a move list, an ``array('H')`` of encoded moves.
+    """
+    return array("H", moves)
+
+
+def new_score_list(scores=()):
+    """
+    Creates a score list parallel to a move list, an ``array('d')``.
+    """
+    return array("d", scores)
+
+
+def sort_moves(moves, scores, descending, limit=None):
+    """
+    Sorts a move list by the parallel scores. Moves with equal scores keep their order.
+
+    :param moves: The encoded moves
+    :param scores: Their scores
+    :param descending: True to put the highest score first
+    :param limit: Only keep that many moves after sorting, all if None
+    :return: A tuple (moves, scores) of new, sorted lists
+    """
+    order = sorted(range(len(scores)), key=scores.__getitem__, reverse=descending)[:limit]
+    return array("H", [moves[index] for index in order]), array("d", [scores[index] for index in order])
@@ -0,0 +1,159 @@
+"""
+Efficiently updatable neural network (NNUE) evaluation with numpy, an alternative to the handcrafted evaluation of
+:py:meth:`Board.evaluate <board.Board.evaluate>`.
+
+The input layer has one feature per piece code (see :py:attr:`pieces.Piece.code`) and bit index (see
+:py:mod:`bitmasks`), which is switched on if such a piece stands there. Its output, the accumulator, is the bias plus
+the int16 weight rows of all pieces on the board. A move only switches a few features on or off, so the board adds
+and subtracts these rows on every move (see :py:meth:`Board.set_network <board.BoardBase.set_network>`) instead of
+recomputing the accumulator. Per evaluation only the small dense head runs: a clipped ReLU on the scaled accumulator,
+a float32 dense layer, another clipped ReLU and a float32 output layer giving the score from WHITEs perspective.
+
+Networks are stored in ``.npz`` files, see :py:meth:`Network.save` and :py:meth:`Network.load`. No trained network
+ships with the engine. :py:meth:`Network.from_tables` builds one reproducing the middle game piece-square evaluation,
+which is a starting point for training and shows that the incremental updates are exact.
+"""
+import numpy as np
+from squares import SQUARE_TO_INDEX, INDEX_TO_SQUARE
+from evaluation import MATERIAL_VALUES, SIGNED_MIDDLE_GAME_VALUES
+
+# One feature per piece code and bit index
+FEATURES = 12 * 64
+
+# Feature of a piece code on a mailbox square (see :py:mod:`squares`), -1 on padding squares
+FEATURE_INDEX = [[code * 64 + index if index >= 0 else -1 for index in SQUARE_TO_INDEX] for code in range(12)]
+
+
+class Network:
+    """
+    The weights of an NNUE network together with the accumulator operations the board calls.
+
+    :param feature_weights: An int16 array (:py:data:`FEATURES`, accumulator size), one row per feature
+    :param feature_bias: An int16 array (accumulator size,), the accumulator of an empty board
+    :param hidden_weights: A float32 array (hidden size, accumulator size)
+    :param hidden_bias: A float32 array (hidden size,)
+    :param output_weights: A float32 array (hidden size,)
+    :param output_bias: The float32 bias of the score
+    :param scale: Factor turning the int16 accumulator into floats before the first activation
+    :param clip: Upper bound of both clipped ReLU activations
+    """
+
+    def __init__(self, feature_weights, feature_bias, hidden_weights, hidden_bias, output_weights, output_bias, scale=1.0, clip=1.0):
+        self.feature_weights = np.ascontiguousarray(feature_weights, dtype=np.int16)
+        self.feature_bias = np.ascontiguousarray(feature_bias, dtype=np.int16)
+        self.hidden_weights = np.ascontiguousarray(hidden_weights, dtype=np.float32)
+        self.hidden_bias = np.ascontiguousarray(hidden_bias, dtype=np.float32)
+        self.output_weights = np.ascontiguousarray(output_weights, dtype=np.float32)
+        self.output_bias = np.float32(output_bias)
+        self.scale = np.float32(scale)
+        self.clip = np.float32(clip)
+
+        accumulator_size = len(self.feature_bias)
+        hidden_size = len(self.hidden_bias)
+        if self.feature_weights.shape != (FEATURES, accumulator_size):
+            raise ValueError(f"Feature weights must have shape {(FEATURES, accumulator_size)}, not {self.feature_weights.shape}")
+        if self.hidden_weights.shape != (hidden_size, accumulator_size):
+            raise ValueError(f"Hidden weights must have shape {(hidden_size, accumulator_size)}, not {self.hidden_weights.shape}")
+        if self.output_weights.shape != (hidden_size,):
+            raise ValueError(f"Output weights must have shape {(hidden_size,)}, not {self.output_weights.shape}")
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a network written by :py:meth:`save`.
+        """
+        with np.load(path) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
+
+    def save(self, path):
+        """
+        Writes all weights into a ``.npz`` file.
+        """
+        np.savez(
+            path,
+            feature_weights=self.feature_weights,
+            feature_bias=self.feature_bias,
+            hidden_weights=self.hidden_weights,
+            hidden_bias=self.hidden_bias,
+            output_weights=self.output_weights,
+            output_bias=self.output_bias,
+            scale=self.scale,
+            clip=self.clip,
+        )
+
+    @classmethod
+    def random(cls, accumulator_size=256, hidden_size=32, seed=0):
+        """
+        Creates a network with small random weights, e.g. to start training or to measure the speed.
+        """
+        rng = np.random.default_rng(seed)
+        return cls(
+            rng.integers(-64, 64, size=(FEATURES, accumulator_size)),
+            rng.integers(0, 256, size=accumulator_size),
+            rng.normal(0, 1 / np.sqrt(accumulator_size), size=(hidden_size, accumulator_size)),
+            np.zeros(hidden_size),
+            rng.normal(0, 100 / np.sqrt(hidden_size), size=hidden_size),
+            0.0,
+            scale=1 / 64,
+            clip=1.0,
+        )
+
+    @classmethod
+    def from_tables(cls):
+        """
+        Creates a network computing the middle game material and piece-square score of :py:mod:`evaluation`
+        without the pawn structure. The kings are left out of the material, as two kings cancel each other
+        and 20000 does not fit into int16.
+
+        Two accumulator entries hold the score and its negation, each passes the clipped ReLU only when it is positive.
+        """
+        feature_weights = np.zeros((FEATURES, 2), dtype=np.int16)
+        for code in range(12):
+            king = MATERIAL_VALUES[5] if code % 6 == 5 else 0
+            for index, square in enumerate(INDEX_TO_SQUARE):
+                value = SIGNED_MIDDLE_GAME_VALUES[code][square]
+                value -= king if code < 6 else -king
+                feature_weights[code * 64 + index] = (value, -value)
+        return cls(feature_weights, np.zeros(2), np.eye(2), np.zeros(2), np.array([1.0, -1.0]), 0.0, clip=np.iinfo(np.int16).max)
+
+    def new_accumulator(self):
+        """
+        Returns the accumulator of an empty board.
+        """
+        return self.feature_bias.copy()
+
+    def add_feature(self, accumulator, code, square):
+        """
+        Switches on the feature of a piece placed on a mailbox square.
+        """
+        accumulator += self.feature_weights[FEATURE_INDEX[code][square]]
+
+    def remove_feature(self, accumulator, code, square):
+        """
+        Switches off the feature of a piece leaving a mailbox square.
+        """
+        accumulator -= self.feature_weights[FEATURE_INDEX[code][square]]
+
+    def move_feature(self, accumulator, code, from_square, to_square):
+        """
+        Moves the feature of a piece from one mailbox square to another.
+        """
+        features = FEATURE_INDEX[code]
+        accumulator += self.feature_weights[features[to_square]]
+        accumulator -= self.feature_weights[features[from_square]]
+
+    def evaluate(self, accumulator):
+        """
+        Runs the dense head on an accumulator.
+
+        :return: The score from WHITEs perspective as float
+        """
+        # This runs on every evaluation, so the clipped ReLUs work in place: np.clip costs more than the whole layer
+        hidden = accumulator * self.scale
+        np.maximum(hidden, 0, out=hidden)
+        np.minimum(hidden, self.clip, out=hidden)
+        hidden = self.hidden_weights.dot(hidden)
+        hidden += self.hidden_bias
+        np.maximum(hidden, 0, out=hidden)
+        np.minimum(hidden, self.clip, out=hidden)
+        return float(self.output_weights.dot(hidden) + self.output_bias)
@@ -0,0 +1,121 @@
+"""
+Move ordering for the alpha-beta search (see :py:func:`engine.negamax`) from what is known without making the moves.
+negamax only uses it when asked to (see :py:class:`engine.MinMaxArg`), as the ten moves it searches already come
+sorted by their evaluation. The quiescence search (see :py:func:`engine.quiescence`) orders its captures with it.
+
+Alpha-beta prunes the most when the best move of a position is searched first. The order is:
+
+1. the hash move, the best move of an earlier search of the position (see :py:mod:`transposition`)
+2. captures, the most valuable victim first and among equal victims the least valuable attacker (MVV-LVA)
+3. the two killer moves of the ply, quiet moves that refuted another position at the same distance from the root
+4. the other quiet moves by their history score, raised every time the move refuted a position
+
+Moves with the same ordering score keep their order.
+"""
+from squares import INDEX_TO_SQUARE
+from moves import CAPTURE, NO_MOVE
+
+# Ordering scores of the groups, history scores stay below KILLER_SCORE (see MoveOrdering.update)
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 29
+KILLER_SCORE = 1 << 28
+
+# MVV-LVA score of a capture by victim and attacker kind (see :py:attr:`pieces.Piece.KIND`)
+MVV_LVA = [[victim * 8 + 7 - attacker for attacker in range(6)] for victim in range(6)]
+
+# Plies with killer moves, deeper plies share the last ones
+MAX_PLY = 64
+
+
+class MoveOrdering:
+    """
+    Orders moves and learns from the beta cutoffs of a search which quiet moves refute positions.
+
+    ``cutoffs`` counts the beta cutoffs reported by :py:meth:`update`, ``first_move_cutoffs`` the ones caused by the
+    first searched move. Their ratio (:py:attr:`first_move_cutoff_rate`) shows the ordering quality, with perfect
+    ordering every cutoff comes from the first move.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets all killer moves and history scores and sets the counters back to 0.
+        """
+        self.killers = [[NO_MOVE, NO_MOVE] for _ in range(MAX_PLY)]
+        # Indexed by color (0 for black, 1 for white) and the from and to bits of the move
+        self.history = [[0] * 4096, [0] * 4096]
+        self.reset_counters()
+
+    def reset_counters(self):
+        """
+        Sets the cutoff counters back to 0, keeping what was learned.
+        """
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    @property
+    def first_move_cutoff_rate(self):
+        """
+        The fraction of beta cutoffs caused by the first searched move, 0 before the first cutoff.
+        """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def order(self, board, moves, white, ply, hash_move=NO_MOVE):
+        """
+        Sorts moves by their ordering score, see :py:mod:`ordering`.
+
+        :param board: The board the moves belong to
+        :param moves: 16 bit moves (see :py:mod:`moves`) of the current configuration
+        :param white: The color to move
+        :param ply: The distance from the root of the search
+        :param hash_move: The best move of an earlier search of the position, :py:data:`moves.NO_MOVE` if unknown
+        :return: The moves as a new list, best first
+        """
+        squares = board.squares
+        first_killer, second_killer = self.killers[ply if ply < MAX_PLY else MAX_PLY - 1]
+        history = self.history[white]
+
+        def score(move):
+            if move == hash_move:
+                return HASH_MOVE_SCORE
+            if move & CAPTURE:
+                victim = squares[INDEX_TO_SQUARE[(move >> 6) & 63]].KIND
+                attacker = squares[INDEX_TO_SQUARE[move & 63]].KIND
+                return CAPTURE_SCORE + MVV_LVA[victim][attacker]
+            if move == first_killer:
+                return KILLER_SCORE + 1
+            if move == second_killer:
+                return KILLER_SCORE
+            return history[move & 4095]
+
+        return sorted(moves, key=score, reverse=True)
+
+    def update(self, move, white, ply, depth, index):
+        """
+        Learns from a beta cutoff. A quiet move becomes the first killer move of the ply and its history score grows
+        with the square of the remaining depth, as refutations close to the root save the most.
+
+        :param move: The 16 bit move causing the cutoff
+        :param white: The color of the move
+        :param ply: The distance from the root of the search
+        :param depth: The remaining depth of the search
+        :param index: The position of the move in the searched order, 0 for the first one
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if move & CAPTURE:
+            return
+
+        killers = self.killers[ply if ply < MAX_PLY else MAX_PLY - 1]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+        history = self.history[white]
+        history[move & 4095] += depth * depth
+        # Halving all scores keeps them below the killers and lets older refutations fade
+        if history[move & 4095] >= KILLER_SCORE:
+            self.history[white] = [score // 2 for score in history]
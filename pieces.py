@@ -1,4 +1,31 @@
-import numpy as np
+from squares import (
+    OFFBOARD,
+    NORTH,
+    SOUTH,
+    EAST,
+    WEST,
+    ROOK_DIRECTIONS,
+    BISHOP_DIRECTIONS,
+    QUEEN_DIRECTIONS,
+    KING_OFFSETS,
+    KNIGHT_OFFSETS,
+    SQUARE_TO_CELL,
+    SQUARE_TO_INDEX,
+    KNIGHT_TARGETS,
+    KING_TARGETS,
+    PAWN_TARGETS,
+)
+from bitmasks import (
+    FULL,
+    RANK_3,
+    RANK_6,
+    KNIGHT_ATTACKS,
+    KING_ATTACKS,
+    PAWN_ATTACKS,
+    mask_to_squares,
+)
+from magic import rook_attacks, bishop_attacks, queen_attacks
+from evaluation import MIDDLE_GAME_VALUES, END_GAME_VALUES, taper
 
 class Piece:
     """
@@ -6,7 +33,19 @@ class Piece:
     
     A piece holds a reference to the board, its color and its currently located cell.
     In this class, you need to implement two methods, the "evaluate()" method and the "get_valid_cells()" method.
+
+    Every subclass defines a ``KIND`` index (0 = pawn ... 5 = king). Together with the color it forms the pieces ``code``
+    (0..5 for white, 6..11 for black), which is used to index per-piece tables such as the Zobrist keys of the board.
+
+    The location is stored as ``square``, an index into the 10x12 mailbox of the board (see :py:mod:`squares`).
     """
+    __slots__ = ("board", "white", "code", "square", "slot")
+
+    KIND = None
+
+    # Whether the attacks of this piece depend on other pieces blocking its rays (rooks, bishops and queens)
+    SLIDING = False
+
     def __init__(self, board, white):
         """
         Constructor for a piece based on provided parameters
@@ -16,9 +55,19 @@ class Piece:
         """
         self.board = board
         self.white = white
-        self.cell = None
-
+        self.square = None
+        # Position in the piece index of the board, see board.BoardBase.add_to_piece_index
+        self.slot = None
+        self.code = self.KIND if white else self.KIND + 6
 
+    @property
+    def cell(self):
+        """
+        The (row, col) cell this piece is placed on or None if it has never been placed on the board
+        """
+        if self.square is None:
+            return None
+        return SQUARE_TO_CELL[self.square]
 
     def is_white(self):
         """
@@ -90,189 +139,138 @@ class Piece:
         #I think Multiple if statements would be the best, because i have to implement a lot of different rules for every single one of them
         
 
-        # TODO 
-        # Adjust the positional values accordingly to white and black
-        pawn_pos = [
-        [0,  0,  0,  0,  0,  0,  0,  0],
-        [50, 50, 50, 50, 50, 50, 50, 50],
-        [10, 10, 20, 30, 30, 20, 10, 10],
-        [5,  5, 10, 25, 25, 10,  5,  5],
-        [0,  0,  0, 20, 20,  0,  0,  0],
-        [5, -5,-10,  0,  0,-10, -5,  5],
-        [5, 10, 10,-20,-20, 10, 10,  5],
-        [0,  0,  0,  0,  0,  0,  0,  0]]
-
-        rook_pos = [
-        [0,  0,  0,  0,  0,  0,  0,  0],
-        [5, 10, 10, 10, 10, 10, 10,  5],
-        [-5,  0,  0,  0,  0,  0,  0, -5],
-        [-5,  0,  0,  0,  0,  0,  0, -5],
-        [-5,  0,  0,  0,  0,  0,  0, -5],
-        [-5,  0,  0,  0,  0,  0,  0, -5],
-        [-5,  0,  0,  0,  0,  0,  0, -5],
-        [0,  0,  0,  5,  5,  0,  0,  0]]
-
-        knight_pos = [
-        [-50,-40,-30,-30,-30,-30,-40,-50],
-        [-40,-20,  0,  0,  0,  0,-20,-40],
-        [-30,  0, 10, 15, 15, 10,  0,-30],
-        [-30,  5, 15, 20, 20, 15,  5,-30],
-        [-30,  0, 15, 20, 20, 15,  0,-30],
-        [-30,  5, 10, 15, 15, 10,  5,-30],
-        [-40,-20,  0,  5,  5,  0,-20,-40],
-        [-50,-40,-30,-30,-30,-30,-40,-50]]
-
-        bishop_pos = [
-        [-20,-10,-10,-10,-10,-10,-10,-20],
-        [-10,  0,  0,  0,  0,  0,  0,-10],
-        [-10,  0,  5, 10, 10,  5,  0,-10],
-        [-10,  5,  5, 10, 10,  5,  5,-10],
-        [-10,  0, 10, 10, 10, 10,  0,-10],
-        [-10, 10, 10, 10, 10, 10, 10,-10],
-        [-10,  5,  0,  0,  0,  0,  5,-10],
-        [-20,-10,-10,-10,-10,-10,-10,-20]]
-
-        queen_pos = [
-        [-20,-10,-10, -5, -5,-10,-10,-20],
-        [-10,  0,  0,  0,  0,  0,  0,-10],
-        [-10,  0,  5,  5,  5,  5,  0,-10],
-        [-5,  0,  5,  5,  5,  5,  0, -5],
-        [0,  0,  5,  5,  5,  5,  0, -5],
-        [-10,  5,  5,  5,  5,  5,  0,-10],
-        [-10,  0,  5,  0,  0,  0,  0,-10],
-        [-20,-10,-10, -5, -5,-10,-10,-20]]
-
-        king_pos_middle_game = [
-        [-30,-40,-40,-50,-50,-40,-40,-30],
-        [-30,-40,-40,-50,-50,-40,-40,-30],
-        [-30,-40,-40,-50,-50,-40,-40,-30],
-        [-30,-40,-40,-50,-50,-40,-40,-30],
-        [-20,-30,-30,-40,-40,-30,-30,-20],
-        [-10,-20,-20,-20,-20,-20,-20,-10],
-        [20, 20,  0,  0,  0,  0, 20, 20],
-        [20, 30, 10,  0,  0, 10, 30, 20]]
-
-        king_pos_end_game = [
-        [-50,-40,-30,-20,-20,-30,-40,-50],
-        [-30,-20,-10,  0,  0,-10,-20,-30],
-        [-30,-10, 20, 30, 30, 20,-10,-30],
-        [-30,-10, 30, 40, 40, 30,-10,-30],
-        [-30,-10, 30, 40, 40, 30,-10,-30],
-        [-30,-10, 20, 30, 30, 20,-10,-30],
-        [-30,-30,  0,  0,  0,  0,-30,-30],
-        [-50,-30,-30,-30,-30,-30,-30,-50]]
+        # The material values and the piece-square tables (already mirrored for black) live in the evaluation module
+        # as flat per-square lists, so this is a look-up instead of building all tables on every call.
+        # The middle game and end game values are blended by the game phase the board keeps track of
+        return taper(MIDDLE_GAME_VALUES[self.code][self.square], END_GAME_VALUES[self.code][self.square], self.board.phase)
 
+    def get_valid_cells(self):
+        """
+        **TODO** Return a list of **valid** cells this piece can move into. 
         
+        A cell is valid if 
+          a) it is **reachable**. That is what the :py:meth:`get_reachable_cells` method is for and
+          b) after a move into this cell the own king is not (or no longer) in check.
 
-        if isinstance(self, Pawn):
-            self_value = 100
-            row , col = self.cell
-            cell_value = pawn_pos[row][col]
+        **HINT**: Trying every reachable cell and testing for checks afterwards is expensive. The board knows which
+        pieces give check and which pieces are pinned to their king (see :py:meth:`find_checks_and_pins <board.Board.find_checks_and_pins>`),
+        so :py:meth:`get_legal_squares <board.Board.get_legal_squares>` can filter the reachable cells directly.
+        
+        :return: A list of valid (row, col) cells
+        """
+        return [SQUARE_TO_CELL[square] for square in self.get_valid_squares()]
 
-        elif isinstance(self, Rook):
-            self_value = 525
-            row , col = self.cell
-            cell_value = rook_pos[row][col]
+    def get_valid_squares(self):
+        """
+        Square version of :py:meth:`get_valid_cells`, returns the valid target squares of the mailbox (see :py:mod:`squares`).
+        """
+        return self.board.get_legal_squares(self)
 
-        elif isinstance(self, Knight):
-            self_value = 350
-            row , col = self.cell
-            cell_value = knight_pos[row][col]
-    
-        elif isinstance(self, Bishop):
-            self_value = 350
-            row , col = self.cell
-            cell_value = bishop_pos[row][col]
+    def get_reachable_cells(self):
+        """
+        Returns a list of (row, col) cells this piece could move into, ignoring checks.
+        The actual move generation happens in the ``get_reachable_squares`` method of the subclasses.
 
-        elif isinstance(self, Queen):
-            self_value = 1000
-            row , col = self.cell
-            cell_value = queen_pos[row][col]
+        :return: A list of reachable cells
+        """
+        return [SQUARE_TO_CELL[square] for square in self.get_reachable_squares()]
 
-        elif isinstance(self, King):
-            self_value = 20000#got the value of 20000 from:
-            row , col = self.cell
-            cell_value = king_pos_middle_game[row][col]
+    def get_sliding_squares(self, directions):
+        """
+        Walks the given directions from the current square until blocked, as needed by rooks, bishops and queens.
+        An empty square costs one look-up and one comparison, the first occupied square ends the ray.
+        It is reachable if the piece there is an opposing one.
 
-        return self_value 
+        :param directions: Square offsets to walk along, see :py:mod:`squares`
+        :return: A list of reachable squares
+        """
+        reachable_squares = []
+        squares = self.board.squares
 
-            
+        for direction in directions:
+            target_square = self.square + direction
+            target = squares[target_square]
 
+            # Move forward while the squares are empty
+            while target is None:
+                reachable_squares.append(target_square)
+                target_square += direction
+                target = squares[target_square]
 
-    def get_valid_cells(self):
-        """
-        **TODO** Return a list of **valid** cells this piece can move into. 
-        
-        A cell is valid if 
-          a) it is **reachable**. That is what the :py:meth:`get_reachable_cells` method is for and
-          b) after a move into this cell the own king is not (or no longer) in check.
+            # The ray ends at the border or at a piece, which can be hit if it is an opponent
+            if target is not OFFBOARD and target.white != self.white:
+                reachable_squares.append(target_square)
 
-        **HINT**: Use the :py:meth:`get_reachable_cells` method of this piece to receive a list of reachable cells.
-        Iterate through all of them and temporarily place the piece on this cell. Then check whether your own King (same color)
-        is in check. Use the :py:meth:`is_king_check_cached` method to test for checks. If there is no check after this move, add
-        this cell to the list of valid cells. After every move, restore the original board configuration. 
-        
-        To temporarily move a piece into a new cell, first store its old position (self.cell) in a local variable. 
-        The target cell might have another piece already placed on it. 
-        Use :py:meth:`get_cell <board.BoardBase.get_cell>` to retrieve that piece (or None if there was none) and store it as well. 
-        Then call :py:meth:`set_cell <board.BoardBase.set_cell>` to place this piece on the target cell and test for any checks given. 
-        After this, restore the original configuration by placing this piece back into its old position (call :py:meth:`set_cell <board.BoardBase.set_cell>` again)
-        and place the previous piece also back into its cell. 
-        
-        :return: Return True 
-        """
-        # TODO: Implement
+        return reachable_squares
 
-        #GOAL:
-        #IF i understood correctly
-        # 1. We have to take all the possible positions a pice can do within the next move
-        # 2. place that piece on every one of those positions 
-        # 2.1. (we might could optimize and cut off branches with the same direction E.g. the rook isn't allowed to move to the right at all)
-        # 3. See if the King is checked if Piece is on that position
-        # 4. based on 3. either add it to the list or don't
-        # 5. restore board to it's original state
-        #PLAN
-        # 1. Create an empty list which we will return in the end
-        # 2. get all reachable cells
-        # 3. safe the initial position of the piece
-        # 4. before you loop over all possible positions, safe the piece which stands on the goal_cell and it's position (indirectly the goal cell)
-        # 5. loop, add or not, reset again then return
+    def get_ray_squares(self, directions):
+        """
+        Walks the given directions from the current square like :py:meth:`get_sliding_squares`, but also includes
+        the first blocking piece regardless of its color. These are the squares a slider attacks (or defends).
 
+        :param directions: Square offsets to walk along, see :py:mod:`squares`
+        :return: A list of attacked squares
+        """
+        attacked_squares = []
+        squares = self.board.squares
 
-        valid_cells = []
+        for direction in directions:
+            target_square = self.square + direction
+            target = squares[target_square]
+            while target is None:
+                attacked_squares.append(target_square)
+                target_square += direction
+                target = squares[target_square]
 
-        #We get all reachable cells as a list
-        reachable_cells = self.get_reachable_cells()
+            if target is not OFFBOARD:
+                attacked_squares.append(target_square)
 
-        #We safe the initial position of the piece we wanna move
-        initial_position = self.cell
+        return attacked_squares
 
-        #possible_position will be a tuple, we iterate over a list with tuples
-        for possible_position in reachable_cells:
+    def get_stepping_squares(self, offsets):
+        """
+        Checks the squares at the given offsets from the current square, as needed by knights and kings.
+        A square is reachable if it is empty or an opposing piece is placed on it.
 
-            #safe the piece that is on the cell we wanna go to
-            local_piece = self.board.get_cell(possible_position)
-            #set OUR piece on that cell
-            self.board.set_cell(possible_position, self)
+        :param offsets: Square offsets to check, see :py:mod:`squares`
+        :return: A list of reachable squares
+        """
+        reachable_squares = []
+        squares = self.board.squares
 
-            #check if king is in check, but we inverese it
-            #so only if king is NOT in check we append that position to the list
-            if not self.board.is_king_check_cached(self.white):
-                valid_cells.append(possible_position)
+        for offset in offsets:
+            target_square = self.square + offset
+            target = squares[target_square]
+            if target is None or (target is not OFFBOARD and target.white != self.white):
+                reachable_squares.append(target_square)
 
-            #After the if, which will ALWAYS happen, we FIRST set out piece back to it's original place
-            self.board.set_cell(initial_position, self)
-            #THEN SECOND we place the old piece on the position we checked
-            self.board.set_cell(possible_position, local_piece)
+        return reachable_squares
 
-        return valid_cells
-                   
 
 class Pawn(Piece):  # Bauer
+    __slots__ = ()
+    KIND = 0
+
     def __init__(self, board, white):
         super().__init__(board, white)
 
-    def get_reachable_cells(self):
+    def get_reachable_mask(self):
+        """
+        Bit mask version of :py:meth:`get_reachable_squares` for boards with bit boards (see :py:class:`board.BitBoard`).
+        """
+        index = SQUARE_TO_INDEX[self.square]
+        empty = ~self.board.occupied & FULL
+
+        if self.white:
+            one_step = ((1 << index) << 8) & empty
+            two_steps = ((one_step & RANK_3) << 8) & empty
+        else:
+            one_step = ((1 << index) >> 8) & empty
+            two_steps = ((one_step & RANK_6) >> 8) & empty
+
+        return one_step | two_steps | (PAWN_ATTACKS[self.white][index] & self.board.occupancy[not self.white])
+
+    def get_reachable_squares(self):
         """
         **TODO** Implement the movability mechanik for `pawns <https://de.wikipedia.org/wiki/Bauer_(Schach)>`_. 
 
@@ -284,108 +282,67 @@ class Pawn(Piece):  # Bauer
         If the pawn is still on its starting row, it can also dash forward and move two pieces at once (as long as the path to that cell is not blocked).
         Pawns can only hit diagonally, meaning they can hit other pieces only the are one cell forward left or one cell forward right from them. 
 
-        You can call :py:meth:`cell_is_valid_and_empty <board.Board.cell_is_valid_and_empty>`, 
-        :py:meth:`can_hit_on_cell <pieces.Piece.can_hit_on_cell>` and :py:meth:`can_enter_cell <pieces.Piece.can_enter_cell>` 
-        to check for necessary conditions to implement the pawn movability mechanics. 
+        Look up target squares in the mailbox ``self.board.squares`` directly: a square holds None if it is empty,
+        :py:data:`squares.OFFBOARD` if it is outside of the board or the piece placed on it.
 
         **NOTE**: For all you deep chess experts: Hitting `en passant <https://de.wikipedia.org/wiki/En_passant>`_ does not need to be implemented.
         
-        :return: A list of reachable cells this pawn could move into.
+        :return: A list of reachable squares (see :py:mod:`squares`) this pawn could move into.
         """
-        # TODO: Implement a method that returns all cells this piece can enter in its next move
-
-        #The indices of the Board are [0-7] [0-7] if it's White the pawn's Home row will be [1] and for black [6]
-        #so the only direction which is allowed is into the respective other direction of it's own color (black is -1 , white is +1) of the first index (in that case row)
-
-        reachable_cells = []
+        # Boards with bit boards generate the moves with shift-and-mask operations instead
+        if self.board.BITBOARDS:
+            return mask_to_squares(self.get_reachable_mask())
 
-        #By implementing a set direction we don't need to repeat ourselves for black and white, would generally recommend to differentiate at start
-        #https://stackoverflow.com/questions/14461905/python-if-else-short-hand
-        #this was combined with tuple unpacking 
-        #https://www.w3schools.com/python/python_tuples_unpack.asp
-        #"direction" and "home_row" are (1, 1) if it's white, else (the only other case is black) it's (-1, 6) 
+        #The indices of the Board are rows [0-7] embedded into the mailbox, if it's White the pawn's Home row will be [1] and for black [6]
+        #so the only direction which is allowed is into the respective other direction of it's own color (one row up for white, one row down for black)
 
-        direction, home_row = (1, 1) if self.white else (-1, 6)
+        reachable_squares = []
+        squares = self.board.squares
 
-        (row, col) = self.cell
+        #"direction" and "home_row" are (NORTH, 1) if it's white, else (the only other case is black) it's (SOUTH, 6) 
+        direction, home_row = (NORTH, 1) if self.white else (SOUTH, 6)
 
-        one_step = (row + direction, col)
-        #row + direction because 5 + 1 = 6 and 5 + (-1) is 4 so it's fine
-        if self.board.cell_is_valid_and_empty(one_step):
-            reachable_cells.append(one_step)
+        one_step = self.square + direction
+        if squares[one_step] is None:
+            reachable_squares.append(one_step)
 
             #Now we Check if Dash(2 cells at once) is even possible
             #The cell right infront is free because we checked it earlier, now we check if the second cell is also free and if the pawn is in his homerow 
-            two_steps = (row + direction * 2, col)
-            if row == home_row and self.board.cell_is_valid_and_empty(two_steps):
-                reachable_cells.append(two_steps)
-
-        for value in [1, -1]:
-            attack = (row + direction, col + value)
-            #You need self as the first argument because that's the piece you want to move
-            if self.board.piece_can_hit_on_cell(self, attack):
-                reachable_cells.append(attack)
-
-        return reachable_cells
-
-
-# We can also do it like that but we would unnecessarily repeat our selves (and for other pieces with more possibilities we can't copy paste the code 10 or more times)
-            #  #Now we SEPERATELY check if pawn can attack his diagonal fields
-            # #The multiple if's are on purpose!!!
-            # if self.board.piece_can_hit_on_cell(self, (row + direction, col -1)):
-            #     reachable_cells.append((row + direction, col -1))
-            # if self.board.piece_can_hit_on_cell(self, (row + direction, col +1)):
-            #     reachable_cells.append((row + direction, col +1))
-        
+            two_steps = one_step + direction
+            if SQUARE_TO_CELL[self.square][0] == home_row and squares[two_steps] is None:
+                reachable_squares.append(two_steps)
 
-        # A bit easier to understand implementation of the same code
-        # reachable_cells = []
+        #Pawns hit diagonally, so only opposing pieces one step forward left or right can be hit
+        for value in (EAST, WEST):
+            attack = one_step + value
+            target = squares[attack]
+            if target is not None and target is not OFFBOARD and target.white != self.white:
+                reachable_squares.append(attack)
 
-        # #To know where the pawn will be able to move we first need it's current position
-        # (row, col) = self.cell
-        
+        return reachable_squares
+
+    def get_attacked_squares(self):
+        """
+        Returns the squares this pawn attacks, which are the two diagonal squares in front of it whether occupied or not.
+        """
+        return PAWN_TARGETS[self.white][self.square]
 
-        # #1. Check Color, because self.white is a Boolean we can use it as a condition and if's not True it will be False so we just need an else
-        # if self.white:
-        #     #2. Now we check if the cell right infront of the Pawn is free and if so we append that cell as a possible one
-        #     if self.board.cell_is_valid_and_empty((row - 1, col)):
-        #         reachable_cells.append((row - 1, col))
-
-        #         #Now we Check if Dash(2 cells at once) is even possible
-        #         #The cell right infront is free because we checked it earlier, now we check if the second cell is also free and if the pawn is in his homerow 
-        #         if row == 6 and self.board.cell_is_valid_and_empty((row - 2, col)):
-        #             reachable_cells.append((row - 2, col))
-
-        #     #If white we SEPERATELY check if can attack his diagonal fields
-        #     #The multiple if's are on purpose
-        #     if self.board.piece_can_hit_on_cell(self, (row - 1, col -1)):
-        #         reachable_cells.append((row - 1, col -1))
-        #     if self.board.piece_can_hit_on_cell(self, (row - 1, col +1)):
-        #         reachable_cells.append((row - 1, col +1))
-        
-        # #Same as for White one but instead of Homerow 6 it's 1 and his "Forward" is + 1 while white's was -1
-        # else:
-        #     #See if Cell infront is free and add to list
-        #     if self.board.cell_is_valid_and_empty((row + 1, col)):
-        #         reachable_cells.append((row + 1, col))
-                
-        #         #Check if it's the Homerow, if so and Free -> add to list
-        #         if row == 1 and self.board.cell_is_valid_and_empty((row + 2, col)):
-        #             reachable_cells.append((row + 2, col))
-
-        #     # Again Check Seperately if pawn can hit diagonally
-        #     if self.board.piece_can_hit_on_cell(self, (row + 1, col -1)):
-        #         reachable_cells.append((row + 1, col -1))
-        #     if self.board.piece_can_hit_on_cell(self, (row + 1, col +1)):
-        #         reachable_cells.append((row + 1, col +1))
-
-        # return reachable_cells
 
 class Rook(Piece):  # Turm
+    __slots__ = ()
+    KIND = 3
+    SLIDING = True
+
     def __init__(self, board, white):
         super().__init__(board, white)
 
-    def get_reachable_cells(self):
+    def get_reachable_mask(self):
+        """
+        Bit mask version of :py:meth:`get_reachable_squares` for boards with bit boards (see :py:class:`board.BitBoard`).
+        """
+        return rook_attacks(SQUARE_TO_INDEX[self.square], self.board.occupied) & ~self.board.occupancy[self.white]
+
+    def get_reachable_squares(self):
         """
         **TODO** Implement the movability mechanic for `rooks <https://de.wikipedia.org/wiki/Turm_(Schach)>`_. 
 
@@ -395,109 +352,39 @@ class Rook(Piece):  # Turm
         **HINT**: Rooks can move only horizontally or vertically. They can move an arbitrary amount of cells until blocked by an own piece
         or an opposing piece (which they could hit and then being stopped).
 
-        You can call :py:meth:`cell_is_valid_and_empty <board.Board.cell_is_valid_and_empty>`, 
-        :py:meth:`can_hit_on_cell <pieces.Piece.can_hit_on_cell>` and :py:meth:`can_enter_cell <pieces.Piece.can_enter_cell>` 
-        to check for necessary conditions to implement the rook movability mechanics. 
+        Look up target squares in the mailbox ``self.board.squares`` directly: a square holds None if it is empty,
+        :py:data:`squares.OFFBOARD` if it is outside of the board or the piece placed on it.
 
-        :return: A list of reachable cells this rook could move into.
+        :return: A list of reachable squares (see :py:mod:`squares`) this rook could move into.
         """
-        # TODO: Implement a method that returns all cells this piece can enter in its next move
+        # Boards with bit boards generate the moves with shift-and-mask operations instead
+        if self.board.BITBOARDS:
+            return mask_to_squares(self.get_reachable_mask())
 
-        #PLAN:
-        #1. Rook can move horizontally and vertically so 4 directions
-        #2. I will implement this with a list of those 4 directions E.g. (1, 0)
-        #3. 
-        #3. Now go one step in the given direction and check for
-        #       -if cell is empty and valid then repeat and add one step
-        #       -if the cell isn't empty check if it's an opponent then add that step and stop that direction because you can't go through an opponent 
+        #Rook can move horizontally and vertically so 4 directions until blocked
+        return self.get_sliding_squares(ROOK_DIRECTIONS)
 
-
-        #Implementation 
-
-        reachable_cells = []
-
-        (row, col) = self.cell
-
-        # Here is the list of his Directions 
-        direction = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-
-        #Unpack the tuple's from the list in j and k
-        for j, k in direction:
-            #add the current position they are in to the possible direction once
-            new_cell = (row + j, col + k) #3 and 3 then it will become 4 and 3 for E.g. with the first tuple from the list (1, 0)
-            
-            #while it's empty move forward
-            while self.board.cell_is_valid_and_empty(new_cell):
-                reachable_cells.append(new_cell)
-                #unpack tuple so we know where on the board we are
-                (new_row, new_col) = new_cell
-                #add the direction we are going toward again E.g. (1, 1) and save in new cell
-                new_cell = (new_row + j, new_col + k)
-            
-            #if we are here the next cell wasn't empty, so we check if it's an opponent
-            #if so add that cell once to the list, then return to the start of the for loop and do all that again with E.g.(1, -1)
-            if self.board.is_valid_cell(new_cell) and self.board.piece_can_hit_on_cell(self, new_cell):
-                reachable_cells.append(new_cell)
-
-        return reachable_cells
-
-
-        #More beginner way
-        # #The indices of the Board are [0-7] [0-7], 
-        # #the Rook's are allowed to move in every axis (+1/-1) multiple times as long as cell is valid and empty
-        # #if own color there then stop one cell before that
-        # #if oponent color there include that cell (sounds a bit like list slicing, might try it with that)
-
-        # #Need to optimize code, DRY concept and readability, this basically just a mockup
-        # reachable_cells = []
-
-        # directions = [1, -1] 
-
-        # (row, col) = self.cell
-        
-        # for direction in directions:
-        #     steps = 1
-        #     #for positive direction
-        #     if direction > 0:
-        #         #take current position and add 1 in row see if its possible
-        #         while self.board.cell_is_valid_and_empty((row + steps, col)):
-        #             reachable_cells.append((row + steps, col))
-        #             steps += 1
-        #         if(self.board.piece_can_hit_on_cell(self, (row + steps, col))):
-        #             reachable_cells.append((row + steps, col))
-
-        #     else:
-        #         steps *= -1
-        #         while self.board.cell_is_valid_and_empty((row + steps, col)):
-        #             reachable_cells.append((row + steps, col))
-        #             steps -= 1
-        #         if(self.board.piece_can_hit_on_cell(self, (row + steps, col))):
-        #             reachable_cells.append((row + steps, col))
-
-        # for direction in directions:
-        #     steps = 1
-        #     if direction > 0:
-        #         while self.board.cell_is_valid_and_empty((row, steps + col)):
-        #             reachable_cells.append((row, steps + col))
-        #             steps += 1
-        #         if(self.board.piece_can_hit_on_cell(self, (row, steps + col))):
-        #             reachable_cells.append((row, steps + col))
-        #     else:
-        #         steps *= -1
-        #         while self.board.cell_is_valid_and_empty((row, steps + col)):
-        #             reachable_cells.append((row, steps + col))
-        #             steps -= 1
-        #         if(self.board.piece_can_hit_on_cell(self, (row, steps + col))):
-        #             reachable_cells.append((row, steps + col))
-
-        # return reachable_cells
+    def get_attacked_squares(self):
+        """
+        Returns the squares this rook attacks, see :py:meth:`Piece.get_ray_squares`.
+        """
+        return self.get_ray_squares(ROOK_DIRECTIONS)
 
 
 class Knight(Piece):  # Springer
+    __slots__ = ()
+    KIND = 1
+
     def __init__(self, board, white):
         super().__init__(board, white)
 
-    def get_reachable_cells(self):
+    def get_reachable_mask(self):
+        """
+        Bit mask version of :py:meth:`get_reachable_squares` for boards with bit boards (see :py:class:`board.BitBoard`).
+        """
+        return KNIGHT_ATTACKS[SQUARE_TO_INDEX[self.square]] & ~self.board.occupancy[self.white]
+
+    def get_reachable_squares(self):
         """
         **TODO** Implement the movability mechanic for `knights <https://de.wikipedia.org/wiki/Springer_(Schach)>`_. 
 
@@ -507,41 +394,41 @@ class Knight(Piece):  # Springer
         **HINT**: Knights can move in a special pattern. They can move two rows up or down and then one column left or right. Alternatively, they can
         move one row up or down and then two columns left or right. They are not blocked by pieces in between. 
 
-        You can call :py:meth:`cell_is_valid_and_empty <board.Board.cell_is_valid_and_empty>`, 
-        :py:meth:`can_hit_on_cell <pieces.Piece.can_hit_on_cell>` and :py:meth:`can_enter_cell <pieces.Piece.can_enter_cell>` 
-        to check for necessary conditions to implement the rook movability mechanics. 
+        Look up target squares in the mailbox ``self.board.squares`` directly: a square holds None if it is empty,
+        :py:data:`squares.OFFBOARD` if it is outside of the board or the piece placed on it.
 
-        :return: A list of reachable cells this knight could move into.
+        :return: A list of reachable squares (see :py:mod:`squares`) this knight could move into.
         """
-        # TODO: Implement a method that returns all cells this piece can enter in its next move
+        # Boards with bit boards generate the moves with shift-and-mask operations instead
+        if self.board.BITBOARDS:
+            return mask_to_squares(self.get_reachable_mask())
 
-        # PLAN:
-        #1. Knight only has 8 possible moves, i will create a list of those 8 moves
-        #2. Go trough every move and see if either the cell they wanna go to is empty OR an opposing piece is there (that the cells are valid is already assumed)
-        #3. Return the list of those moves
+        #Because the Knight moves in 2 in one directions 1 in the other there are 8 possibilities,
+        #they are never blocked and off board targets land on the padding of the mailbox
+        return self.get_stepping_squares(KNIGHT_OFFSETS)
+
+    def get_attacked_squares(self):
+        """
+        Returns the squares this knight attacks, whether occupied or not.
+        """
+        return KNIGHT_TARGETS[self.square]
 
-        reachable_cells = []
-        (row, col) = self.cell
-        
-        #Because the Knight moves in 2 in one directions 1 in the other those are the 8 possibilities
-        possible_moves = [(2, 1), (2, -1), (1, 2), (-1, 2), (-2, 1), (-2, -1), (1,-2), (-1,-2)]
-
-        for j, k in possible_moves:
-            #We save the new Position in "new_cell"
-            new_cell = (row + j, col + k)
-            #We use the method "piece_can_enter_cell", because it perfectly catches the case of
-            #Either the new Cell has to be empty or an opposing piece has to be there
-            if self.board.piece_can_enter_cell(self, new_cell):
-                reachable_cells.append(new_cell)        
-       
-        return reachable_cells
 
-    
 class Bishop(Piece):  # Läufer
+    __slots__ = ()
+    KIND = 2
+    SLIDING = True
+
     def __init__(self, board, white):
         super().__init__(board, white)
 
-    def get_reachable_cells(self):
+    def get_reachable_mask(self):
+        """
+        Bit mask version of :py:meth:`get_reachable_squares` for boards with bit boards (see :py:class:`board.BitBoard`).
+        """
+        return bishop_attacks(SQUARE_TO_INDEX[self.square], self.board.occupied) & ~self.board.occupancy[self.white]
+
+    def get_reachable_squares(self):
         """
         **TODO** Implement the movability mechanic for `bishop <https://de.wikipedia.org/wiki/L%C3%A4ufer_(Schach)>`_. 
 
@@ -550,54 +437,40 @@ class Bishop(Piece):  # Läufer
 
         **HINT**: Bishops can move diagonally an arbitrary amount of cells until blocked.
 
-        You can call :py:meth:`cell_is_valid_and_empty <board.Board.cell_is_valid_and_empty>`, 
-        :py:meth:`can_hit_on_cell <pieces.Piece.can_hit_on_cell>` and :py:meth:`can_enter_cell <pieces.Piece.can_enter_cell>` 
-        to check for necessary conditions to implement the rook movability mechanics. 
-
-        :return: A list of reachable cells this bishop could move into.
-        """
-        # TODO: Implement a method that returns all cells this piece can enter in its next move
-
-        #PLAN:
-        #1. Bishop can move diagonally in 4 directions, which is one of the moves of the list below "direction" but multiple times
-        #2. I will implement this in a list with tuples and increase both elements with one after every turn 
-        #3. Now go one step diagonally and check for
-        #       -if cell is empty and valid then repeat and add one step
-        #       -if the cell isn't empty check if it's an opponent then add that step and stop that direction because you can't go through an opponent 
-
-        #Implementation 
-        reachable_cells = []
-        (row, col) = self.cell
-
-        # Here is the list of his Directions
-        direction = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-
-        #Unpack the tuple's from the list in j and k
-        for j, k in direction:
-            #add the current position they are in to the possible direction once
-            new_cell = (row + j, col + k) #3 and 3 then it will become 4 and 4 for E.g. with the first tuple from the list (1, 1)
-            
-            #while it's empty move forward
-            while self.board.cell_is_valid_and_empty(new_cell):
-                reachable_cells.append(new_cell)
-                #unpack tuple so we know where on the board we are
-                (new_row, new_col) = new_cell
-                #add the direction we are going toward again E.g. (1, 1) and save in new cell
-                new_cell = (new_row + j, new_col + k)
-            
-            #if we are here the next cell wasn't empty, so we check if it's an opponent
-            #if so add that cell once to the list, then return to the start of the for loop and do all that again with E.g.(1, -1)
-            if self.board.piece_can_hit_on_cell(self, new_cell):
-                reachable_cells.append(new_cell)
-        
-        return reachable_cells
+        Look up target squares in the mailbox ``self.board.squares`` directly: a square holds None if it is empty,
+        :py:data:`squares.OFFBOARD` if it is outside of the board or the piece placed on it.
+
+        :return: A list of reachable squares (see :py:mod:`squares`) this bishop could move into.
+        """
+        # Boards with bit boards generate the moves with shift-and-mask operations instead
+        if self.board.BITBOARDS:
+            return mask_to_squares(self.get_reachable_mask())
+
+        #Bishop can move diagonally in 4 directions until blocked
+        return self.get_sliding_squares(BISHOP_DIRECTIONS)
+
+    def get_attacked_squares(self):
+        """
+        Returns the squares this bishop attacks, see :py:meth:`Piece.get_ray_squares`.
+        """
+        return self.get_ray_squares(BISHOP_DIRECTIONS)
 
 
 class Queen(Piece):  # Königin
+    __slots__ = ()
+    KIND = 4
+    SLIDING = True
+
     def __init__(self, board, white):
         super().__init__(board, white)
 
-    def get_reachable_cells(self):
+    def get_reachable_mask(self):
+        """
+        Bit mask version of :py:meth:`get_reachable_squares` for boards with bit boards (see :py:class:`board.BitBoard`).
+        """
+        return queen_attacks(SQUARE_TO_INDEX[self.square], self.board.occupied) & ~self.board.occupancy[self.white]
+
+    def get_reachable_squares(self):
         """
         **TODO** Implement the movability mechanic for the `queen <https://de.wikipedia.org/wiki/Dame_(Schach)>`_. 
 
@@ -607,55 +480,39 @@ class Queen(Piece):  # Königin
         **HINT**: Queens can move horizontally, vertically and diagonally an arbitrary amount of cells until blocked. They combine the movability
         of rooks and bishops. 
 
-        You can call :py:meth:`cell_is_valid_and_empty <board.Board.cell_is_valid_and_empty>`, 
-        :py:meth:`can_hit_on_cell <pieces.Piece.can_hit_on_cell>` and :py:meth:`can_enter_cell <pieces.Piece.can_enter_cell>` 
-        to check for necessary conditions to implement the rook movability mechanics. 
-
-        :return: A list of reachable cells this queen could move into.
-        """
-        # TODO: Implement a method that returns all cells this piece can enter in its next move
-
-        #PLAN:
-        #1. Queen Basically is a rook and bishop at the same time, just adjust the directios
-        #2. I will implement this in a list with tuples and increase both elements with one after every turn 
-        #3. Now go one step into direction and check for
-        #       -if cell is empty and valid then repeat and add one step
-        #       -if the cell isn't empty check if it's an opponent then add that step and stop that direction because you can't go through an opponent 
-
-        #Implementation 
-        reachable_cells = []
-        (row, col) = self.cell
-
-        # Here is the list of his Directions
-        direction = [(1, 1), (1, -1), (-1, 1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)]
-
-
-        #Unpack the tuple's from the list in j and k
-        for j, k in direction:
-            #add the current position they are in to the possible direction once
-            new_cell = (row + j, col + k) #3 and 3 then it will become 4 and 4 for E.g. with the first tuple from the list (1, 1)
-            
-            #while it's empty move forward
-            while self.board.cell_is_valid_and_empty(new_cell):
-                reachable_cells.append(new_cell)
-                #unpack tuple so we know where on the board we are
-                (new_row, new_col) = new_cell
-                #add the direction we are going toward again E.g. (1, 1) and save in new cell
-                new_cell = (new_row + j, new_col + k)
-            
-            #if we are here the next cell wasn't empty, so we check if it's an opponent
-            #if so add that cell once to the list, then return to the start of the for loop and do all that again with E.g.(1, -1)
-            if self.board.piece_can_hit_on_cell(self, new_cell):
-                reachable_cells.append(new_cell)
-        
-        return reachable_cells
+        Look up target squares in the mailbox ``self.board.squares`` directly: a square holds None if it is empty,
+        :py:data:`squares.OFFBOARD` if it is outside of the board or the piece placed on it.
+
+        :return: A list of reachable squares (see :py:mod:`squares`) this queen could move into.
+        """
+        # Boards with bit boards generate the moves with shift-and-mask operations instead
+        if self.board.BITBOARDS:
+            return mask_to_squares(self.get_reachable_mask())
+
+        #Queen Basically is a rook and bishop at the same time
+        return self.get_sliding_squares(QUEEN_DIRECTIONS)
+
+    def get_attacked_squares(self):
+        """
+        Returns the squares this queen attacks, see :py:meth:`Piece.get_ray_squares`.
+        """
+        return self.get_ray_squares(QUEEN_DIRECTIONS)
 
 
 class King(Piece):  # König
+    __slots__ = ()
+    KIND = 5
+
     def __init__(self, board, white):
         super().__init__(board, white)
 
-    def get_reachable_cells(self):
+    def get_reachable_mask(self):
+        """
+        Bit mask version of :py:meth:`get_reachable_squares` for boards with bit boards (see :py:class:`board.BitBoard`).
+        """
+        return KING_ATTACKS[SQUARE_TO_INDEX[self.square]] & ~self.board.occupancy[self.white]
+
+    def get_reachable_squares(self):
         """
         **TODO** Implement the movability mechanic for the `king <https://de.wikipedia.org/wiki/K%C3%B6nig_(Schach)>`_. 
 
@@ -664,33 +521,20 @@ class King(Piece):  # König
 
         **HINT**: Kings can move horizontally, vertically and diagonally but only one piece at a time.
 
-        You can call :py:meth:`cell_is_valid_and_empty <board.Board.cell_is_valid_and_empty>`, 
-        :py:meth:`can_hit_on_cell <pieces.Piece.can_hit_on_cell>` and :py:meth:`can_enter_cell <pieces.Piece.can_enter_cell>` 
-        to check for necessary conditions to implement the rook movability mechanics. 
-
-        :return: A list of reachable cells this king could move into.
-        """
-        # TODO: Implement a method that returns all cells this piece can enter in its next move
-        #PLAN:
-        #1. King is Basically a rook and bishop at the same time, but can just move once in every direction
-        #2. I will implement this in a list with tuples and could add the knight logic
-        #3. Now go one step into direction and check for
-        #       -if cell is empty and valid then repeat and add one step
-        #       -if the cell isn't empty check if it's an opponent then add that step and stop that direction because you can't go through an opponent 
-
-        #Implementation 
-        reachable_cells = []
-        (row, col) = self.cell
-
-        # Here is the list of his Directions
-        possible_moves = [(1, 1), (1, -1), (-1, 1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)]
-
-        # unpack the tuple
-        for j, k in possible_moves:
-            #We save the new Position in "new_cell"
-            new_cell = (row + j, col + k)
-            #We use the method "piece_can_enter_cell", because it perfectly catches the case of
-            #Either the new Cell has to be empty or an opposing piece has to be there
-            if self.board.piece_can_enter_cell(self, new_cell):
-                reachable_cells.append(new_cell)        
-        return reachable_cells
\ No newline at end of file
+        Look up target squares in the mailbox ``self.board.squares`` directly: a square holds None if it is empty,
+        :py:data:`squares.OFFBOARD` if it is outside of the board or the piece placed on it.
+
+        :return: A list of reachable squares (see :py:mod:`squares`) this king could move into.
+        """
+        # Boards with bit boards generate the moves with shift-and-mask operations instead
+        if self.board.BITBOARDS:
+            return mask_to_squares(self.get_reachable_mask())
+
+        #King can move in every direction like the queen, but only one step at a time
+        return self.get_stepping_squares(KING_OFFSETS)
+
+    def get_attacked_squares(self):
+        """
+        Returns the squares this king attacks, whether occupied or not.
+        """
+        return KING_TARGETS[self.square]
@@ -0,0 +1,75 @@
+"""
+Square indices of the 10x12 mailbox used by the board.
+
+The 8x8 board is embedded into a 10 column by 12 row list: two padding rows below and above the board
+and one padding column left and right. Cell (row, col) maps to square ``(row + 2) * 10 + col + 1``, so
+a1 is square 21 and h8 is square 98. Padding squares hold the :py:data:`OFFBOARD` sentinel, which lets
+move generators walk rays with a single list look-up per step and no bounds checks. Even a knight jump
+from a corner square lands on a padding square instead of leaving the list or wrapping around.
+
+Bit masks (see :py:mod:`bitmasks`) and the Zobrist keys use the compact index ``row * 8 + col`` instead,
+:py:data:`SQUARE_TO_INDEX` and :py:data:`INDEX_TO_SQUARE` convert between both.
+"""
+
+# Placed on all padding squares of the mailbox
+OFFBOARD = object()
+
+# Offsets between neighbouring squares
+NORTH = 10
+SOUTH = -10
+EAST = 1
+WEST = -1
+
+ROOK_DIRECTIONS = (NORTH, SOUTH, EAST, WEST)
+BISHOP_DIRECTIONS = (NORTH + EAST, NORTH + WEST, SOUTH + EAST, SOUTH + WEST)
+QUEEN_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+KING_OFFSETS = QUEEN_DIRECTIONS
+KNIGHT_OFFSETS = (21, 19, 12, 8, -8, -12, -19, -21)
+
+
+def cell_to_square(cell):
+    """
+    Converts a (row, col) cell into its mailbox square.
+    """
+    row, col = cell
+    return (row + 2) * 10 + col + 1
+
+
+# Per-square look-up tables, None (or -1) for padding squares
+SQUARE_TO_CELL = [None] * 120
+SQUARE_TO_INDEX = [-1] * 120
+INDEX_TO_SQUARE = [0] * 64
+BOARD_SQUARES = []
+
+for _row in range(8):
+    for _col in range(8):
+        _square = cell_to_square((_row, _col))
+        SQUARE_TO_CELL[_square] = (_row, _col)
+        SQUARE_TO_INDEX[_square] = _row * 8 + _col
+        INDEX_TO_SQUARE[_row * 8 + _col] = _square
+        BOARD_SQUARES.append(_square)
+
+
+def _targets(square, offsets):
+    return [square + offset for offset in offsets if SQUARE_TO_CELL[square + offset] is not None]
+
+
+# Per-square lists of the squares on the board a knight, king or pawn of given color placed there attacks.
+# Attacks are symmetric for knights and kings: a knight on A attacks B exactly if a knight on B would attack A.
+# For pawns the color flips: a white pawn attacks B from A exactly if a black pawn on B would attack A.
+KNIGHT_TARGETS = [_targets(square, KNIGHT_OFFSETS) if square in BOARD_SQUARES else [] for square in range(120)]
+KING_TARGETS = [_targets(square, KING_OFFSETS) if square in BOARD_SQUARES else [] for square in range(120)]
+PAWN_TARGETS = {
+    True: [_targets(square, (NORTH + EAST, NORTH + WEST)) if square in BOARD_SQUARES else [] for square in range(120)],
+    False: [_targets(square, (SOUTH + EAST, SOUTH + WEST)) if square in BOARD_SQUARES else [] for square in range(120)],
+}
+
+# The zone around a king, used to rate its safety: its own square and all squares next to it
+KING_ZONES = [[square] + KING_TARGETS[square] if square in BOARD_SQUARES else [] for square in range(120)]
+
+
+def square_to_cell(square):
+    """
+    Converts a mailbox square into its (row, col) cell, or None for padding squares.
+    """
+    return SQUARE_TO_CELL[square]
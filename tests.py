@@ -1,14 +1,30 @@
 import unittest
 import json
+import os
+import tempfile
+import time
+import random
+import numpy
 from unittest_prettify.colorize import (
     colorize,
     RED,
 )
-from board import Board, InvalidRowException, InvalidColumnException
+from board import Board, BitBoard, InvalidRowException, InvalidColumnException, ZOBRIST_PIECE_KEYS
 from pieces import Pawn, Queen, Pawn, Rook, Knight, Bishop, King
 from util import cell_to_string, map_piece_to_character, map_piece_to_fullname
+from squares import cell_to_square, square_to_cell, OFFBOARD, BOARD_SQUARES
 
-from engine import evaluate_all_possible_moves, MinMaxArg
+from engine import evaluate_all_possible_moves, minMax, MinMaxArg
+import bitmasks
+import engine
+import magic
+from nnue import Network
+from ordering import MoveOrdering
+from transposition import BUCKET_SIZE, ENTRY_DTYPE, TranspositionTable, position_key
+from moves import CAPTURE, encode_move, move_from_square, move_to_square
+from evaluation import MAX_PHASE, EMPTY, PawnHashTable, evaluate_many, evaluate_array, evaluate_pawn_structure, taper
+from evaluation import current_weights, save_weights, load_weights, LAZY_EVALUATION_MARGIN, MATERIAL_VALUES
+import tuning
 
 
 def iterate_pieces(board):
@@ -442,8 +458,954 @@ class TestBoard(unittest.TestCase):
     moves = evaluate_all_possible_moves(self.board, minMaxArg=MinMaxArg(playAsWhite=True), maximumNumberOfMoves=6)
     self.assertEqual(len(moves), 6, "evaluate_all_possible_moves should respect requested amount of moves")
 
+  # ---------------------------------------------------------------------------
+  # Phase D – Performance-Infrastruktur
+  # ---------------------------------------------------------------------------
+
+  @colorize(color=RED)
+  def test_D01_zobrist_hash_is_incremental(self):
+    self.board.load_from_disk("tests/random1.board")
+    loadedHash = self.board.hash()
+
+    # Move a piece away and back again, the hash must be restored
+    piece = self.board.get_cell((3, 2))
+    removed = self.board.get_cell((5, 0))
+    self.board.set_cell((5, 0), piece)
+    self.assertNotEqual(loadedHash, self.board.hash(), "Moving a piece must change the hash")
+    self.board.set_cell((3, 2), piece)
+    self.board.set_cell((5, 0), removed)
+    self.assertEqual(loadedHash, self.board.hash(), "Restoring a configuration must restore its hash")
+
+    # The side to move is part of the hash
+    self.board.set_white_to_move(False)
+    self.assertNotEqual(loadedHash, self.board.hash(), "The side to move must be part of the hash")
+    self.board.set_white_to_move(True)
+    self.assertEqual(loadedHash, self.board.hash(), "The side to move must be part of the hash")
+
+    # An incrementally updated hash equals the hash of a freshly loaded board
+    other = Board()
+    other.load_from_memory(str(self.board))
+    self.assertEqual(other.hash(), self.board.hash(), "Equal configurations must have equal hashes")
+
+
+  @colorize(color=RED)
+  def test_D02_make_unmake_move_restores_board(self):
+    self.board.load_from_disk("tests/random1.board")
+    beforeText = str(self.board)
+    beforeHash = self.board.hash()
+
+    # White bishop c4 hits the black pawn on a6
+    bishop = self.board.get_cell((3, 2))
+    pawn = self.board.get_cell((5, 0))
+    blackPieces = list(self.board.iterate_cells_with_pieces(False))
+    self.board.make_move(bishop, cell_to_square((5, 0)))
+
+    self.assertIs(self.board.get_cell((5, 0)), bishop, "make_move should place the piece on the target cell")
+    self.assertIsNone(self.board.get_cell((3, 2)), "make_move should clear the origin cell")
+    self.assertFalse(self.board.white_to_move, "make_move should hand the move to the other color")
+
+    self.board.unmake_move()
+
+    self.assertIs(self.board.get_cell((3, 2)), bishop, "unmake_move should restore the moved piece")
+    self.assertIs(self.board.get_cell((5, 0)), pawn, "unmake_move should restore the hit piece")
+    self.assertEqual(beforeText, str(self.board), "unmake_move should restore the board configuration")
+    self.assertEqual(beforeHash, self.board.hash(), "unmake_move should restore the hash")
+    self.assertTrue(self.board.white_to_move, "unmake_move should restore the side to move")
+
+  @colorize(color=RED)
+  def test_D03_minmax_searches_deeper_than_one_ply(self):
+    # The black queen on h5 hits the rook on e2, but then the white queen answers by hitting her back
+    self.board.load_from_memory(
+      """. . . . k . . .
+         . . . . . . . .
+         . . . . . . . .
+         . . . . . . . q
+         . . . . . . . .
+         . . . . . . . .
+         . . . . R . . .
+         . . . . K Q . .""")
+    beforeHash = self.board.hash()
+
+    move = minMax(self.board, MinMaxArg(depth=2, playAsWhite=False))
+    self.assertIsNotNone(move.piece, "minMax should find a move for black")
+    self.assertFalse(move.cell[0] == 1 and move.cell[1] == 4, "minMax with depth 2 should see the queen being hit back on e2")
+    self.assertEqual(beforeHash, self.board.hash(), "minMax must not alter board configuration after its return")
+
+
+  @colorize(color=RED)
+  def test_D04_piece_index_follows_moves(self):
+    self.board.load_from_disk("tests/random1.board")
+    whiteCount = len(list(self.board.iterate_cells_with_pieces(True)))
+    blackCount = len(list(self.board.iterate_cells_with_pieces(False)))
+
+    # Hitting a piece removes it from the index, taking the move back restores it
+    bishop = self.board.get_cell((3, 2))
+    pawn = self.board.get_cell((5, 0))
+    blackPieces = list(self.board.iterate_cells_with_pieces(False))
+    self.board.make_move(bishop, cell_to_square((5, 0)))
+    self.assertNotIn(pawn, list(self.board.iterate_cells_with_pieces(False)), "A hit piece must no longer be iterated")
+    self.assertEqual(len(list(self.board.iterate_cells_with_pieces(False))), blackCount - 1)
+    self.assertIsNone(self.board.pieces[False][pawn.slot], "A hit piece must leave its slot empty, not move the others")
+    self.board.unmake_move()
+    self.assertIs(pawn, self.board.pieces[False][pawn.slot])
+    self.assertIn(pawn, list(self.board.iterate_cells_with_pieces(False)), "A restored piece must be iterated again")
+    self.assertEqual(blackPieces, list(self.board.iterate_cells_with_pieces(False)), "A restored piece must keep its place in the index")
+
+    # Same for set_cell
+    self.board.set_cell((5, 0), bishop)
+    self.assertEqual(len(list(self.board.iterate_cells_with_pieces(True))), whiteCount)
+    self.assertEqual(len(list(self.board.iterate_cells_with_pieces(False))), blackCount - 1)
+
+    # The king index follows the king
+    king = self.board.find_king(True)
+    self.board.set_cell((2, 4), king)
+    self.assertIs(self.board.find_king(True), king)
+    self.board.set_cell((2, 4), None)
+    self.assertIsNone(self.board.find_king(True), "A removed king must no longer be found")
+
+    # Iterating only visits the pieces left on the board
+    self.board.load_from_memory(
+      """. . . . k . . .
+         . . . . . . . .
+         . . . . . . . .
+         . . . . . . . .
+         . . . . . . . .
+         . . . . . . . .
+         . . . . . . . .
+         . . . . K . . R""")
+    self.assertEqual(len(self.board.pieces[True]), 2)
+    self.assertEqual(len(self.board.pieces[False]), 1)
+
+
+  @colorize(color=RED)
+  def test_D05_bitboard_backend_matches_board(self):
+    with open("tests/movement_test.json", "rt") as f:
+      suite = json.load(f)
+
+    bitBoard = BitBoard()
+    for testcase in suite["testcases"]:
+      self.board.load_from_disk("tests/" + testcase["configuration"])
+      bitBoard.load_from_disk("tests/" + testcase["configuration"])
+
+      # Both backends must generate the same moves for every piece
+      for piece in iterate_pieces(self.board):
+        expected = { (int(row), int(col)) for row, col in piece.get_reachable_cells() }
+        actual = set(bitBoard.get_cell(piece.cell).get_reachable_cells())
+        self.assertEqual(expected, actual, f"BitBoard moves of {map_piece_to_fullname(piece)} on {cell_to_string(piece.cell)} differ in {testcase['name']}")
+
+      # And agree on checks
+      for color in [True, False]:
+        if self.board.find_king(color) is not None:
+          self.assertEqual(bool(self.board.is_king_check(color)), bitBoard.is_king_check(color), f"BitBoard check detection differs in {testcase['name']}")
+
+    # Masks must follow moves and be restored afterwards
+    bitBoard.load_from_disk("tests/random1.board")
+    occupied = bitBoard.occupied
+    bishop = bitBoard.get_cell((3, 2))
+    bitBoard.make_move(bishop, cell_to_square((5, 0)))
+    self.assertEqual(bitBoard.bitboards[bishop.code] & (1 << 40), 1 << 40, "make_move must update the bit boards")
+    self.assertEqual(bitBoard.occupied, occupied & ~(1 << 26), "make_move must update the occupancy")
+    bitBoard.unmake_move()
+    self.assertEqual(bitBoard.occupied, occupied, "unmake_move must restore the occupancy")
+
+    # Both backends find the same move
+    self.board.load_from_disk("tests/random2.board")
+    bitBoard.load_from_disk("tests/random2.board")
+    moves = evaluate_all_possible_moves(self.board, MinMaxArg())
+    bitMoves = evaluate_all_possible_moves(bitBoard, MinMaxArg())
+    self.assertEqual([move.score for move in moves], [move.score for move in bitMoves])
+
+
+  @colorize(color=RED)
+  def test_D06_mailbox_squares(self):
+    # Every cell maps to a square and back, every other square of the mailbox is padding
+    boardSquares = set()
+    for row in range(8):
+      for col in range(8):
+        square = cell_to_square((row, col))
+        self.assertEqual(square_to_cell(square), (row, col))
+        boardSquares.add(square)
+
+    self.board.clear_board()
+    for square in range(120):
+      if square in boardSquares:
+        self.assertIsNone(self.board.squares[square], "Squares on the board should be empty after clear_board")
+      else:
+        self.assertIs(self.board.squares[square], OFFBOARD, "Padding squares must hold the OFFBOARD sentinel")
+
+    # Pieces keep their location as square and expose it as cell
+    self.board.reset()
+    piece = self.board.get_cell((0, 1))
+    self.assertEqual(piece.square, cell_to_square((0, 1)))
+    self.assertEqual(cell_to_string(piece.cell), "b1")
+    with self.assertRaises(AttributeError):
+      piece.someAttribute = 1
+
+
+  @colorize(color=RED)
+  def test_D07_check_detection_matches_move_generation(self):
+    for configuration in ["random1.board", "random2.board", "queen.board", "rook.board", "knight.board"]:
+      for board in [Board(), BitBoard()]:
+        board.load_from_disk("tests/" + configuration)
+
+        # Place the white king on every empty cell and compare with the reachable cells of all black pieces
+        king = board.find_king(True)
+        for row in range(8):
+          for col in range(8):
+            if board.get_cell((row, col)) is not None:
+              continue
+
+            board.set_cell((row, col), king)
+            expected = any(king.cell in piece.get_reachable_cells() for piece in board.iterate_cells_with_pieces(False))
+            actual = board.is_king_check(True)
+            self.assertIs(type(actual), bool, "is_king_check must return a bool")
+            self.assertEqual(expected, actual, f"is_king_check is wrong for the king on {cell_to_string((row, col))} in {configuration}\n\n" + str(board))
+
+    self.board.clear_board()
+    self.assertIs(self.board.is_king_check(True), False, "is_king_check must return False without a king")
+
+  @colorize(color=RED)
+  def test_D08_legal_moves_match_brute_force(self):
+    def brute_force(board, white):
+      moves = set()
+      for piece in board.iterate_cells_with_pieces(white):
+        for square in piece.get_reachable_squares():
+          board.make_move(piece, square)
+          if not board.is_king_check(white):
+            moves.add((piece, square))
+          board.unmake_move()
+      return moves
+
+    # The white bishop on d2 is pinned by the rook on d8, the black queen on h4 gives check to the king on e1
+    for board in [Board(), BitBoard()]:
+      board.set_cell((0, 4), King(board, True))
+      board.set_cell((1, 3), Bishop(board, True))
+      board.set_cell((7, 3), Rook(board, False))
+      board.set_cell((3, 7), Queen(board, False))
+      board.set_cell((7, 7), King(board, False))
+      bishop = board.get_cell((1, 3))
+      self.assertEqual([], bishop.get_valid_cells(), "A pinned piece must not block a check from another direction")
+      self.assertEqual(brute_force(board, True), set(board.generate_legal_moves(True)))
+
+    # Play random games on both backends and compare all legal moves along the way
+    rng = random.Random(7)
+    for configuration in ["random1.board", "random2.board"]:
+      for board in [Board(), BitBoard()]:
+        board.load_from_disk("tests/" + configuration)
+        white = True
+        for _ in range(30):
+          moves = board.generate_legal_moves(white)
+          self.assertEqual(brute_force(board, white), set(moves), f"Legal moves are wrong in {configuration}\n\n" + str(board))
+          if not moves:
+            break
+          board.make_move(*rng.choice(moves))
+          white = not white
+
+  @colorize(color=RED)
+  def test_D09_attack_maps_stay_up_to_date(self):
+    def assert_maps_match_scratch(board, message):
+      for white in [True, False]:
+        expected = [0] * 120
+        for piece in board.iterate_cells_with_pieces(white):
+          # The bit board keeps no attack maps, it answers the queries from its masks
+          if not isinstance(board, BitBoard):
+            self.assertEqual(sorted(piece.get_attacked_squares()), sorted(board.attacks[piece]), message)
+          for square in piece.get_attacked_squares():
+            expected[square] += 1
+        if not isinstance(board, BitBoard):
+          self.assertEqual(expected, board.attack_counts[white], message)
+        for square in BOARD_SQUARES:
+          self.assertEqual(expected[square], board.count_attackers(square, white), message)
+          self.assertEqual(expected[square] > 0, board.is_square_attacked(square, white), message)
+
+    # A rook on d1 attacks d2 (defending the own pawn) and the whole first row up to the queens
+    board = Board()
+    board.set_cell((0, 3), Rook(board, True))
+    board.set_cell((1, 3), Pawn(board, True))
+    board.set_cell((0, 0), Queen(board, False))
+    self.assertTrue(board.is_square_attacked(cell_to_square((1, 3)), True))
+    self.assertTrue(board.is_square_attacked(cell_to_square((0, 0)), True))
+    self.assertFalse(board.is_square_attacked(cell_to_square((2, 3)), True))
+    self.assertEqual(2, board.count_attackers(cell_to_square((0, 1)), True) + board.count_attackers(cell_to_square((0, 1)), False))
+
+    # Moving the pawn opens the file, taking the move back closes it again
+    board.make_move(board.get_cell((1, 3)), cell_to_square((2, 3)))
+    self.assertTrue(board.is_square_attacked(cell_to_square((2, 3)), True))
+    board.unmake_move()
+    self.assertFalse(board.is_square_attacked(cell_to_square((2, 3)), True))
+
+    rng = random.Random(11)
+    for configuration in ["random1.board", "random2.board"]:
+      for board in [Board(), BitBoard()]:
+        board.load_from_disk("tests/" + configuration)
+        assert_maps_match_scratch(board, f"Attack maps are wrong after loading {configuration}")
+        white = True
+        for ply in range(40):
+          moves = board.generate_legal_moves(white)
+          if not moves:
+            break
+          board.make_move(*rng.choice(moves))
+          white = not white
+          assert_maps_match_scratch(board, f"Attack maps are wrong after {ply + 1} moves in {configuration}\n\n" + str(board))
+
+        while board.undo_stack:
+          board.unmake_move()
+        assert_maps_match_scratch(board, f"Attack maps are wrong after taking back all moves in {configuration}")
+
+  @colorize(color=RED)
+  def test_D10_magic_slider_tables(self):
+    rng = random.Random(5)
+    for _ in range(2000):
+      index = rng.randrange(64)
+      occupied = rng.getrandbits(64) & rng.getrandbits(64)
+      self.assertEqual(bitmasks.rook_attacks(index, occupied), magic.rook_attacks(index, occupied), f"Rook attacks differ on bit {index}")
+      self.assertEqual(bitmasks.bishop_attacks(index, occupied), magic.bishop_attacks(index, occupied), f"Bishop attacks differ on bit {index}")
+
+    # The tables are read from the versioned cache file instead of being generated again
+    tables = magic.load_tables()
+    self.assertTrue(os.path.exists(magic.CACHE_FILE))
+    self.assertEqual(numpy.uint64, tables.dtype)
+    self.assertEqual(magic.VERSION, int(tables[1]))
+    self.assertIn(f"v{magic.VERSION}", magic.CACHE_FILE)
+    self.assertNotEqual(os.path.dirname(os.path.abspath(magic.__file__)), os.path.dirname(magic.CACHE_FILE), "The tables must not be written next to the sources")
+
+  @colorize(color=RED)
+  def test_D11_encoded_moves(self):
+    for from_square in [cell_to_square((0, 0)), cell_to_square((3, 4)), cell_to_square((7, 7))]:
+      for to_square in [cell_to_square((0, 7)), cell_to_square((5, 2))]:
+        move = encode_move(from_square, to_square, CAPTURE)
+        self.assertLess(move, 1 << 16, "Moves must fit into 16 bits")
+        self.assertEqual(from_square, move_from_square(move))
+        self.assertEqual(to_square, move_to_square(move))
+        self.assertTrue(move & CAPTURE)
+
+    for configuration in ["random1.board", "random2.board"]:
+      self.board.load_from_disk("tests/" + configuration)
+      for white in [True, False]:
+        legal_moves = self.board.generate_legal_moves(white)
+        moves = self.board.generate_encoded_moves(white)
+        self.assertEqual("H", moves.typecode)
+        self.assertEqual([(piece.square, square) for piece, square in legal_moves], [(move_from_square(move), move_to_square(move)) for move in moves])
+        for move in moves:
+          self.assertEqual(self.board.get_cell(square_to_cell(move_to_square(move))) is not None, bool(move & CAPTURE), "Only captures must be flagged")
+
+    # The engine caches 16 bit moves, Move objects are only built for the caller
+    engine.transposition_table.clear()
+    self.board.load_from_disk("tests/random1.board")
+    best = engine.minMax_cached(self.board, MinMaxArg(depth=2))
+    self.assertIsInstance(best, engine.Move)
+    self.assertIs(self.board.get_cell(best.piece.cell), best.piece)
+    move, score, depth, _ = engine.transposition_table.probe(position_key(self.board.hash(), True), 2)
+    self.assertEqual((best.piece.square, cell_to_square(best.cell)), (move_from_square(move), move_to_square(move)))
+    self.assertEqual(best.score, score)
+
+  @colorize(color=RED)
+  def test_D12_incremental_evaluation(self):
+    def evaluate_from_scratch(board):
+      pawns = [[piece.square for piece in board.iterate_cells_with_pieces(white) if isinstance(piece, Pawn)] for white in [True, False]]
+      pawn_structure = taper(*evaluate_pawn_structure(*pawns), board.phase)
+      return pawn_structure + sum(piece.evaluate() for piece in board.iterate_cells_with_pieces(True)) - sum(piece.evaluate() for piece in board.iterate_cells_with_pieces(False))
+
+    # A white and a black knight on mirrored squares are worth the same
+    self.board.clear_board()
+    self.board.set_cell((2, 2), Knight(self.board, True))
+    self.board.set_cell((5, 2), Knight(self.board, False))
+    self.assertEqual(0, self.board.evaluate())
+    self.assertGreater(self.board.get_cell((2, 2)).evaluate(), 350, "A knight on c3 is worth more than its material")
+
+    rng = random.Random(3)
+    for configuration in ["random1.board", "random2.board"]:
+      for board in [Board(), BitBoard()]:
+        board.load_from_disk("tests/" + configuration)
+        initial = board.evaluate()
+        self.assertAlmostEqual(evaluate_from_scratch(board), initial)
+
+        # Swapping the colors and mirroring the board negates the evaluation
+        mirrored = Board()
+        mirrored.load_from_memory("\n".join(reversed(str(board).swapcase().split("\n"))))
+        self.assertAlmostEqual(-initial, mirrored.evaluate(), msg=f"Evaluation of {configuration} is not symmetric")
+
+        white = True
+        for _ in range(40):
+          moves = board.generate_legal_moves(white)
+          if not moves:
+            break
+          board.make_move(*rng.choice(moves))
+          white = not white
+          self.assertAlmostEqual(evaluate_from_scratch(board), board.evaluate(), msg=f"Incremental evaluation is wrong in {configuration}\n\n" + str(board))
+
+        while board.undo_stack:
+          board.unmake_move()
+        self.assertAlmostEqual(initial, board.evaluate())
+
+  @colorize(color=RED)
+  def test_D13_tapered_evaluation(self):
+    self.assertEqual(MAX_PHASE, self.board.phase, "The start position is a pure middle game")
+
+    # Hitting the rook on a8 with the knight lowers the phase, taking the move back restores it
+    knight = self.board.get_cell((0, 1))
+    self.board.set_cell((5, 1), knight)
+    self.board.make_move(knight, cell_to_square((7, 0)))
+    self.assertEqual(MAX_PHASE - 2, self.board.phase)
+    self.board.unmake_move()
+    self.assertEqual(MAX_PHASE, self.board.phase)
+
+    # With only kings and pawns left the king is rated with the end game table and wants to be central
+    self.board.clear_board()
+    self.board.set_cell((7, 6), King(self.board, False))
+    self.board.set_cell((3, 3), King(self.board, True))
+    self.board.set_cell((1, 0), Pawn(self.board, True))
+    self.board.set_cell((6, 0), Pawn(self.board, False))
+    self.assertEqual(0, self.board.phase)
+    self.assertGreater(self.board.evaluate(), 0, "A central king is better than a corner king in the end game")
+
+    # With enough pieces on the board the king is better off in the corner
+    for col in range(8):
+      self.board.set_cell((2, col), Queen(self.board, True))
+      self.board.set_cell((5, col), Queen(self.board, False))
+    self.assertLess(self.board.evaluate(), 0, "A corner king is better than a central king in the middle game")
+
+  @colorize(color=RED)
+  def test_D14_evaluate_many(self):
+    position = self.board.to_array()
+    self.assertEqual((64,), position.shape)
+    self.assertEqual(numpy.int8, position.dtype)
+    self.assertEqual(Rook.KIND, position[0], "Bit index 0 is a1")
+    self.assertEqual(EMPTY, position[3 * 8 + 4])
+    self.assertEqual(King.KIND + 6, position.reshape(8, 8)[7, 4], "Row 7, column 4 is the black king on e8")
+
+    # Collect positions of random games together with their evaluation on the board
+    rng = random.Random(13)
+    positions = []
+    expected = []
+    for configuration in ["random1.board", "random2.board"]:
+      self.board.load_from_disk("tests/" + configuration)
+      white = True
+      for _ in range(40):
+        moves = self.board.generate_legal_moves(white)
+        if not moves:
+          break
+        self.board.make_move(*rng.choice(moves))
+        white = not white
+        positions.append(self.board.to_array())
+        expected.append(self.board.evaluate())
+
+    actual = evaluate_many(numpy.array(positions))
+    for index in range(len(positions)):
+      self.assertAlmostEqual(expected[index], actual[index])
+      self.assertAlmostEqual(expected[index], evaluate_array(positions[index].reshape(8, 8)))
+
+    board = Board()
+    board.load_from_array(positions[-1])
+    self.assertEqual(str(self.board), str(board))
+    self.assertAlmostEqual(self.board.evaluate(), board.evaluate())
+
+  @colorize(color=RED)
+  def test_D15_delta_scored_children(self):
+    rng = random.Random(17)
+    for configuration in ["random1.board", "random2.board"]:
+      for board in [Board(), BitBoard()]:
+        board.load_from_disk("tests/" + configuration)
+        white = True
+        for _ in range(30):
+          moves = board.generate_encoded_moves(white)
+          if not moves:
+            break
+
+          scores = board.evaluate_children(moves)
+          for move, score in zip(moves, scores):
+            board.make_encoded_move(move)
+            self.assertEqual(board.evaluate(), score, f"Child score differs from the evaluation after the move in {configuration}")
+            board.unmake_move()
+
+          board.make_encoded_move(rng.choice(moves))
+          white = not white
+
+  @colorize(color=RED)
+  def test_D16_pawn_hash_table(self):
+    def pawn_key_from_scratch(board):
+      key = 0
+      for white in [True, False]:
+        for piece in board.iterate_cells_with_pieces(white):
+          if isinstance(piece, Pawn):
+            key ^= ZOBRIST_PIECE_KEYS[piece.code][piece.square]
+      return key
+
+    # Doubled and isolated pawns on the a-file held up by b7, an isolated passed pawn on e6 for WHITE
+    self.board.clear_board()
+    for cell in [(1, 0), (2, 0), (5, 4)]:
+      self.board.set_cell(cell, Pawn(self.board, True))
+    self.board.set_cell((6, 1), Pawn(self.board, False))
+    white_pawns = [cell_to_square(cell) for cell in [(1, 0), (2, 0), (5, 4)]]
+    middle_game, end_game = evaluate_pawn_structure(white_pawns, [cell_to_square((6, 1))])
+    self.assertEqual(-10 - 3 * 10 + 40 - (-10), middle_game)
+    self.assertEqual(-20 - 3 * 20 + 75 - (-20), end_game)
+    self.assertEqual((middle_game, end_game), self.board.pawn_structure_scores())
+
+    # The pawn key only depends on the pawns
+    key = self.board.pawn_hash()
+    self.board.set_cell((0, 4), King(self.board, True))
+    self.board.set_cell((4, 4), Rook(self.board, False))
+    self.assertEqual(key, self.board.pawn_hash())
+    self.assertNotEqual(key, self.board.hash())
+
+    # The incremental key matches the one from scratch during games, also after taking all moves back
+    rng = random.Random(19)
+    for configuration in ["random1.board", "random2.board"]:
+      for board in [Board(), BitBoard()]:
+        board.load_from_disk("tests/" + configuration)
+        initial = board.pawn_hash()
+        white = True
+        for _ in range(40):
+          moves = board.generate_legal_moves(white)
+          if not moves:
+            break
+          board.make_move(*rng.choice(moves))
+          white = not white
+          self.assertEqual(pawn_key_from_scratch(board), board.pawn_hash())
+        while board.undo_stack:
+          board.unmake_move()
+        self.assertEqual(initial, board.pawn_hash())
+
+    # A search meets the same pawn structures over and over, searching again only meets known ones
+    self.board.load_from_disk("tests/random2.board")
+    minMax(self.board, MinMaxArg(3, True))
+    table = self.board.pawn_table
+    self.assertGreater(table.hit_rate, 0.5)
+    self.assertLessEqual(table.used_slots(), table.misses)
+    misses = table.misses
+    engine.transposition_table.clear()
+    minMax(self.board, MinMaxArg(3, True))
+    self.assertEqual(misses, table.misses)
+
+    # A full table replaces the stored structure of a slot
+    table = PawnHashTable(size_bits=1)
+    self.assertIsNone(table.probe(5))
+    table.store(5, (1, 2))
+    self.assertEqual((1, 2), table.probe(5))
+    table.store(7, (3, 4))
+    self.assertIsNone(table.probe(5))
+    self.assertEqual((3, 4), table.probe(7))
+    self.assertEqual((2, 2, 0.5), (table.hits, table.misses, table.hit_rate))
+
+  @colorize(color=RED)
+  def test_D17_mobility_and_king_safety(self):
+    def mobility_from_scratch(board, white):
+      return sum(len(piece.get_attacked_squares()) for piece in board.iterate_cells_with_pieces(white) if not isinstance(piece, (Pawn, King)))
+
+    def king_zone_attacks_from_scratch(board, white):
+      king = board.find_king(white)
+      zone = [king.square] + [cell_to_square(cell) for cell in [(king.cell[0] + row, king.cell[1] + col) for row in (-1, 0, 1) for col in (-1, 0, 1) if row or col] if board.is_valid_cell(cell)]
+      return sum(piece.get_attacked_squares().count(square) for piece in board.iterate_cells_with_pieces(not white) for square in zone)
+
+    # Switching the term on rates a developed knight higher
+    self.board.set_cell((2, 2), self.board.get_cell((0, 1)))
+    developed = self.board.evaluate()
+    self.board.use_mobility = True
+    self.assertGreater(self.board.evaluate(), developed, "A developed knight adds mobility")
+
+    # A queen next to the king attacks its zone
+    self.board.clear_board()
+    self.board.set_cell((0, 4), King(self.board, True))
+    self.board.set_cell((7, 4), King(self.board, False))
+    self.assertEqual(0, self.board.king_zone_attacks(True))
+    self.board.set_cell((2, 4), Queen(self.board, False))
+    self.assertEqual(king_zone_attacks_from_scratch(self.board, True), self.board.king_zone_attacks(True))
+    self.assertGreater(self.board.king_zone_attacks(True), 0)
+
+    rng = random.Random(23)
+    for configuration in ["random1.board", "random2.board"]:
+      for board in [Board(), BitBoard()]:
+        board.load_from_disk("tests/" + configuration)
+        board.use_mobility = True
+        board.use_king_safety = True
+
+        # Swapping the colors and mirroring the board negates the evaluation
+        mirrored = Board()
+        mirrored.use_mobility = True
+        mirrored.use_king_safety = True
+        mirrored.load_from_memory("\n".join(reversed(str(board).swapcase().split("\n"))))
+        self.assertAlmostEqual(-board.evaluate(), mirrored.evaluate(), msg=f"Evaluation of {configuration} is not symmetric")
+
+        white = True
+        for _ in range(30):
+          for color in [True, False]:
+            self.assertEqual(mobility_from_scratch(board, color), board.count_mobility(color))
+            self.assertEqual(king_zone_attacks_from_scratch(board, color), board.king_zone_attacks(color))
+
+          moves = board.generate_encoded_moves(white)
+          if not moves:
+            break
+          scores = board.evaluate_children(moves)
+          for move, score in zip(moves, scores):
+            board.make_encoded_move(move)
+            self.assertEqual(board.evaluate(), score)
+            board.unmake_move()
+          board.make_encoded_move(rng.choice(moves))
+          white = not white
+
+  @colorize(color=RED)
+  def test_D18_nnue_accumulator(self):
+    # The table network computes the middle game score, the kings cancel each other
+    network = Network.from_tables()
+    rng = random.Random(29)
+    for configuration in ["random1.board", "random2.board"]:
+      for board in [Board(), BitBoard()]:
+        board.load_from_disk("tests/" + configuration)
+        handcrafted = board.evaluate()
+        board.set_network(network)
+        self.assertEqual(board.middle_game_score, board.evaluate())
+        initial = board.accumulator.copy()
+
+        white = True
+        for _ in range(40):
+          moves = board.generate_encoded_moves(white)
+          if not moves or board.kings[not white] is None:
+            break
+          scores = board.evaluate_children(moves)
+          for move, score in zip(moves, scores):
+            board.make_encoded_move(move)
+            self.assertEqual(board.evaluate(), score)
+            board.unmake_move()
+          board.make_encoded_move(rng.choice(moves))
+          white = not white
+          if board.kings[True] is not None and board.kings[False] is not None:
+            self.assertEqual(board.middle_game_score, board.evaluate(), f"Accumulator is wrong in {configuration}\n\n" + str(board))
+
+        while board.undo_stack:
+          board.unmake_move()
+        self.assertTrue(numpy.array_equal(initial, board.accumulator))
+        board.set_network(None)
+        self.assertEqual(handcrafted, board.evaluate())
+
+    # The incremental accumulator of a random network matches the one built from scratch
+    network = Network.random(seed=3)
+    self.board.set_network(network)
+    white = True
+    for _ in range(20):
+      self.board.make_move(*rng.choice(self.board.generate_legal_moves(white)))
+      white = not white
+    incremental = self.board.accumulator.copy()
+    self.board.set_network(network)
+    self.assertTrue(numpy.array_equal(incremental, self.board.accumulator))
+    self.assertEqual(numpy.int16, incremental.dtype)
+
+    # Networks survive saving and loading
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "network.npz")
+      network.save(path)
+      loaded = Network.load(path)
+    self.board.set_network(loaded)
+    self.assertEqual(network.evaluate(incremental), self.board.evaluate())
+
+    with self.assertRaises(ValueError):
+      Network(numpy.zeros((10, 4)), numpy.zeros(4), numpy.zeros((2, 4)), numpy.zeros(2), numpy.zeros(2), 0)
+
+  @colorize(color=RED)
+  def test_D19_texel_tuning(self):
+    positions, results = tuning.self_play(6, max_moves=60, seed=5)
+    self.assertEqual((len(results), 64), positions.shape)
+    self.assertTrue(set(results.tolist()) <= {0.0, 0.5, 1.0})
+
+    # The sparse feature matrix gives the same evaluation as the board
+    weights = current_weights()
+    scores = tuning.evaluate_features(tuning.weights_to_vector(weights), *tuning.features(positions))
+    for index in range(0, len(positions), 25):
+      self.board.load_from_array(positions[index])
+      self.assertAlmostEqual(self.board.evaluate(), scores[index])
+
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "positions.npy")
+      tuning.write_positions(path, positions, results)
+      chunks = list(tuning.read_chunks(path, chunk_size=100))
+      self.assertEqual(sum(len(chunk_results) for _, chunk_results in chunks), len(results))
+      self.assertTrue(numpy.array_equal(positions[100:200], chunks[1][0]))
+
+      # Tuning lowers the loss, the king material stays fixed
+      tuned, losses = tuning.tune(path, epochs=20, chunk_size=100)
+      self.assertLess(losses[-1], losses[0])
+      self.assertEqual(weights["middle_game_material"][5], tuned["middle_game_material"][5])
+
+      # The evaluation uses loaded weights until the original ones are loaded again
+      weights_path = os.path.join(directory, "weights.npz")
+      original_path = os.path.join(directory, "original.npz")
+      save_weights(original_path, **weights)
+      save_weights(weights_path, **tuned)
+      self.board.reset()
+      original = self.board.evaluate()
+      try:
+        load_weights(weights_path)
+        self.assertTrue(numpy.array_equal(numpy.rint(tuned["end_game_tables"]), current_weights()["end_game_tables"]))
+        self.board.reset()
+        self.assertAlmostEqual(evaluate_array(self.board.to_array()), self.board.evaluate())
+        # The exchange evaluation and the search margins use the tuned material as well
+        material = (numpy.rint(tuned["middle_game_material"]) + numpy.rint(tuned["end_game_material"])) // 2
+        self.assertEqual(material.astype(int).tolist(), MATERIAL_VALUES)
+      finally:
+        load_weights(original_path)
+      self.board.reset()
+      self.assertEqual(original, self.board.evaluate())
+      self.assertEqual([100, 350, 350, 525, 1000, 20000], MATERIAL_VALUES)
+      for name, values in current_weights().items():
+        self.assertTrue(numpy.array_equal(weights[name], values))
+
+
+  @colorize(color=RED)
+  def test_D20_static_exchange_evaluation(self):
+    def capture(from_cell, to_cell):
+      return encode_move(cell_to_square(from_cell), cell_to_square(to_cell), CAPTURE)
+
+    # The rook on d1 backs up the rook on d2 through it, so the black rook cannot hit back
+    self.board.load_from_disk("tests/see_xray.board")
+    zobrist = self.board.hash()
+    self.assertEqual(self.board.get_cell((1,3)), self.board.least_valuable_attacker(cell_to_square((4,3)), True))
+    self.assertEqual(self.board.get_cell((0,3)), self.board.least_valuable_attacker(cell_to_square((4,3)), True, {cell_to_square((1,3))}))
+    self.assertEqual(100, self.board.see(capture((1,3), (4,3))))
+    self.assertEqual(zobrist, self.board.hash())
+    self.board.set_cell((0,3), None)
+    self.assertEqual(100 - 525, self.board.see(capture((1,3), (4,3))))
+
+    # The pawn on c7 defends d6, the least valuable attacker goes first
+    self.board.load_from_disk("tests/see_defended.board")
+    self.assertEqual(100 - 1000 + 100, self.board.see(capture((0,3), (5,3))))
+    self.assertEqual(100 - 350 + 100, self.board.see(capture((3,4), (5,3))))
+
+    # The king may not hit back on a square the rook behind still attacks
+    self.board.load_from_disk("tests/see_king.board")
+    self.assertEqual(100, self.board.see(capture((1,3), (5,3))))
+
+    # Black captures, first an undefended knight, then a knight defended by a pawn
+    self.board.set_cell((4,4), Knight(self.board, True))
+    self.assertEqual(350, self.board.see(capture((5,3), (4,4))))
+    self.board.set_cell((3,5), Pawn(self.board, True))
+    self.assertEqual(350 - 100, self.board.see(capture((5,3), (4,4))))
+
+  @colorize(color=RED)
+  def test_D21_lazy_evaluation(self):
+    self.board.load_from_disk("tests/random1.board")
+    self.board.use_mobility = True
+    self.board.use_king_safety = True
+    full = self.board.evaluate()
+    estimate = taper(self.board.middle_game_score, self.board.end_game_score, self.board.phase)
+    self.assertNotEqual(full, estimate)
+
+    # Far outside of the window on either side the bound of the material and piece-square score is returned right away
+    self.assertEqual(estimate + LAZY_EVALUATION_MARGIN, self.board.evaluate(estimate + LAZY_EVALUATION_MARGIN, estimate + 1000))
+    self.assertEqual(estimate - LAZY_EVALUATION_MARGIN, self.board.evaluate(estimate - 1000, estimate - LAZY_EVALUATION_MARGIN))
+    self.assertEqual((2, 0), (self.board.lazy_exits, self.board.full_evaluations))
+
+    # Close to the window all terms count
+    self.assertEqual(full, self.board.evaluate(estimate - 10, estimate + 10))
+    self.assertEqual(full, self.board.evaluate(estimate + LAZY_EVALUATION_MARGIN - 1, estimate + 1000))
+    self.assertEqual((2, 2), (self.board.lazy_exits, self.board.full_evaluations))
+
+    # Children are evaluated lazily as well, without making the moves decided by material
+    moves = self.board.generate_encoded_moves(True)
+    window = (full + LAZY_EVALUATION_MARGIN - 50, full + LAZY_EVALUATION_MARGIN - 40)
+    lazy_scores = self.board.evaluate_children(moves, *window)
+    self.assertEqual(len(moves), self.board.lazy_exits + self.board.full_evaluations - 4)
+    self.assertGreater(self.board.lazy_exits, 2)
+    for move, lazy_score in zip(moves, lazy_scores):
+      self.board.make_encoded_move(move)
+      self.assertEqual(self.board.evaluate(*window), lazy_score)
+      self.board.unmake_move()
+
+  @colorize(color=RED)
+  def test_D22_alpha_beta(self):
+    for position in [None, "tests/random1.board", "tests/random2.board"]:
+      for depth, white in [(2, False), (3, True), (3, False), (4, True)]:
+        if position is None:
+          self.board.reset()
+        else:
+          self.board.load_from_disk(position)
+        zobrist = self.board.hash()
+        engine.transposition_table.clear()
+        engine.nodes = 0
+        expected = minMax(self.board, MinMaxArg(depth, white))
+        minimax_nodes = engine.nodes
+
+        # The same best move and score as the full search, with fewer positions searched
+        engine.nodes = 0
+        for search in [engine.alpha_beta, engine.alpha_beta_cached, engine.alpha_beta_cached]:
+          move = search(self.board, MinMaxArg(depth, white))
+          self.assertIs(expected.piece, move.piece)
+          self.assertEqual(expected.cell, move.cell)
+          self.assertEqual(expected.score, move.score)
+          self.assertEqual(zobrist, self.board.hash())
+        if depth == 4:
+          self.assertLess(engine.nodes * 2, minimax_nodes)
+
+    # Without moves the side to move has lost
+    self.board.load_from_memory(". . . . . . . .\n. . . . . . . .\n. . . . . . . .\n. . . . . . . .\n. . . . . . . .\n. . . . . . . .\n. . . . . . q q\n. . . . . . . K")
+    self.assertEqual(-engine.MATE_SCORE, engine.alpha_beta(self.board, MinMaxArg(2, True)).score)
+
+  @colorize(color=RED)
+  def test_D23_iterative_deepening(self):
+    self.board.load_from_disk("tests/random1.board")
+    zobrist = self.board.hash()
+    engine.transposition_table.clear()
+
+    # Without a time budget all iterations complete, the result is the one of the full search
+    move, score, depth = engine.iterative_deepening(self.board, MinMaxArg(4, False))
+    self.assertEqual(4, depth)
+    self.assertEqual(minMax(self.board, MinMaxArg(4, False)).score, score)
+    self.assertEqual(minMax(self.board, MinMaxArg(3, True, quiescence=True)).score, engine.suggest_move(self.board).score)
+    self.assertEqual(zobrist, self.board.hash())
+
+    # Past the soft limit no new iteration starts, past the hard limit a running one is given up
+    _, _, depth = engine.iterative_deepening(self.board, MinMaxArg(4, True), time_ms=1000, soft_limit=0)
+    self.assertEqual(1, depth)
+    undo_depth = len(self.board.undo_stack)
+    move, score, depth = engine.iterative_deepening(self.board, MinMaxArg(4, True), time_ms=0.001, soft_limit=1e9)
+    self.assertEqual(1, depth)
+    self.assertEqual(undo_depth, len(self.board.undo_stack))
+    self.assertEqual(zobrist, self.board.hash())
+    self.assertIsNone(engine.deadline)
+    best = minMax(self.board, MinMaxArg(1, True))
+    self.assertEqual(best.score, score)
+    self.assertEqual(best.cell, square_to_cell(move_to_square(move)))
+
+    # The budget is kept, deeper searches with more time
+    start = time.perf_counter()
+    move = engine.suggest_move(self.board, time_ms=200)
+    self.assertLess(time.perf_counter() - start, 0.2 + 0.5)
+    self.assertIsNotNone(move.piece)
+    self.assertEqual(2, engine.iterative_deepening(self.board, MinMaxArg(2, True), time_ms=10000)[2])
+
+  @colorize(color=RED)
+  def test_D24_transposition_table(self):
+    # A bucket keeps the deepest result and the newest other one
+    table = TranspositionTable(size_mb=BUCKET_SIZE * ENTRY_DTYPE.itemsize / (1 << 20))
+    self.assertEqual(1, table.buckets)
+    table.store(11, 1, 0.5, 3, engine.EXACT)
+    table.store(12, 2, 1.5, 1, engine.LOWER_BOUND)
+    self.assertEqual((1, 0.5, 3, engine.EXACT), table.probe(11))
+    self.assertEqual((2, 1.5, 1, engine.LOWER_BOUND), table.probe(12, 1))
+    self.assertIsNone(table.probe(12, 2))
+    table.store(13, 3, 2.5, 2, engine.UPPER_BOUND)
+    self.assertIsNone(table.probe(12))
+    self.assertEqual(3, table.probe(13)[0])
+    table.store(14, 4, 3.5, 3, engine.EXACT)
+    self.assertIsNone(table.probe(13))
+    self.assertEqual((1, 0.5, 3, engine.EXACT), table.probe(11))
+    self.assertEqual((4, 3.5, 3, engine.EXACT), table.probe(14))
+    self.assertEqual((5, 3, 3, 2), (table.hits, table.misses, table.collisions, table.overwrites))
+    self.assertEqual(2, table.used_entries())
+
+    # A position is never stored twice, a shallower result does not replace a deeper one of the same position
+    table.store(14, 5, 9.5, 1, engine.LOWER_BOUND)
+    self.assertEqual((4, 3.5, 3, engine.EXACT), table.probe(14))
+    table.store(11, 6, 7.5, 4, engine.EXACT)
+    table.store(14, 7, 8.5, 2, engine.UPPER_BOUND)
+    self.assertEqual((6, 7.5, 4, engine.EXACT), table.probe(11))
+    self.assertEqual((4, 3.5, 3, engine.EXACT), table.probe(14))
+    self.assertEqual([11, 14], sorted(int(key) for key in table.keys[0]))
+    self.assertEqual(2, table.overwrites)
+    table.clear()
+    self.assertEqual((0, 0, None), (table.used_entries(), table.hits, table.probe(11)))
+
+    # Both colors get their own results of the same configuration
+    self.board.load_from_disk("tests/random1.board")
+    self.assertNotEqual(position_key(self.board.hash(), True), position_key(self.board.hash(), False))
+    engine.transposition_table.clear()
+    for white in [True, False]:
+      self.assertEqual(minMax(self.board, MinMaxArg(2, white)).score, engine.minMax_cached(self.board, MinMaxArg(2, white)).score)
+    engine.transposition_table.reset_counters()
+    for white in [True, False]:
+      self.assertEqual(minMax(self.board, MinMaxArg(2, white)).score, engine.alpha_beta_cached(self.board, MinMaxArg(2, white)).score)
+    self.assertEqual(0, engine.transposition_table.misses)
+
+    # A small table stays at its size, results it loses are searched again
+    expected = minMax(self.board, MinMaxArg(4, True))
+    small = TranspositionTable(size_mb=0.001)
+    engine.transposition_table, table = small, engine.transposition_table
+    try:
+      self.assertEqual(expected.score, engine.alpha_beta_cached(self.board, MinMaxArg(4, True)).score)
+      self.assertGreater(small.overwrites, 0)
+      self.assertLessEqual(small.size_mb, 0.001)
+    finally:
+      engine.transposition_table = table
+
+  @colorize(color=RED)
+  def test_D25_move_ordering(self):
+    self.board.load_from_disk("tests/random1.board")
+    moves = self.board.generate_encoded_moves(True)
+    quiet = [move for move in moves if not move & CAPTURE]
+    ordering = MoveOrdering()
+
+    # Killers and history are learned from the cutoffs of quiet moves only
+    ordering.update(quiet[3], True, 2, 3, 0)
+    ordering.update(quiet[4], True, 2, 1, 1)
+    ordering.update(quiet[5], True, 1, 2, 0)
+    ordering.update(quiet[5], False, 3, 2, 0)
+    captures = [move for move in moves if move & CAPTURE]
+    ordering.update(captures[0], True, 2, 4, 0)
+    self.assertEqual([quiet[4], quiet[3]], ordering.killers[2])
+    self.assertEqual((5, 4, 0.8), (ordering.cutoffs, ordering.first_move_cutoffs, ordering.first_move_cutoff_rate))
+
+    # Hash move, captures by victim and attacker, killers, quiet moves by history
+    ordered = ordering.order(self.board, moves, True, 2, quiet[0])
+    self.assertEqual(sorted(moves), sorted(ordered))
+    self.assertEqual(quiet[0], ordered[0])
+    def victim_and_attacker(move):
+      return (self.board.squares[move_to_square(move)].KIND, -self.board.squares[move_from_square(move)].KIND)
+    self.assertEqual(sorted(captures, key=victim_and_attacker, reverse=True), ordered[1:len(captures) + 1])
+    self.assertEqual([quiet[4], quiet[3], quiet[5]], ordered[len(captures) + 1:len(captures) + 4])
+    self.assertEqual([quiet[3], quiet[5], quiet[4]], ordering.order(self.board, moves, True, 4)[len(captures):len(captures) + 3])
+
+    # The search still finds the same score with and without the ordering, most cutoffs come from the first move
+    expected = minMax(self.board, MinMaxArg(4, False, quiescence=True))
+    for ordering in [False, True]:
+      engine.transposition_table.clear()
+      move, score, _ = engine.iterative_deepening(self.board, MinMaxArg(4, False, quiescence=True, ordering=ordering))
+      self.assertEqual(expected.score, score)
+      self.assertGreater(engine.move_ordering.first_move_cutoff_rate, 0.5)
+
+  @colorize(color=RED)
+  def test_D26_quiescence_search(self):
+    # Captures come straight from the attack maps, the same ones as among all moves
+    for configuration in ["random1.board", "random2.board", "see_xray.board", "see_defended.board", "see_king.board"]:
+      self.board.load_from_disk("tests/" + configuration)
+      for white in [True, False]:
+        captures = [move for move in self.board.generate_encoded_moves(white) if move & CAPTURE]
+        self.assertEqual(captures, list(self.board.generate_encoded_captures(white)))
+
+    # The queen on d5 looks good, until a pawn hits it
+    self.board.load_from_memory(". . . . . . k .\n. . . . . . . .\n. . p . p . . .\n. . . . . . . .\n. . . . . . . .\n. . . . . . . .\n. . . . . . . .\n. . . Q . . K .")
+    zobrist = self.board.hash()
+    self.board.make_encoded_move(encode_move(cell_to_square((0,3)), cell_to_square((4,3))))
+    self.assertGreater(self.board.evaluate(), 800)
+    engine.quiescence_nodes = 0
+    self.assertLess(-engine.quiescence(self.board, False, -engine.INFINITY, engine.INFINITY), 0)
+    self.assertGreater(engine.quiescence_nodes, 1)
+
+    # Standing pat above beta ends the search right away
+    engine.quiescence_nodes = 0
+    self.assertEqual(-self.board.evaluate(2000, 2000), engine.quiescence(self.board, False, -2000, -2000))
+    self.assertEqual(1, engine.quiescence_nodes)
+    self.board.unmake_move()
+    self.assertEqual(zobrist, self.board.hash())
+
+    # At the leaves the search sees the queen being hit back after hitting the queen, instead of counting it as won
+    self.board.load_from_memory("r . . q . r k .\n. . . . . p p p\n. . . . . . . .\n. . . . . . . .\n. . . . p . p .\n. . . . . . . .\n. . . . . P P P\nR . . Q . R K N")
+    engine.transposition_table.clear()
+    engine.nodes = engine.quiescence_nodes = 0
+    for search in [minMax, engine.alpha_beta]:
+      move = search(self.board, MinMaxArg(1, True, quiescence=True))
+      self.assertNotEqual((7, 3), move.cell)
+      self.assertLess(move.score, 500)
+    self.assertEqual(2, engine.nodes)
+    self.assertGreater(engine.quiescence_nodes, 2)
+
+    # The quiescence search is opt-in, plain minMax takes the evaluation at the leaves
+    engine.quiescence_nodes = 0
+    move = minMax(self.board, MinMaxArg(1, True))
+    self.assertEqual((7, 3), move.cell)
+    self.assertGreater(move.score, 1000)
+    self.assertEqual(0, engine.quiescence_nodes)
+
 
 if __name__ == "__main__":
   unittest.main()
 
-#(azcn03)
\ No newline at end of file
+#(azcn03)
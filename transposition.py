@@ -0,0 +1,151 @@
+"""
+Fixed-size transposition table for the engine searches (see :py:mod:`engine`), a preallocated numpy structured array
+instead of a dictionary growing with every searched position.
+
+Positions are found by their Zobrist key (see :py:meth:`BoardBase.hash <board.BoardBase.hash>`) combined with the
+color to play, see :py:func:`position_key`. The table is split into buckets of two entries and a key always goes to
+the bucket ``key % buckets``. The first entry of a bucket is depth-preferred: it keeps the result of the deepest
+search, which saved the most work. The second entry always takes the newest result that is not deep enough for the
+first one, so recent positions are found as well.
+"""
+import random
+import numpy as np
+
+# An entry: the full key to tell positions sharing a bucket apart, the 16 bit best move (see :py:mod:`moves`),
+# the remaining search depth (-1 for an empty entry), the score and its bound type
+ENTRY_DTYPE = np.dtype([("key", np.uint64), ("move", np.uint16), ("depth", np.int8), ("bound", np.uint8), ("score", np.float64)])
+
+# Entries per bucket: the depth-preferred one and the always-replace one
+BUCKET_SIZE = 2
+
+# Changes the key of a position when black is to play, so both colors never share results
+BLACK_TO_PLAY = random.Random(0x7AB1E).getrandbits(64)
+# Changes the key of a position searched with the quiescence search at the leaves, as it scores differently
+QUIESCENCE_SEARCH = random.Random(0x9E5CE).getrandbits(64)
+
+
+def position_key(zobrist, white, quiescence=False):
+    """
+    Returns the key of a position in the table.
+
+    :param zobrist: The Zobrist key of the board configuration
+    :param white: The color to play
+    :param quiescence: Whether the leaves of the search are resolved by the quiescence search (see
+        :py:class:`engine.MinMaxArg`)
+    """
+    key = zobrist if white else zobrist ^ BLACK_TO_PLAY
+    return key ^ QUIESCENCE_SEARCH if quiescence else key
+
+
+class TranspositionTable:
+    """
+    Stores search results (move, score, bound type) by position and remaining depth in a fixed amount of memory.
+
+    ``hits`` and ``misses`` count the probes, ``collisions`` the stores into a bucket whose depth-preferred entry
+    holds another position and ``overwrites`` the results of other positions lost by a store. Many overwrites mean
+    the table is too small for the searches.
+    """
+
+    def __init__(self, size_mb=16):
+        """
+        :param size_mb: Memory of the table in megabytes
+        """
+        self.buckets = max(1, int(size_mb * (1 << 20)) // (BUCKET_SIZE * ENTRY_DTYPE.itemsize))
+        self.entries = np.zeros((self.buckets, BUCKET_SIZE), dtype=ENTRY_DTYPE)
+        # Views of the fields, reading a single value from them is faster than from a structured element
+        self.keys = self.entries["key"]
+        self.moves = self.entries["move"]
+        self.depths = self.entries["depth"]
+        self.bounds = self.entries["bound"]
+        self.scores = self.entries["score"]
+        self.clear()
+
+    @property
+    def size_mb(self):
+        """
+        The memory of the entries in megabytes.
+        """
+        return self.entries.nbytes / (1 << 20)
+
+    def clear(self):
+        """
+        Empties all entries and sets the counters back to 0.
+        """
+        self.depths[:] = -1
+        self.reset_counters()
+
+    def reset_counters(self):
+        """
+        Sets all counters back to 0, keeping the stored results.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.overwrites = 0
+
+    def probe(self, key, depth=None):
+        """
+        Looks up the result of a position and counts a hit or a miss.
+
+        :param key: The key of the position, see :py:func:`position_key`
+        :param depth: Only accept a result of exactly this remaining depth, any depth if None
+        :return: A tuple (move, score, depth, bound) or None if there is no result
+        """
+        bucket = key % self.buckets
+        keys = self.keys
+        depths = self.depths
+        for entry in range(BUCKET_SIZE):
+            if keys[bucket, entry] == key and depths[bucket, entry] >= 0 and (depth is None or depths[bucket, entry] == depth):
+                self.hits += 1
+                return int(self.moves[bucket, entry]), float(self.scores[bucket, entry]), int(depths[bucket, entry]), int(self.bounds[bucket, entry])
+        self.misses += 1
+        return None
+
+    def store(self, key, move, score, depth, bound):
+        """
+        Stores the result of a search. A bucket holds every position at most once, a new result of a stored
+        position only replaces the stored one if it is at least as deep. Any other result goes into the
+        depth-preferred entry of its bucket if it is at least as deep as the result there, which moves over into the
+        always-replace entry. Otherwise it takes the always-replace entry.
+
+        :param key: The key of the position, see :py:func:`position_key`
+        :param move: The best 16 bit move
+        :param score: The score
+        :param depth: The remaining depth of the search
+        :param bound: The bound type of the score
+        """
+        bucket = key % self.buckets
+        keys = self.keys
+        depths = self.depths
+        entries = self.entries
+        result = (key, move, depth, bound, score)
+        first_depth = depths[bucket, 0]
+        if first_depth < 0:
+            entries[bucket, 0] = result
+            return
+        if keys[bucket, 0] == key:
+            if depth >= first_depth:
+                entries[bucket, 0] = result
+            return
+        self.collisions += 1
+
+        second_used = depths[bucket, 1] >= 0
+        if second_used and keys[bucket, 1] == key:
+            if depth < depths[bucket, 1]:
+                return
+            # The older result of the same position is replaced, no other position loses its result
+            second_used = False
+        if second_used:
+            self.overwrites += 1
+        if depth >= first_depth:
+            # The replaced result takes the always-replace entry
+            entries[bucket, 1] = entries[bucket, 0]
+            entries[bucket, 0] = result
+        else:
+            entries[bucket, 1] = result
+
+    def used_entries(self):
+        """
+        Returns the number of entries holding a result.
+        """
+        return int(np.count_nonzero(self.depths >= 0))
@@ -0,0 +1,294 @@
+"""
+Offline Texel-style tuning of the material values and piece-square tables of :py:mod:`evaluation`.
+
+The tuner fits the weights to labelled positions: positions together with the result of the game they were taken
+from (1 WHITE won, 0.5 draw, 0 BLACK won). The tapered evaluation is linear in the weights: a chunk of positions
+becomes a sparse feature matrix with a 1 for every piece code on every bit index, its products with the middle game
+and end game weight of each feature are blended by the game phase. The weight of a feature is the material plus the
+piece-square weight of its piece kind and cell, negated for black pieces, so both colors share their weights. The
+pawn structure terms are not tuned, they are added as a fixed part of the score.
+
+The loss is the logistic loss between the results and ``sigmoid(scale * score)``. Its gradient is computed chunk by
+chunk with numpy and the weights are updated with Adam once per pass over the whole set. Positions are stored as
+int8 arrays (see :py:meth:`BoardBase.to_array <board.BoardBase.to_array>`) in a memory-mapped ``.npy`` file and
+only one chunk is held in memory at a time, there is never a :py:class:`Board <board.Board>` per position.
+
+Labelled positions come from :py:func:`write_positions` or from games of the engine against itself, see
+:py:func:`self_play`. The result is written with :py:func:`evaluation.save_weights` and loaded with
+:py:func:`evaluation.load_weights`.
+"""
+import math
+import random
+import numpy as np
+from board import Board
+from engine import MinMaxArg, minMax
+from squares import cell_to_square
+from evaluation import (
+    EMPTY,
+    MAX_PHASE,
+    PHASE_ARRAY,
+    current_weights,
+    evaluate_pawn_structure_many,
+    save_weights,
+)
+
+# Layout of the weight vector: middle game material and tables, then end game material and tables
+_TABLE_OFFSET = 6
+_END_GAME_OFFSET = 6 + 6 * 64
+WEIGHTS = 2 * _END_GAME_OFFSET
+
+# The features are the piece codes on the bit indices: code * 64 + index
+FEATURES = 12 * 64
+_CODES = np.repeat(np.arange(12), 64)
+_INDICES = np.tile(np.arange(64), 12)
+_SIGNS = np.where(_CODES < 6, 1.0, -1.0)
+# The tables are written down from WHITEs side: row 0 of a table is the 8th rank, see evaluation.flatten
+_CELLS = np.where(_CODES < 6, 7 - _INDICES // 8, _INDICES // 8) * 8 + _INDICES % 8
+# Middle game weights of every feature, the end game ones follow at _END_GAME_OFFSET
+_MATERIAL_COLUMNS = _CODES % 6
+_TABLE_COLUMNS = _TABLE_OFFSET + _MATERIAL_COLUMNS * 64 + _CELLS
+_GRADIENT_COLUMNS = np.concatenate([
+    _MATERIAL_COLUMNS, _TABLE_COLUMNS, _END_GAME_OFFSET + _MATERIAL_COLUMNS, _END_GAME_OFFSET + _TABLE_COLUMNS,
+])
+
+# Converts centipawns into a winning probability: 400 centipawns more make a win ten times as likely as a loss
+DEFAULT_SCALE = math.log(10) / 400
+
+# A labelled position: the piece codes by bit index and the result of the game from WHITEs perspective
+POSITION_DTYPE = np.dtype([("position", np.int8, 64), ("result", np.float32)])
+
+
+def write_positions(path, positions, results):
+    """
+    Writes labelled positions into a ``.npy`` file for :py:func:`read_chunks`.
+
+    :param positions: An (N, 64) int8 array of piece codes, see :py:meth:`BoardBase.to_array <board.BoardBase.to_array>`
+    :param results: N game results from WHITEs perspective: 1, 0.5 or 0
+    """
+    labelled = np.empty(len(positions), dtype=POSITION_DTYPE)
+    labelled["position"] = positions
+    labelled["result"] = results
+    np.save(path, labelled)
+
+
+def read_chunks(path, chunk_size=100000):
+    """
+    Reads labelled positions from a file written by :py:func:`write_positions`, one chunk at a time.
+    The file is memory-mapped, so only the current chunk is loaded.
+
+    :return: A generator of tuples (positions, results)
+    """
+    labelled = np.load(path, mmap_mode="r")
+    if labelled.dtype != POSITION_DTYPE:
+        raise ValueError(f"{path} does not hold labelled positions")
+    for start in range(0, len(labelled), chunk_size):
+        chunk = np.array(labelled[start:start + chunk_size])
+        yield chunk["position"], chunk["result"].astype(np.float64)
+
+
+def weights_to_vector(weights):
+    """
+    Packs a dict as returned by :py:func:`evaluation.current_weights` into a weight vector.
+    """
+    return np.concatenate([
+        weights["middle_game_material"], weights["middle_game_tables"].reshape(-1),
+        weights["end_game_material"], weights["end_game_tables"].reshape(-1),
+    ]).astype(np.float64)
+
+
+def vector_to_weights(vector):
+    """
+    Unpacks a weight vector into the arguments of :py:func:`evaluation.save_weights`.
+    """
+    return {
+        "middle_game_material": vector[:_TABLE_OFFSET],
+        "middle_game_tables": vector[_TABLE_OFFSET:_END_GAME_OFFSET].reshape(6, 8, 8),
+        "end_game_material": vector[_END_GAME_OFFSET:_END_GAME_OFFSET + _TABLE_OFFSET],
+        "end_game_tables": vector[_END_GAME_OFFSET + _TABLE_OFFSET:].reshape(6, 8, 8),
+    }
+
+
+def _feature_weights(vector):
+    """
+    Returns the middle game and end game weight of every feature: the material plus the table weight of its piece
+    kind and cell, negated for black pieces.
+    """
+    return (
+        _SIGNS * (vector[_MATERIAL_COLUMNS] + vector[_TABLE_COLUMNS]),
+        _SIGNS * (vector[_END_GAME_OFFSET + _MATERIAL_COLUMNS] + vector[_END_GAME_OFFSET + _TABLE_COLUMNS]),
+    )
+
+
+def _weight_gradient(middle_game, end_game):
+    """
+    Turns gradients by the middle game and end game feature weights into the gradient by the weight vector.
+    """
+    return np.bincount(
+        _GRADIENT_COLUMNS,
+        weights=np.concatenate([_SIGNS * middle_game, _SIGNS * middle_game, _SIGNS * end_game, _SIGNS * end_game]),
+        minlength=WEIGHTS,
+    )
+
+
+def features(positions):
+    """
+    Builds the sparse feature matrix of a chunk of positions in coordinate form, with one entry of 1 per piece.
+
+    :param positions: An (N, 64) int8 array of piece codes
+    :return: A tuple (rows, columns, phase, fixed): the pieces are at ``(rows[k], columns[k])``, phase holds
+        the game phase of every position as a share of :py:data:`evaluation.MAX_PHASE` and fixed the tapered pawn
+        structure score
+    """
+    positions = np.asarray(positions)
+    rows, indices = np.nonzero(positions != EMPTY)
+    codes = positions[rows, indices].astype(np.intp)
+    phase = np.minimum(np.bincount(rows, weights=PHASE_ARRAY[codes], minlength=len(positions)), MAX_PHASE) / MAX_PHASE
+
+    pawn_middle_game, pawn_end_game = evaluate_pawn_structure_many(positions)
+    fixed = pawn_middle_game * phase + pawn_end_game * (1 - phase)
+    return rows, codes * 64 + indices, phase, fixed
+
+
+def evaluate_features(vector, rows, columns, phase, fixed):
+    """
+    Evaluates every position of a chunk given as feature matrix (see :py:func:`features`) with a weight vector.
+    """
+    middle_game, end_game = _feature_weights(vector)
+    count = len(phase)
+    middle_game = np.bincount(rows, weights=middle_game[columns], minlength=count)
+    end_game = np.bincount(rows, weights=end_game[columns], minlength=count)
+    return middle_game * phase + end_game * (1 - phase) + fixed
+
+
+def loss_and_gradient(vector, chunks, scale=DEFAULT_SCALE):
+    """
+    Computes the mean logistic loss over all positions and its gradient by the weights.
+
+    :param chunks: An iterable of (positions, results) tuples, e.g. :py:func:`read_chunks`
+    :return: A tuple (loss, gradient, count) with count being the number of positions
+    """
+    loss = 0.0
+    middle_game = np.zeros(FEATURES)
+    end_game = np.zeros(FEATURES)
+    count = 0
+    for positions, results in chunks:
+        rows, columns, phase, fixed = features(positions)
+        scores = evaluate_features(vector, rows, columns, phase, fixed)
+        probabilities = 1 / (1 + np.exp(-scale * scores))
+        # Keep the logarithms finite for positions rated far beyond any doubt
+        probabilities = np.clip(probabilities, 1e-12, 1 - 1e-12)
+        loss -= np.sum(results * np.log(probabilities) + (1 - results) * np.log(1 - probabilities))
+        residuals = scale * (probabilities - results)
+        middle_game += np.bincount(columns, weights=(residuals * phase)[rows], minlength=FEATURES)
+        end_game += np.bincount(columns, weights=(residuals * (1 - phase))[rows], minlength=FEATURES)
+        count += len(results)
+    return loss / count, _weight_gradient(middle_game, end_game) / count, count
+
+
+def tune(path, epochs=100, learning_rate=2.0, chunk_size=100000, scale=DEFAULT_SCALE, weights=None, log=None):
+    """
+    Fits material values and piece-square tables to the labelled positions of a file with Adam, starting from
+    the current weights. The king material stays fixed, it is the same for both colors anyway.
+
+    :param path: A file written by :py:func:`write_positions`
+    :param epochs: Passes over the whole file, each one gives a weight update
+    :param learning_rate: Step size of the updates in centipawns
+    :param chunk_size: Positions held in memory at once
+    :param weights: Start weights as returned by :py:func:`evaluation.current_weights`, the current ones if None
+    :param log: Called with (epoch, loss) after every pass if given, e.g. print
+    :return: A tuple (weights, losses) with the tuned weights and the loss of every pass
+    """
+    vector = weights_to_vector(current_weights() if weights is None else weights)
+    fixed = np.zeros(WEIGHTS, dtype=bool)
+    fixed[[5, _END_GAME_OFFSET + 5]] = True
+
+    first_moment = np.zeros(WEIGHTS)
+    second_moment = np.zeros(WEIGHTS)
+    beta1, beta2 = 0.9, 0.999
+    losses = []
+    for epoch in range(1, epochs + 1):
+        loss, gradient, _ = loss_and_gradient(vector, read_chunks(path, chunk_size), scale)
+        losses.append(loss)
+        if log is not None:
+            log(epoch, loss)
+
+        gradient[fixed] = 0
+        first_moment = beta1 * first_moment + (1 - beta1) * gradient
+        second_moment = beta2 * second_moment + (1 - beta2) * gradient ** 2
+        step = first_moment / (1 - beta1 ** epoch) / (np.sqrt(second_moment / (1 - beta2 ** epoch)) + 1e-12)
+        vector -= learning_rate * step
+    return vector_to_weights(vector), losses
+
+
+def tune_to_file(path, weights_path, **kwargs):
+    """
+    Runs :py:func:`tune` and writes the tuned weights for :py:func:`evaluation.load_weights`.
+
+    :return: The losses of all passes
+    """
+    weights, losses = tune(path, **kwargs)
+    save_weights(weights_path, **weights)
+    return losses
+
+
+def self_play(games, max_moves=80, randomness=0.2, seed=0, depth=1):
+    """
+    Plays games of the engine against itself and labels every position with the result.
+    Some moves are random to see a wider range of positions. A side without legal moves has lost the game (the
+    engine does not tell stalemate from mate), games reaching max_moves are adjudicated by the evaluation:
+    more than a pawn ahead counts as a win, anything else as a draw.
+
+    :param games: The number of games
+    :param max_moves: The length after which a game is adjudicated
+    :param randomness: The share of random moves
+    :param depth: The search depth of the engine moves
+    :return: A tuple (positions, results) for :py:func:`write_positions`
+    """
+    rng = random.Random(seed)
+    positions = []
+    results = []
+    for _ in range(games):
+        board = Board()
+        board.reset()
+        game = []
+        white = True
+        result = None
+        for _ in range(max_moves):
+            moves = board.generate_legal_moves(white)
+            if not moves:
+                result = 0.0 if white else 1.0
+                break
+            if rng.random() < randomness:
+                piece, square = rng.choice(moves)
+                board.make_move(piece, square)
+            else:
+                move = minMax(board, MinMaxArg(depth, white))
+                board.make_move(move.piece, cell_to_square(move.cell))
+            white = not white
+            game.append(board.to_array())
+
+        if result is None:
+            score = board.evaluate()
+            result = 1.0 if score > 100 else 0.0 if score < -100 else 0.5
+        positions.extend(game)
+        results.extend([result] * len(game))
+    return np.array(positions, dtype=np.int8).reshape(-1, 64), np.array(results, dtype=np.float32)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tunes material values and piece-square tables on labelled positions.")
+    parser.add_argument("positions", help="labelled positions written by write_positions")
+    parser.add_argument("weights", help="output file for evaluation.load_weights")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--learning-rate", type=float, default=2.0)
+    parser.add_argument("--self-play", type=int, metavar="GAMES", help="first write the positions of that many self-play games")
+    arguments = parser.parse_args()
+
+    if arguments.self_play:
+        write_positions(arguments.positions, *self_play(arguments.self_play))
+    tune_to_file(
+        arguments.positions, arguments.weights, epochs=arguments.epochs, learning_rate=arguments.learning_rate,
+        log=lambda epoch, loss: print(f"{epoch:4} {loss:.6f}"),
+    )